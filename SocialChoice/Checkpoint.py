@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+
+# Columns identifying one result row; a row is done once a row with the same key is in the checkpoint.
+KEY_COLUMNS = ('file', 'rule', 'distribution', 'param', 'normalization', 'instance', 'seed', 'mode')
+
+# Name of the file holding the run settings (the root seed entropy) inside a checkpoint directory.
+RUN_FILE = 'run.json'
+
+
+class Checkpoint:
+    """
+    Append-only on-disk store of completed experiment results, so an interrupted sweep resumes where it stopped.
+
+    The checkpoint is a directory with one JSON-lines shard per data file, each line holding one result row.
+    Data files are identified by their resolved path (see file_key()), so files with the same name in different
+    directories get their own shard and rows.
+    A shard is only written by the process running its data file, so files can run on a process pool without
+    locking. Rows are appended and synced to disk as soon as a cell is complete, so a crash loses at most the cell
+    being computed; a line cut short by the crash is ignored when the shard is read back.
+
+    Attributes:
+    - path (str): The checkpoint directory, created if needed.
+
+    Methods:
+    - load_entropy(): Returns the root seed entropy the checkpoint was started with.
+    - save_entropy(entropy): Records the root seed entropy of the run.
+    - get_shard_path(filename): Returns the path of the shard of a data file.
+    - completed(filename): Returns the rows already done for a data file, by key.
+    - append(filename, rows): Appends result rows to the shard of a data file and syncs them to disk.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    """
+    Returns the root seed entropy the checkpoint was started with, so a resumed run derives the same seeds.
+
+    Returns:
+    int: The entropy, None if the checkpoint is new.
+    """
+
+    def load_entropy(self):
+        try:
+            with open(os.path.join(self.path, RUN_FILE)) as file:
+                return json.load(file)['entropy']
+        except (OSError, KeyError, ValueError):
+            return None
+
+    """
+    Records the root seed entropy of the run.
+
+    Parameters:
+    - entropy (int): The root seed entropy.
+    """
+
+    def save_entropy(self, entropy):
+        with open(os.path.join(self.path, RUN_FILE), 'w') as file:
+            json.dump({'entropy': entropy}, file)
+
+    """
+    Returns the path of the shard of a data file, named after the file and a digest of its resolved path.
+
+    Parameters:
+    - filename (str): The data file.
+
+    Returns:
+    str: The shard path.
+    """
+
+    def get_shard_path(self, filename):
+        digest = hashlib.sha256(file_key(filename).encode()).hexdigest()[:16]
+
+        return os.path.join(self.path, f'{os.path.basename(filename)}-{digest}.jsonl')
+
+    """
+    Returns the rows already done for a data file. A key written more than once keeps its last row.
+
+    Parameters:
+    - filename (str): The data file.
+
+    Returns:
+    dict: A dictionary mapping the key (values of KEY_COLUMNS) of each done row to the row.
+    """
+
+    def completed(self, filename):
+        rows = {}
+
+        try:
+            with open(self.get_shard_path(filename)) as file:
+                for line in file:
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        # The last line of a run that was killed while writing
+                        continue
+                    rows[row_key(row)] = row
+        except FileNotFoundError:
+            pass
+
+        return rows
+
+    """
+    Appends result rows to the shard of a data file, then flushes and syncs the shard so the rows survive a crash.
+
+    Parameters:
+    - filename (str): The data file.
+    - rows (list): The result rows, as dictionaries.
+    """
+
+    def append(self, filename, rows):
+        shard_path = self.get_shard_path(filename)
+        # Start on a new line if the previous run was killed in the middle of a line
+        truncated = False
+        if os.path.exists(shard_path) and os.path.getsize(shard_path) > 0:
+            with open(shard_path, 'rb') as file:
+                file.seek(-1, os.SEEK_END)
+                truncated = file.read(1) != b'\n'
+
+        with open(shard_path, 'a') as file:
+            file.write(('\n' if truncated else '') + ''.join(json.dumps(row) + '\n' for row in rows))
+            file.flush()
+            os.fsync(file.fileno())
+
+
+"""
+Returns the key identifying a data file in result rows, checkpoint shards and seeds: its resolved absolute path, so
+files with the same name in different directories are told apart.
+
+Parameters:
+- filename (str): The data file.
+
+Returns:
+str: The resolved path of the file.
+"""
+
+
+def file_key(filename):
+    return os.path.realpath(filename)
+
+
+"""
+Returns the key of a result row.
+
+Parameters:
+- row (dict): The result row.
+
+Returns:
+tuple: The values of KEY_COLUMNS.
+"""
+
+
+def row_key(row):
+    return tuple(row[column] for column in KEY_COLUMNS)
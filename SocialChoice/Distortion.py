@@ -1,5 +1,8 @@
 from collections import defaultdict
-import random
+
+import numpy as np
+
+from SocialChoice.ValueTensor import ValueTensor
 
 
 class Distortion:
@@ -10,29 +13,46 @@ class Distortion:
 
     Attributes:
     - winner (str): The chosen winner alternative produced from VotingRules.
-    - value_list (dict): A dictionary containing values generated for each alternative from ValueGeneration.
+    - value_list (ValueTensor/dict): The values generated for each alternative from ValueGeneration.
     - total_values (dict): A dictionary containing the total values for each alternative (calculated from value_list).
+    - welfare (numpy.ndarray): The social welfare vector, welfare[a] is the total value of alternative a (0 if unknown).
+    - optimal_alternative (int): The alternative with the highest total value, computed once.
+    - optimal_value (float): The total value of optimal_alternative.
+    - welfare_order (numpy.ndarray): The alternatives sorted from the highest to the lowest total value.
 
     Methods:
     - value_calculator(): Calculates the total values for each alternative based on the provided values.
+    - build_welfare_index(): Builds the welfare vector, its argmax and sorted order from total_values.
+    - winner_values(winners): Looks up the total value of many winner alternatives at once.
+    - winner_value(winner): Returns the (expected) total value of a winner.
     - distortion(): Calculates the distortion measure comparing the winner's value with the optimal alternative's value.
+    - distortion_many(winners): Calculates the distortion of many winners (e.g. one per voting rule) in one batch.
+    - winner_distortions(probability_list): Returns the candidates, their probabilities and the distortion of each as winner.
+    - expected_distortion(probability_list): Calculates the exact expected distortion of a randomized winner.
+    - sample_distortion(k, probability_list, seed): Draws k winners at once and returns the distortion of each.
+    - average_distortion(k, probability_list, seed): Estimates the expected distortion by Monte Carlo sampling.
     """
 
     def __init__(self, value_list):
         self.value_list = value_list
         self.total_values = self.value_calculator(self.value_list)
+        self.build_welfare_index()
 
     """
     Calculates the total values for each alternative based on the provided values from value_list.
+    A ValueTensor is reduced with one column sum, a ranking -> list of values dictionary is walked.
     
     Parameters:
-    
+    - value_list (ValueTensor/dict): The values generated for each alternative.
     
     Returns:
     dict: A dictionary containing the total values for each alternative.
     """
 
     def value_calculator(self, value_list):
+        if isinstance(value_list, ValueTensor):
+            return {alternative + 1: value for alternative, value in enumerate(value_list.total_values().tolist())}
+
         total_values = defaultdict(int)
 
         for ranking_values in value_list.values():
@@ -43,55 +63,157 @@ class Distortion:
         return dict(total_values)
 
     """
-    Calculates the distortion measure by comparing the winner's total value with the optimal alternative's total value.
+    Builds the welfare vector indexed by alternative from total_values, and caches its argmax and sorted order,
+    so every distortion query afterwards is a lookup.
+    """
+
+    def build_welfare_index(self):
+        alternatives = np.array(list(self.total_values.keys()), dtype=np.int64)
+        self.welfare = np.zeros(alternatives.max(initial=0) + 1)
+        self.welfare[alternatives] = list(self.total_values.values())
+
+        self.optimal_alternative = max(self.total_values, key=self.total_values.get)
+        self.optimal_value = self.total_values[self.optimal_alternative]
+        self.welfare_order = alternatives[np.argsort(-self.welfare[alternatives], kind='stable')]
+
+    """
+    Looks up the total value of many winner alternatives at once. Unknown alternatives have a value of 0.
+    
+    Parameters:
+    - winners (list): The winner alternatives.
+    
+    Returns:
+    numpy.ndarray: The total value of each winner.
+    """
+
+    def winner_values(self, winners):
+        winners = np.asarray(winners, dtype=np.int64)
+        known = (winners >= 0) & (winners < len(self.welfare))
+
+        return np.where(known, self.welfare[np.where(known, winners, 0)], 0.0)
+
+    """
+    Returns the total value of a winner alternative, or the expected total value of a winner alternative probability list.
     
     Parameters:
     - winner(int/dict): The winner alternative / the winner alternative probability list
     
     Returns:
-    float: The distortion value.
+    float: The (expected) total value of the winner.
     """
 
-    def distortion(self, winner):
-        optimal_alternative = max(self.total_values, key=self.total_values.get)
-        optimal_value = self.total_values[optimal_alternative]
+    def winner_value(self, winner):
         winner_value = 0
 
         # For deterministic, it will output a single winner
-        if isinstance(winner, int):
-            winner_value = self.total_values.get(winner, 0)
+        if isinstance(winner, (int, np.integer)):
+            winner_value = self.total_values.get(int(winner), 0)
 
         # For Randomized voting rules, it will output a list of probability
         elif isinstance(winner, dict):
-            for alternative, probability in winner.items():
-                alternative_value = self.total_values.get(alternative, 0)
-                winner_value += probability * alternative_value
+            winner_value = float(self.winner_values(list(winner.keys())) @ np.array(list(winner.values()), dtype=float))
 
-        print('-winner-', winner, winner_value, '-optimal-', optimal_alternative, optimal_value)
-        return optimal_value / winner_value
+        return winner_value
+
+    """
+    Calculates the distortion measure by comparing the winner's total value with the optimal alternative's total value.
+    
+    Parameters:
+    - winner(int/dict): The winner alternative / the winner alternative probability list
+    
+    Returns:
+    float: The distortion value.
+    """
 
+    def distortion(self, winner):
+        return self.optimal_value / self.winner_value(winner)
 
     """
-    For given probability list, generate winner for multiple trials and for each winner, run the distortion and get average distortion across them.
+    Calculates the distortion of many winners in one batch, e.g. the winners of dozens of voting rules on the same instance.
+    A winner with no total value has infinite distortion.
+    
+    Parameters:
+    - winners (list): The winner alternatives (int), or winner alternative probability lists (dict).
+    
+    Returns:
+    numpy.ndarray: The distortion value of each winner.
+    """
+
+    def distortion_many(self, winners):
+        if any(isinstance(winner, dict) for winner in winners):
+            winner_values = np.array([self.winner_value(winner) for winner in winners], dtype=float)
+        else:
+            winner_values = self.winner_values(winners)
+
+        with np.errstate(divide='ignore'):
+            return self.optimal_value / winner_values
+
+    """
+    Returns the candidates of a probability list, their probabilities and the distortion of each candidate as winner.
+    A candidate with no total value has infinite distortion.
     
     Parameters:
-    - k(int): User input, indicating number of trails 
     - probability_list(dict): a dictionary containing alternative as key and their probability of getting selected as values.
     
     Returns:
-    float: The average distortion across trials.  
+    tuple: The list of candidates, the array of probabilities and the array of distortions.
+    """
+    def winner_distortions(self, probability_list):
+        candidates = list(probability_list.keys())
+        probabilities = np.array(list(probability_list.values()), dtype=float)
+        winner_values = self.winner_values(candidates)
+
+        with np.errstate(divide='ignore'):
+            distortions = self.optimal_value / winner_values
+
+        return candidates, probabilities, distortions
+
+    """
+    Calculates the exact expected distortion of a randomized winner in closed form:
+    the sum over candidates of probability x (optimal value / candidate value), which is the value
+    average_distortion() estimates by sampling.
     
+    Parameters:
+    - probability_list(dict): a dictionary containing alternative as key and their probability of getting selected as values.
+    
+    Returns:
+    float: The expected distortion.
     """
-    def average_distortion(self, k, probability_list):
-        distortion_results = defaultdict(list)
+    def expected_distortion(self, probability_list):
+        _, probabilities, distortions = self.winner_distortions(probability_list)
+        selected = probabilities > 0
+
+        return float(probabilities[selected] @ distortions[selected] / probabilities.sum())
 
-        for _ in range(k):
-            winner = random.choices(list(probability_list.keys()), weights=list(probability_list.values()))[0]
-            distortion_value = self.distortion(winner)
-            distortion_results[winner].append(distortion_value)
+    """
+    Draws k winners from the probability list in one call and returns the distortion of each trial,
+    e.g. to estimate the variance of the distortion.
+    
+    Parameters:
+    - k(int): Number of trials.
+    - probability_list(dict): a dictionary containing alternative as key and their probability of getting selected as values.
+    - seed: Seed of the numpy.random.Generator drawing the winners.
+    
+    Returns:
+    numpy.ndarray: The distortion of each trial.
+    """
+    def sample_distortion(self, k, probability_list, seed=None):
+        _, probabilities, distortions = self.winner_distortions(probability_list)
+        winners = np.random.default_rng(seed).choice(len(probabilities), size=k, p=probabilities / probabilities.sum())
 
-        all_distortions = [distortion for distortions in distortion_results.values() for distortion in distortions]
-        overall_average_distortion = sum(all_distortions) / len(all_distortions)
-        print(all_distortions)
+        return distortions[winners]
 
-        return overall_average_distortion
+    """
+    For given probability list, generate winner for multiple trials and for each winner, run the distortion and get average distortion across them.
+    
+    Parameters:
+    - k(int): User input, indicating number of trails 
+    - probability_list(dict): a dictionary containing alternative as key and their probability of getting selected as values.
+    - seed: Seed of the numpy.random.Generator drawing the winners.
+    
+    Returns:
+    float: The average distortion across trials.  
+    
+    """
+    def average_distortion(self, k, probability_list, seed=None):
+        return float(self.sample_distortion(k, probability_list, seed).mean())
@@ -0,0 +1,128 @@
+import numpy as np
+
+try:
+    from scipy import special
+except ImportError:
+    special = None
+
+# Maximum number of vectorized resampling passes for distributions without a closed-form inverse CDF.
+MAX_RESAMPLING_PASSES = 64
+
+# Registry of distribution samplers, mapping a distribution name to sampler(rng, shape, power_param).
+DISTRIBUTIONS = {}
+
+
+"""
+Registers a distribution sampler, so it can be used by name in ValueGeneration without editing it.
+
+Parameters:
+- name (str): The distribution name used in distribution lists.
+- sampler (callable): sampler(rng, shape, power_param) drawing values from a numpy.random.Generator.
+- cdf (callable): Optional cdf(x, power_param), used together with inverse_cdf for truncated sampling.
+- inverse_cdf (callable): Optional inverse_cdf(u, power_param).
+"""
+
+
+def register_distribution(name, sampler, cdf=None, inverse_cdf=None):
+    DISTRIBUTIONS[name] = sampler
+
+    if cdf is not None and inverse_cdf is not None:
+        INVERSE_CDF[name] = (cdf, inverse_cdf)
+
+
+"""
+Draws random values from a registered distribution.
+
+Parameters:
+- distribution (str): The distribution used to generate values, a key of DISTRIBUTIONS.
+- shape (tuple): The shape of the output.
+- power_param (float): Power parameter used in some distributions. Power: exponent + 1, Gamma: shape,
+  Geometric: 10 x probability of success of an individual trial.
+- rng (numpy.random.Generator): The source of randomness, a fresh unseeded Generator if not given.
+
+Returns:
+numpy.ndarray: The random values.
+"""
+
+
+def sample(distribution, shape, power_param, rng=None):
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Invalid distribution choice: {distribution}")
+
+    return DISTRIBUTIONS[distribution](np.random.default_rng(rng), shape, power_param)
+
+
+# Cumulative distribution functions and their inverses, for the distributions where both have a closed form.
+# Each entry of INVERSE_CDF maps a distribution to (cdf(x, power_param), inverse_cdf(u, power_param)).
+def _geometric_cdf(x, power_param):
+    # Values strictly below x are at most ceil(x) - 1 successes
+    k = np.maximum(np.ceil(x) - 1, 0)
+    with np.errstate(invalid='ignore'):
+        return np.where(k > 0, -np.expm1(k * np.log1p(-power_param / 10)), 0.0)
+
+
+def _geometric_inverse_cdf(u, power_param):
+    return np.maximum(np.ceil(np.log1p(-u) / np.log1p(-power_param / 10)), 1)
+
+
+INVERSE_CDF = {}
+
+register_distribution('Uniform', lambda rng, shape, _: rng.uniform(0, 1, size=shape),
+                      lambda x, _: np.clip(x, 0, 1), lambda u, _: u)
+register_distribution('Exponential', lambda rng, shape, _: rng.exponential(size=shape),
+                      lambda x, _: -np.expm1(-np.maximum(x, 0)), lambda u, _: -np.log1p(-u))
+register_distribution('Power', lambda rng, shape, a: rng.power(a, size=shape),
+                      lambda x, a: np.clip(x, 0, 1) ** a, lambda u, a: u ** (1 / a))
+register_distribution('Geometric', lambda rng, shape, p: rng.geometric(p=p / 10, size=shape).astype(float),
+                      _geometric_cdf, _geometric_inverse_cdf)
+
+# Normal and Gamma quantile functions need SciPy, without it they fall back to vectorized resampling
+if special is not None:
+    register_distribution('Normal', lambda rng, shape, _: rng.normal(size=shape),
+                          lambda x, _: special.ndtr(x), lambda u, _: special.ndtri(u))
+    register_distribution('Gamma', lambda rng, shape, a: rng.gamma(a, size=shape),
+                          lambda x, a: special.gammainc(a, np.maximum(x, 0)), lambda u, a: special.gammaincinv(a, u))
+else:
+    register_distribution('Normal', lambda rng, shape, _: rng.normal(size=shape))
+    register_distribution('Gamma', lambda rng, shape, a: rng.gamma(a, size=shape))
+
+
+"""
+Draws random values from a specified distribution, truncated to be strictly smaller than upper_limit.
+Distributions in INVERSE_CDF are sampled without rejection by drawing u uniformly below cdf(upper_limit) and
+mapping it through the inverse CDF. The others are resampled in vectorized passes, redrawing only the rejected
+values, for at most max_passes passes.
+Values for which no valid draw was found (e.g. an upper limit below the support) are set just below upper_limit.
+
+Parameters:
+- distribution (str): The distribution used to generate values, as in sample().
+- shape (tuple): The shape of the output.
+- power_param (float): Power parameter used in some distributions, as in sample().
+- upper_limit (float/numpy.ndarray): The exclusive upper limit, broadcastable to shape.
+- rng (numpy.random.Generator): The source of randomness, a fresh unseeded Generator if not given.
+- max_passes (int): The maximum number of resampling passes.
+
+Returns:
+numpy.ndarray: The random values, all smaller than upper_limit.
+"""
+
+
+def truncated_sample(distribution, shape, power_param, upper_limit, rng=None, max_passes=MAX_RESAMPLING_PASSES):
+    rng = np.random.default_rng(rng)
+    upper_limit = np.broadcast_to(np.asarray(upper_limit, dtype=float), shape)
+
+    if distribution in INVERSE_CDF:
+        cdf, inverse_cdf = INVERSE_CDF[distribution]
+        values = inverse_cdf(rng.uniform(0, 1, size=shape) * cdf(upper_limit, power_param), power_param)
+    else:
+        values = sample(distribution, shape, power_param, rng)
+        for _ in range(max_passes):
+            rejected = values >= upper_limit
+            if not rejected.any():
+                break
+            values[rejected] = sample(distribution, (int(rejected.sum()),), power_param, rng)
+
+    rejected = values >= upper_limit
+    values[rejected] = np.nextafter(upper_limit[rejected], -np.inf)
+
+    return values
@@ -0,0 +1,193 @@
+import numpy as np
+
+from SocialChoice.Profile import rank_dtype
+
+# Tallies within this fraction of the number of voters are equal, so float rounding of the shares of tied groups
+# does not decide which candidate is eliminated.
+TALLY_TOLERANCE = 1e-9
+
+
+class EliminationTally:
+    """
+    Incremental plurality (or anti-plurality) tally for sequential elimination rules such as IRV and Coombs.
+
+    Every ballot is a row of a level matrix giving the counting order of each candidate (equal levels form a tie
+    group), and keeps a pointer to its current group: the lowest level among its remaining candidates. The count of a
+    ballot is split equally among the members of its current group. An index from each candidate to the ballots whose
+    current group contains it (its supporters) is kept as ballots advance, so eliminating a candidate only reads and
+    advances the rows of its supporters, all at once, and moves their old and new shares in the tally with one
+    product with their member mask. A round costs time proportional to the support of the eliminated candidate
+    (times m), not to the number of ballots.
+
+    Ballots are counted from their top group, or from their bottom group when from_bottom is set. Alternatives missing
+    from a ballot are ignored (the ballot is exhausted once its ranked groups are), unless include_unranked is set,
+    in which case they form one last tie group of the ballot.
+
+    Attributes:
+    - num_candidates (int): The total number of candidates.
+    - counts (numpy.ndarray): The number of voters of each ballot.
+    - levels (numpy.ndarray): A (ballots x m) matrix, the counting level of each candidate on each ballot; ignored
+      candidates are set to exhausted_level. The matrix is not modified, eliminated candidates are masked instead.
+    - exhausted_level (int): The level of a candidate no longer counted, and the pointer of an exhausted ballot.
+    - pointers (numpy.ndarray): The level of the current group of each ballot.
+    - group_sizes (numpy.ndarray): The number of remaining candidates in the current group of each ballot.
+    - supporters (list): supporters[c] is a list of arrays of the ballots whose current group contains candidate c.
+    - tally (numpy.ndarray): The current (fractional) number of voters counting each candidate.
+    - eliminated (numpy.ndarray): Whether each candidate has been eliminated.
+    - tolerance (float): The largest tally difference still counted as a tie.
+
+    Methods:
+    - eliminate(candidate): Removes a candidate and moves its ballots to their next group.
+    - lowest(): Returns the remaining candidate with the lowest tally.
+    - highest(): Returns the remaining candidate with the highest tally.
+    - active_voters(): Returns the number of voters whose ballot is not exhausted.
+    """
+
+    def __init__(self, profile, from_bottom=False, include_unranked=False):
+        m = profile.num_alternatives
+        self.num_candidates = m
+        self.exhausted_level = m + 1
+        self.eliminated = np.zeros(m, dtype=bool)
+        level_blocks = []
+
+        for ranks, _ in profile.iter_chunks():
+            ranks = ranks.astype(np.int32)
+            ranked = ranks >= 0
+            if from_bottom:
+                # The lowest ranked group comes first, below it the missing alternatives when they are counted
+                levels = ranks.max(axis=1, keepdims=True, initial=-1) - ranks + (1 if include_unranked else 0)
+                levels = np.where(ranked, levels, 0 if include_unranked else self.exhausted_level)
+            else:
+                levels = np.where(ranked, ranks, m if include_unranked else self.exhausted_level)
+            level_blocks.append(levels.astype(rank_dtype(self.exhausted_level)))
+
+        self.levels = np.concatenate(level_blocks) if level_blocks else \
+            np.empty((0, m), dtype=rank_dtype(self.exhausted_level))
+        self.counts = np.asarray(profile.counts, dtype=float)
+        self.pointers = self.levels.min(axis=1, initial=self.exhausted_level)
+        self.group_sizes = np.zeros(len(self.counts), dtype=np.int64)
+        self.supporters = [[] for _ in range(m)]
+        self.tally = np.zeros(m)
+        self.tolerance = TALLY_TOLERANCE * max(self.counts.sum(), 1)
+
+        ballots = np.arange(len(self.counts))
+        members = self._members(ballots)
+        self._index_supporters(ballots, members)
+        self._add_shares(ballots, 1, members)
+
+    """
+    Returns the member mask of the current group of some ballots: the remaining candidates at their pointer level.
+
+    Parameters:
+    - ballots (numpy.ndarray): The indices of the ballots.
+
+    Returns:
+    numpy.ndarray: A (ballots x m) boolean matrix.
+    """
+
+    def _members(self, ballots):
+        pointers = self.pointers[ballots]
+
+        return (self.levels[ballots] == pointers[:, None]) & ~self.eliminated & \
+            (pointers < self.exhausted_level)[:, None]
+
+    """
+    Adds some ballots to the supporters of the candidates of their (new) current group.
+
+    Parameters:
+    - ballots (numpy.ndarray): The indices of the ballots.
+    - members (numpy.ndarray): The member mask of their current group, as returned by _members().
+    """
+
+    def _index_supporters(self, ballots, members):
+        for candidate in np.flatnonzero(members.any(axis=0)).tolist():
+            self.supporters[candidate].append(ballots[members[:, candidate]])
+
+    """
+    Adds (or with sign -1, removes) the shares of some ballots to the candidates of their current group, and records
+    the sizes of those groups.
+
+    Parameters:
+    - ballots (numpy.ndarray): The indices of the ballots.
+    - sign (int): 1 to add the shares, -1 to remove them.
+    - members (numpy.ndarray, optional): The member mask of their current group, computed by _members() if omitted.
+    """
+
+    def _add_shares(self, ballots, sign, members=None):
+        if members is None:
+            members = self._members(ballots)
+        sizes = members.sum(axis=1)
+        self.group_sizes[ballots] = sizes
+
+        # Per-candidate sum of the shares, one product with the member mask of the ballots
+        shares = self.counts[ballots] / np.maximum(sizes, 1)
+        self.tally += sign * (shares @ members)
+
+    """
+    Removes a candidate: each ballot counting it shares its count among the rest of its group, or moves on to its
+    next group when the candidate was the last remaining member. Only the supporters of the candidate are read.
+
+    Parameters:
+    - candidate (int): The index of the eliminated candidate.
+    """
+
+    def eliminate(self, candidate):
+        affected = np.concatenate(self.supporters[candidate]) if self.supporters[candidate] else \
+            np.empty(0, dtype=np.int64)
+        self.supporters[candidate] = []
+        old_pointers = self.pointers[affected]
+
+        # One pass over the rows of the supporters gives both their old and their new current groups
+        self.eliminated[candidate] = True
+        levels = np.where(self.eliminated, self.exhausted_level, self.levels[affected])
+        members = levels == old_pointers[:, None]
+        members[:, candidate] = True
+        self._add_shares(affected, -1, members)
+
+        pointers = levels.min(axis=1, initial=self.exhausted_level)
+        self.pointers[affected] = pointers
+        members = (levels == pointers[:, None]) & (pointers < self.exhausted_level)[:, None]
+        # Ballots still counting the rest of their group stay in the supporters of those candidates
+        advanced = pointers != old_pointers
+        self._index_supporters(affected[advanced], members[advanced])
+
+        self._add_shares(affected, 1, members)
+        self.tally[candidate] = 0
+
+    """
+    Returns the remaining candidate with the lowest tally; tallies within tolerance are equal and the lowest candidate
+    is returned among them.
+
+    Returns:
+    int: The index of the candidate.
+    """
+
+    def lowest(self):
+        remaining = np.flatnonzero(~self.eliminated)
+        tally = self.tally[remaining]
+
+        return int(remaining[np.argmax(tally <= tally.min() + self.tolerance)])
+
+    """
+    Returns the remaining candidate with the highest tally; tallies within tolerance are equal and the lowest
+    candidate is returned among them.
+
+    Returns:
+    int: The index of the candidate.
+    """
+
+    def highest(self):
+        remaining = np.flatnonzero(~self.eliminated)
+        tally = self.tally[remaining]
+
+        return int(remaining[np.argmax(tally >= tally.max() - self.tolerance)])
+
+    """
+    Returns the number of voters whose ballot still counts a remaining candidate.
+
+    Returns:
+    float: The number of active voters.
+    """
+
+    def active_voters(self):
+        return float(self.counts[self.pointers < self.exhausted_level].sum())
@@ -0,0 +1,335 @@
+import argparse
+import ast
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from SocialChoice.Checkpoint import Checkpoint, file_key, row_key
+from SocialChoice.Distortion import Distortion
+from SocialChoice.FileHandler import FileHandler
+from SocialChoice.Normalization import NORMALIZATIONS, normalize
+from SocialChoice.ResultWriter import RESULT_COLUMNS, ResultWriter
+from SocialChoice.ValueGeneration import ValueGeneration
+from SocialChoice.VotingRules import RULES, VotingRules
+from SocialChoice.WinnerSelection import TIE_BREAKERS
+
+# Distortion modes: the winner of each rule by highest score, or the proportional lottery over the scores.
+MODES = ('deterministic', 'randomize')
+
+# Arguments of the registered rules that need one, used when the rule spec 'all' selects every rule of RULES.
+DEFAULT_RULE_ARGUMENTS = {'k_approval_rule': 2, 'scoring_rule': [2, 1]}
+
+
+class ExperimentRunner:
+    """
+    Runs the full FileHandler -> ValueGeneration -> VotingRules -> Distortion pipeline over a grid of
+    files x distributions x instances x normalizations x rules x modes.
+
+    Work is shared along the grid so nothing is computed twice:
+    - each file is parsed once (and with cache_dir, loaded from the FileHandler binary cache on later runs) and its
+      rule scores and winners are computed once, as they do not depend on the generated values.
+    - each instance of values is generated once per (file, distribution, param) and reused by every normalization.
+    - each normalized instance builds one welfare index, against which all rules are evaluated in one batch.
+    Files are independent and are spread across a process pool; results come back as one columnar batch per file,
+    ready for ResultWriter.
+
+    Attributes:
+    - filenames (list): The PrefLib data files.
+    - rules (list): Rule specs, a name of VotingRules.RULES optionally followed by ':' and its argument
+      (e.g. 'k_approval_rule:2', 'scoring_rule:[3,2,1]'), or 'all' for every rule of RULES (see expand_rules()).
+    - distributions (list): (distribution, power_param) pairs, see Distributions.DISTRIBUTIONS.
+    - normalizations (list): Normalization methods, see Normalization.NORMALIZATIONS.
+    - k (int): The number of instances generated for each distribution.
+    - modes (list): The distortion modes, see MODES.
+    - is_missing_zero (str): Whether missing alternatives are assigned a value of zero, as in ValueGeneration.
+    - entropy (int): The root entropy of the run. Every instance seed is derived from it, the file (by its resolved
+      path, see Checkpoint.file_key()), the distribution and the instance index, so a cell gets the same values
+      whatever the rest of the grid is.
+    - max_workers (int): The number of worker processes, all cores if None, no pool if 1.
+    - checkpoint (Checkpoint): Optional store of completed rows. Rows are appended to it as each instance completes
+      and instances already in it are skipped, so an interrupted run resumes where it stopped.
+    - tie_breaking (str): How tied deterministic winners are broken, a key of WinnerSelection.TIE_BREAKERS, or
+      'lottery' to score the uniform lottery over the tied winners.
+    - cache_dir (str): Optional directory of the FileHandler binary caches of the parsed files.
+
+    Methods:
+    - instance_seed(filename, distribution, power_param, instance): Returns the seed of one generated instance.
+    - rule_winners(file_handler): Computes the deterministic winner and winner lottery of every rule for a file.
+    - run_file(filename): Runs the grid of one file and returns its result batch.
+    - run_instance(value_generation, winners, cell): Computes the result rows of one generated instance.
+    - run(): Yields the result batch of every file.
+    """
+
+    def __init__(self, filenames, rules, distributions, normalizations=('unit_sum',), k=1, modes=('deterministic',),
+                 is_missing_zero='True', seed=None, max_workers=None, checkpoint=None, tie_breaking='lexicographic',
+                 cache_dir=None):
+        self.filenames = list(filenames)
+        self.rules = expand_rules(rules)
+        self.distributions = [(distribution, power_param) for distribution, power_param in distributions]
+        self.normalizations = list(normalizations)
+        self.k = k
+        self.modes = list(modes)
+        self.is_missing_zero = is_missing_zero
+        self.max_workers = max_workers
+        self.checkpoint = checkpoint
+        self.tie_breaking = tie_breaking
+        self.cache_dir = cache_dir
+
+        # A resumed run keeps the seeds of the checkpoint unless another seed is given
+        if seed is None and checkpoint is not None:
+            seed = checkpoint.load_entropy()
+        self.entropy = np.random.SeedSequence(seed).entropy
+        if checkpoint is not None:
+            checkpoint.save_entropy(self.entropy)
+
+        for rule in self.rules:
+            if parse_rule(rule)[0] not in RULES:
+                raise ValueError(f"Invalid voting rule choice: {rule}")
+        for method in self.normalizations:
+            if method not in NORMALIZATIONS:
+                raise ValueError(f"Invalid normalization method: {method}")
+        if tie_breaking not in TIE_BREAKERS and tie_breaking != 'lottery':
+            raise ValueError(f"Invalid tie-breaking rule: {tie_breaking}")
+        for mode in self.modes:
+            if mode not in MODES:
+                raise ValueError(f"Invalid distortion type: {mode}")
+
+    """
+    Returns the seed of one generated instance, derived from the root entropy and the cell it belongs to.
+
+    Parameters:
+    - filename (str): The data file.
+    - distribution (str): The distribution of the instance.
+    - power_param (float): The power parameter of the distribution.
+    - instance (int): The index of the instance.
+
+    Returns:
+    int: The seed of the instance values.
+    """
+
+    def instance_seed(self, filename, distribution, power_param, instance):
+        cell = zlib.crc32(f'{file_key(filename)}|{distribution}|{power_param}'.encode())
+        sequence = np.random.SeedSequence(self.entropy, spawn_key=(cell, instance))
+
+        return int(sequence.generate_state(1)[0])
+
+    """
+    Completes the ballots of a file (strict and complete orders, seeded per file from the run entropy) and computes,
+    for every rule, its deterministic winner and its winner lottery.
+
+    Parameters:
+    - file_handler (FileHandler): The parsed data file, which is not modified.
+
+    Returns:
+    dict: A dictionary mapping each mode to the list of winners of the rules.
+    """
+
+    def rule_winners(self, file_handler):
+        num_alternatives = file_handler.get_num_alternatives()
+        file_seed_key = zlib.crc32(file_key(file_handler.filename).encode())
+        completion_seed, tie_seed = np.random.SeedSequence(self.entropy, spawn_key=(file_seed_key,)).spawn(2)
+        voting_rules = VotingRules(file_handler.get_complete_profile(completion_seed), num_alternatives)
+        scores = []
+
+        for rule in self.rules:
+            name, args = parse_rule(rule)
+            scores.append(RULES[name](voting_rules, *args))
+
+        # The winners of all rules are selected at once from the (rules x m) score matrix
+        score_matrix = np.array([[rule_scores.get(candidate, 0) for candidate in range(1, num_alternatives + 1)]
+                                 for rule_scores in scores], dtype=float).reshape(len(scores), num_alternatives)
+        deterministic = voting_rules.winner_many(score_matrix, self.tie_breaking, tie_seed)
+        if self.tie_breaking == 'lottery':
+            deterministic = [voting_rules.scores_dict(lottery) for lottery in deterministic]
+        else:
+            deterministic = deterministic.tolist()
+
+        return {'deterministic': deterministic,
+                'randomize': [voting_rules.winner_probability(rule_scores) for rule_scores in scores]}
+
+    """
+    Runs the grid of one file. With a checkpoint, instances whose rows are all done are restored instead of being
+    computed, and the rows of every computed instance are appended to the checkpoint as soon as it is complete.
+    The file is only parsed when at least one instance is left to compute.
+
+    Parameters:
+    - filename (str): The data file.
+
+    Returns:
+    dict: The result batch of the file, mapping each of RESULT_COLUMNS to a numpy array.
+    """
+
+    def run_file(self, filename):
+        done = self.checkpoint.completed(filename) if self.checkpoint is not None else {}
+        value_generation, winners = None, None
+        rows = []
+
+        for distribution, power_param in self.distributions:
+            for instance in range(self.k):
+                seed = self.instance_seed(filename, distribution, power_param, instance)
+                cell = {'file': file_key(filename), 'distribution': distribution, 'param': power_param,
+                        'instance': instance, 'seed': seed}
+                keys = [row_key({**cell, 'normalization': method, 'rule': rule, 'mode': mode})
+                        for method in self.normalizations for mode in self.modes for rule in self.rules]
+                if all(key in done for key in keys):
+                    rows.extend(done[key] for key in keys)
+                    continue
+
+                if value_generation is None:
+                    file_handler = FileHandler(filename, use_cache=self.cache_dir is not None,
+                                               cache_dir=self.cache_dir)
+                    # Values are generated from the original ballots, the rules are applied to the completed ones
+                    value_generation = ValueGeneration(file_handler.votes_dict, file_handler.get_num_alternatives())
+                    winners = self.rule_winners(file_handler)
+
+                instance_rows = self.run_instance(value_generation, winners, cell)
+                if self.checkpoint is not None:
+                    self.checkpoint.append(filename, instance_rows)
+                rows.extend(instance_rows)
+
+        return {column: np.array([row[column] for row in rows]) for column in RESULT_COLUMNS}
+
+    """
+    Generates one instance of values and computes the distortion of every rule under every normalization and mode.
+
+    Parameters:
+    - value_generation (ValueGeneration): The value generator of the file.
+    - winners (dict): The winners of the rules for each mode, as returned by rule_winners().
+    - cell (dict): The file, distribution, param, instance and seed of the instance.
+
+    Returns:
+    list: The result rows of the instance, as dictionaries.
+    """
+
+    def run_instance(self, value_generation, winners, cell):
+        values = value_generation.generate_instance(cell['distribution'], self.is_missing_zero, cell['param'],
+                                                    cell['seed'])
+        rows = []
+
+        for method in self.normalizations:
+            distortion = Distortion(values.with_values(normalize(values.values, method)))
+
+            for mode in self.modes:
+                if mode == 'deterministic':
+                    distortions = distortion.distortion_many(winners[mode]).tolist()
+                else:
+                    distortions = [distortion.expected_distortion(lottery) for lottery in winners[mode]]
+
+                for rule, winner, value in zip(self.rules, winners[mode], distortions):
+                    rows.append({**cell, 'rule': rule, 'normalization': method, 'mode': mode,
+                                 'winner': winner if isinstance(winner, int) else -1, 'distortion': value})
+
+        return rows
+
+    """
+    Runs the grid of every file, files being spread across a process pool unless max_workers is 1.
+
+    Yields:
+    dict: The result batch of each file, in the order of filenames.
+    """
+
+    def run(self):
+        if self.max_workers == 1 or len(self.filenames) < 2:
+            for filename in self.filenames:
+                yield self.run_file(filename)
+        else:
+            with ProcessPoolExecutor(self.max_workers) as executor:
+                yield from executor.map(self.run_file, self.filenames)
+
+
+"""
+Expands the rule spec 'all' into a spec for every rule of RULES, the rules needing an argument taking it from
+DEFAULT_RULE_ARGUMENTS. Other specs are kept as they are.
+
+Parameters:
+- rules (list): The rule specs.
+
+Returns:
+list: The expanded rule specs, without duplicates.
+"""
+
+
+def expand_rules(rules):
+    expanded = []
+
+    for rule in rules:
+        if rule == 'all':
+            expanded += [f'{name}:{DEFAULT_RULE_ARGUMENTS[name]!r}' if name in DEFAULT_RULE_ARGUMENTS else name
+                         for name in RULES]
+        else:
+            expanded.append(rule)
+
+    return list(dict.fromkeys(expanded))
+
+
+"""
+Splits a rule spec into the rule name and its arguments, e.g. 'k_approval_rule:2' -> ('k_approval_rule', (2,)).
+
+Parameters:
+- rule (str): The rule spec.
+
+Returns:
+tuple: The rule name and the tuple of arguments.
+"""
+
+
+def parse_rule(rule):
+    name, _, argument = rule.partition(':')
+
+    return name, (ast.literal_eval(argument),) if argument else ()
+
+
+"""
+Parses a distribution spec, e.g. 'Gamma:2' -> ('Gamma', 2.0). The power parameter defaults to 2.
+"""
+
+
+def parse_distribution(spec):
+    distribution, _, power_param = spec.partition(':')
+
+    return distribution, float(power_param) if power_param else 2.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run a distortion experiment over a grid of files, voting rules, '
+                                                 'distributions and normalizations.')
+    parser.add_argument('files', nargs='+', help='PrefLib data files.')
+    parser.add_argument('--rules', nargs='+', default=['plurality_rule', 'borda_rule', 'harmonic_rule', 'veto_rule'],
+                        help="Voting rules, with an optional argument (e.g. 'k_approval_rule:2'), or 'all' for every "
+                             "registered rule.")
+    parser.add_argument('--distributions', nargs='+', default=['Uniform'],
+                        help="Distributions, with an optional power parameter (e.g. 'Gamma:2').")
+    parser.add_argument('--normalizations', nargs='+', default=['unit_sum'], help='Normalization methods.')
+    parser.add_argument('--k', type=int, default=1, help='Number of instances for each distribution.')
+    parser.add_argument('--modes', nargs='+', default=['deterministic'], choices=MODES, help='Distortion modes.')
+    parser.add_argument('--tie-breaking', default='lexicographic', choices=[*TIE_BREAKERS, 'lottery'],
+                        help='How tied deterministic winners are broken.')
+    parser.add_argument('--missing-random', action='store_true',
+                        help='Assign random values (instead of zero) to missing alternatives.')
+    parser.add_argument('--seed', type=int, default=None, help='Root seed of the run.')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (all cores by default).')
+    parser.add_argument('--output', default='distortion_results.parquet',
+                        help='Output file, Parquet (or a NumPy .npz archive for a .npz path or without pyarrow).')
+    parser.add_argument('--checkpoint', default=None,
+                        help='Checkpoint directory. Completed results are saved to it as they are computed, and a '
+                             'run restarted with the same directory skips them.')
+    parser.add_argument('--cache-dir', default=None,
+                        help='Directory where parsed data files are cached, so later runs skip parsing them.')
+    args = parser.parse_args(argv)
+
+    runner = ExperimentRunner(args.files, args.rules, [parse_distribution(spec) for spec in args.distributions],
+                              args.normalizations, args.k, args.modes, str(not args.missing_random), args.seed,
+                              args.workers, Checkpoint(args.checkpoint) if args.checkpoint else None,
+                              args.tie_breaking, args.cache_dir)
+
+    # Each file batch is written as soon as it is done
+    with ResultWriter(args.output, metadata={'entropy': runner.entropy}) as writer:
+        for batch in runner.run():
+            writer.write_batch(batch)
+    # The writer falls back to a .npz path without pyarrow
+    print(f"{writer.num_rows} results written to {writer.path} (seed entropy {runner.entropy})")
+
+
+if __name__ == '__main__':
+    main()
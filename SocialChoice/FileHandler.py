@@ -1,6 +1,29 @@
+import hashlib
+import itertools
+import json
+import math
+import os
 import random
+import re
 from collections import OrderedDict
 
+import numpy as np
+
+from SocialChoice.Profile import Profile, rank_dtype, write_ballot_store
+
+# Size of the read buffer used when streaming a data file, in bytes.
+READ_BUFFER_SIZE = 1 << 20
+
+# A ballot token is either a tie group '{a,b,...}' or a single (possibly multi-digit) alternative.
+BALLOT_TOKEN = re.compile(r'\{([^}]*)\}|(\d+)')
+
+# Suffix of the binary cache of a parsed data file, and its layout version.
+CACHE_SUFFIX = '.cache.npz'
+CACHE_VERSION = 1
+
+# Largest number of orders of a tie group for which per-voter completion splits the voters with one multinomial draw.
+MAX_TIE_PERMUTATIONS = 720
+
 
 class FileHandler:
     """
@@ -13,11 +36,29 @@ class FileHandler:
     - data (list): A list containing the same data as original_data, but used for later data manipulation.
     - num_alternatives (int): The total number of alternatives participated.
     - votes_dict (dict): A dictionary representation of the voting data.
+    - use_cache (bool): Whether the parsed profile is loaded from / saved to a binary cache. Off by default, so nothing
+      is written next to (possibly read-only or shared) data files unless asked for.
+    - cache_dir (str): Directory of the binary caches, each named after the content hash of its data file. When None,
+      the cache is a sidecar file next to the data file.
+    - profile (Profile): The array-backed form of votes_dict, built on demand by get_profile().
+    - ballot_store (str): Directory of an optional memory-mapped ballot store. When given, the file is streamed into
+      the store and profile is backed by it; votes_dict is left empty so out-of-core profiles never become Python objects.
+
+    The file is streamed line by line and every ballot is counted straight into votes_dict, so memory scales with
+    the number of unique ballots rather than the file size. original_data and data share the ballot keys of votes_dict.
 
     Methods:
-    - voting_rule_init(): Calling required methods to ensure the data is ready for VotingRules.
+    - voting_rule_init(seed, per_voter): Calling required methods to ensure the data is ready for VotingRules.
+    - get_complete_profile(seed, per_voter): Returns the strict and complete profile of the ballots, in one vectorized pass.
     - extract_information(): Extracts metadata and original data from the input file.
+    - iter_ballots(): Streams the input file and yields each ballot with its number of voters.
     - combine_adjacent_sets(votes): Combines adjacent sets in the votes string.
+    - get_content_hash(): Returns the content hash of the input file, computed once.
+    - get_cache_path(): Returns the path of the binary cache.
+    - load_cache(): Loads the parsed profile from the binary cache if it matches the file content.
+    - save_cache(): Writes the parsed profile to the binary cache.
+    - get_profile(): Returns the array-backed Profile of votes_dict.
+    - build_ballot_store(): Streams the input file into the memory-mapped ballot store.
     - get_metadata(): Returns the metadata extracted from the file.
     - get_data(): Returns the voter data after extraction and processing.
     - get_num_alternatives(): Returns the total number of alternatives.
@@ -28,34 +69,116 @@ class FileHandler:
     - generate_complete_file(): Converts the file to a complete order file.
     - randomize_missing(updated_votes, missing_alternatives): Randomly sample the missing alternative's position in the ballot
     """
-    def __init__(self, filename):
+    def __init__(self, filename, use_cache=False, ballot_store=None, cache_dir=None):
         self.filename = filename
         self.metadata = {}
         self.original_data = []
         self.data = []
         self.num_alternatives = 0
         self.votes_dict = {}
-
-        self.extract_information()
-        self.create_dict()
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.content_hash = None
+        self.profile = None
+        self.ballot_store = ballot_store
+
+        if ballot_store is not None:
+            self.build_ballot_store()
+        elif not (use_cache and self.load_cache()):
+            self.extract_information()
+            if use_cache:
+                self.save_cache()
 
     """
     Calling required methods to ensure the data is ready for VotingRules.
+    The strict and complete ballots come from get_complete_profile(), in one vectorized pass instead of rebuilding
+    every ballot in generate_strict_file() and generate_complete_file().
+
+    Parameters:
+    - seed: Seed of the numpy.random.Generator shuffling ties and missing alternatives.
+    - per_voter (bool): Whether every voter gets its own completion, see get_complete_profile().
     """
-    def voting_rule_init(self):
-        self.generate_strict_file()
-        self.generate_complete_file()
-        self.create_dict()
+    def voting_rule_init(self, seed=None, per_voter=False):
+        self.profile = self.get_complete_profile(seed, per_voter)
+        self.votes_dict = self.profile.to_votes_dict()
+        self.data = [(voter_num, votes) for votes, voter_num in self.votes_dict.items()]
 
     """
-    Extracts metadata and original data from the input file.    
+    Completes every ballot into a strict and complete order in one vectorized pass over the rank matrix, without
+    modifying this FileHandler: tied alternatives are shuffled within their tie group, missing alternatives are
+    shuffled and placed below the ranked ones. Each row is sorted by its rank plus a uniform random key, which does
+    both at once, and identical completed ballots are merged back with their counts added.
+
+    By default, as in voting_rule_init(), all the voters of a ballot share the same completion. With per_voter, each
+    voter gets an independent completion, and the counts of the resulting orders are sampled directly instead of
+    completing voter by voter: a ballot with no tie left keeps its count, the others split it with multinomial
+    draws over the orders of their tie groups (see sample_completions()).
+
+    Parameters:
+    - seed: Seed of the numpy.random.Generator shuffling ties and missing alternatives.
+    - per_voter (bool): Whether every voter gets its own completion instead of one per ballot.
+
+    Returns:
+    Profile: The profile of strict and complete ballots.
+    """
+    def get_complete_profile(self, seed=None, per_voter=False):
+        rng = np.random.default_rng(seed)
+        profile = self.get_profile()
+        m = self.get_num_alternatives()
+        rank_blocks, count_blocks = [], []
+
+        for ranks, counts in profile.iter_chunks():
+            if not per_voter:
+                rank_blocks.append(complete_ranks(ranks, rng))
+                count_blocks.append(counts)
+                continue
+
+            # A ballot with no tie left to break (one completion) keeps its count
+            positions = np.where(ranks >= 0, ranks, m)
+            sorted_positions = np.sort(positions, axis=1)
+            strict = (sorted_positions[:, 1:] != sorted_positions[:, :-1]).all(axis=1)
+            rank_blocks.append(complete_ranks(ranks[strict], rng))
+            count_blocks.append(counts[strict])
+
+            for row in np.flatnonzero(~strict):
+                completion_ranks, completion_counts = sample_completions(positions[row], int(counts[row]), rng)
+                rank_blocks.append(completion_ranks)
+                count_blocks.append(completion_counts)
+
+        if not rank_blocks:
+            return Profile(np.empty((0, m), dtype=rank_dtype(m)), np.empty(0, dtype=np.int64), m)
+
+        ranks, inverse = np.unique(np.concatenate(rank_blocks), axis=0, return_inverse=True)
+        counts = np.bincount(inverse.ravel(), weights=np.concatenate(count_blocks), minlength=len(ranks))
+
+        return Profile(ranks, counts.astype(np.int64), m)
+
+    """
+    Extracts metadata and original data from the input file.
+    Ballots are aggregated into votes_dict while the file is streamed, without keeping the lines in memory.
     """
     def extract_information(self):
-        with open(self.filename, 'r') as file:
-            lines = file.readlines()
+        self.votes_dict = {}
+
+        for voter_num, votes in self.iter_ballots():
+            self.add_entry(self.votes_dict, votes, voter_num)
+
+        self.original_data = [(voter_num, votes) for votes, voter_num in self.votes_dict.items()]
+        self.data = self.original_data
+
+    """
+    Streams the input file line by line and yields each ballot with its number of voters.
+    Metadata lines are stored into metadata as they are read.
 
-            in_metadata = True
-            for line in lines:
+    Yields:
+    tuple: The number of voters and the ranking ballot (ties as tuples).
+
+    Raises:
+    ValueError: If a ballot line cannot be parsed, with the file name and line number.
+    """
+    def iter_ballots(self):
+        with open(self.filename, 'r', buffering=READ_BUFFER_SIZE) as file:
+            for line_number, line in enumerate(file, 1):
                 line = line.strip()
                 if line.startswith('#'):
                     key_value = line.lstrip('#').strip().split(': ', 1)
@@ -65,25 +188,26 @@ class FileHandler:
 
                         if key == 'NUMBER ALTERNATIVES':
                             self.num_alternatives = int(value)
-                else:
-                    in_metadata = False
-                    if ':' in line:
-                        voter_id, votes = line.split(': ')
-                        voter_id = int(voter_id)
+                elif ':' in line:
+                    try:
+                        voter_num, votes = line.split(': ')
 
                         # Check if the votes contain sets
                         if '{' in votes and '}' in votes:
-                            votes = list(self.combine_adjacent_sets(votes))
+                            votes = tuple(self.combine_adjacent_sets(votes))
                         else:
-                            votes = list(map(int, votes.split(',')))
+                            votes = tuple(map(int, filter(str.strip, votes.split(','))))
+                        voter_num = int(voter_num)
+                    except ValueError as error:
+                        raise ValueError(f"{self.filename}:{line_number}: invalid ballot line {line!r} ({error})") \
+                            from error
 
-                        self.original_data.append((voter_id, votes))
-                    else:
-                        in_metadata = True
-        self.data = self.original_data
+                    yield voter_num, votes
 
     """
     Combines adjacent sets in the votes string.
+    The string is tokenized with BALLOT_TOKEN, so alternatives with several digits are kept whole. Empty entries of a
+    tie group (e.g. '{1,,2}') are skipped.
     
     Parameters:
     - votes (str): The votes string.
@@ -93,22 +217,108 @@ class FileHandler:
     """
     def combine_adjacent_sets(self, votes):
         combined_set = []
-        current_set = None
-
-        for char in votes:
-            if char == '{':
-                current_set = set()
-            elif char == '}':
-                combined_set.append(tuple(sorted(current_set)))
-                current_set = None
-            elif char.isdigit():
-                if current_set is not None:
-                    current_set.add(int(char))
-                else:
-                    combined_set.append(int(char))
+
+        for tie_group, alt in BALLOT_TOKEN.findall(votes):
+            if alt:
+                combined_set.append(int(alt))
+            else:
+                group = tuple(sorted(set(map(int, filter(str.strip, tie_group.split(','))))))
+                # A tie group of one alternative is that alternative, as in Profile.items()
+                if group:
+                    combined_set.append(group[0] if len(group) == 1 else group)
 
         return OrderedDict.fromkeys(combined_set)
 
+    """
+    Returns the content hash of the input file, computed once.
+    
+    Returns:
+    str: The SHA-256 hex digest of the file.
+    """
+    def get_content_hash(self):
+        if self.content_hash is None:
+            self.content_hash = file_hash(self.filename)
+
+        return self.content_hash
+
+    """
+    Returns the path of the binary cache: a file named after the content hash in cache_dir, or a sidecar file next to
+    the input file without cache_dir.
+    
+    Returns:
+    str: The cache path.
+    """
+    def get_cache_path(self):
+        if self.cache_dir is None:
+            return self.filename + CACHE_SUFFIX
+
+        return os.path.join(self.cache_dir, self.get_content_hash() + CACHE_SUFFIX)
+
+    """
+    Loads metadata and the counted ballots from the binary cache, without parsing the input file.
+    The cache is only used when it was written by the same layout version for the same file content hash.
+    
+    Returns:
+    bool: True if the cache was loaded, False if the file has to be parsed.
+    """
+    def load_cache(self):
+        try:
+            with np.load(self.get_cache_path(), allow_pickle=False) as cache:
+                if int(cache['version']) != CACHE_VERSION or str(cache['content_hash']) != self.get_content_hash():
+                    return False
+
+                self.metadata = json.loads(str(cache['metadata']))
+                self.num_alternatives = int(cache['num_alternatives'])
+                self.profile = Profile(cache['ranks'], cache['counts'], self.num_alternatives)
+        except (OSError, KeyError, ValueError):
+            return False
+
+        self.votes_dict = self.profile.to_votes_dict()
+        self.original_data = [(voter_num, votes) for votes, voter_num in self.votes_dict.items()]
+        self.data = self.original_data
+        return True
+
+    """
+    Writes metadata and the counted ballots (as a rank matrix and counts vector) to the binary cache, keyed by the
+    content hash of the input file. A cache that cannot be written is skipped.
+    """
+    def save_cache(self):
+        cache_path = self.get_cache_path()
+        temp_path = cache_path + '.tmp'
+        profile = self.get_profile()
+
+        try:
+            if self.cache_dir is not None:
+                os.makedirs(self.cache_dir, exist_ok=True)
+            with open(temp_path, 'wb') as file:
+                np.savez(file, version=CACHE_VERSION, content_hash=self.get_content_hash(),
+                         metadata=json.dumps(self.metadata), num_alternatives=self.num_alternatives,
+                         ranks=profile.ranks, counts=profile.counts)
+            os.replace(temp_path, cache_path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    """
+    Returns the array-backed Profile of votes_dict, built once and reset whenever votes_dict is rebuilt.
+    
+    Returns:
+    Profile: The compact rank matrix and counts of the voting data.
+    """
+    def get_profile(self):
+        if self.profile is None:
+            self.profile = Profile.from_votes_dict(self.votes_dict, self.num_alternatives)
+
+        return self.profile
+
+    """
+    Streams the input file into the memory-mapped ballot store and opens profile on it.
+    """
+    def build_ballot_store(self):
+        ballots = ((votes, voter_num) for voter_num, votes in self.iter_ballots())
+        write_ballot_store(self.ballot_store, ballots, self.get_num_alternatives)
+        self.profile = Profile.open_ballot_store(self.ballot_store)
+
     """
     Returns the metadata extracted from the file.
     
@@ -141,6 +351,7 @@ class FileHandler:
     """
     def create_dict(self):
         self.votes_dict = {}
+        self.profile = None
 
         for voter_num, voter_prefer in self.data:
             self.add_entry(self.votes_dict, voter_prefer, voter_num)
@@ -237,10 +448,97 @@ class FileHandler:
     def randomize_missing(self, updated_votes, missing_alternatives):
 
         missing_list = list(missing_alternatives)
-        randomized_missing = random.sample(missing_list, len(missing_list))
+        randomized_missing = iter(random.sample(missing_list, len(missing_list)))
 
         for i, alt in enumerate(updated_votes):
             if alt in missing_alternatives:
-                updated_votes[i] = randomized_missing.pop(0)
+                updated_votes[i] = next(randomized_missing)
 
         return updated_votes
+
+
+"""
+Completes rank rows into strict and complete orders: each row is sorted by its rank (missing alternatives after
+every ranked one) plus a uniform random key, which shuffles every tie group and the missing alternatives at once.
+
+Parameters:
+- ranks (numpy.ndarray): A (rows x m) rank matrix, -1 marking missing alternatives.
+- rng (numpy.random.Generator): The source of randomness.
+
+Returns:
+numpy.ndarray: The (rows x m) strict rank matrix.
+"""
+
+
+def complete_ranks(ranks, rng):
+    m = ranks.shape[1]
+    orders = np.argsort(np.where(ranks >= 0, ranks, m) + rng.random(ranks.shape), axis=1)
+    strict_ranks = np.empty(ranks.shape, dtype=rank_dtype(m))
+    np.put_along_axis(strict_ranks, orders, np.arange(m, dtype=strict_ranks.dtype)[None, :], axis=1)
+
+    return strict_ranks
+
+
+"""
+Samples the completions of the voters of one ballot, each voter drawing an independent uniform order of every tie
+group (missing alternatives forming the last group), and returns them already counted.
+The voters are split group after group: for a group with at most MAX_TIE_PERMUTATIONS orders, every partial
+completion splits its voters over the orders with one multinomial draw, so a ballot held by many voters costs one
+draw per distinct partial completion rather than one shuffle per voter. Only the voters of larger groups are shuffled
+one by one.
+
+Parameters:
+- positions (numpy.ndarray): The rank of each alternative in the ballot, m for missing alternatives.
+- count (int): The number of voters of the ballot.
+- rng (numpy.random.Generator): The source of randomness.
+
+Returns:
+tuple: A (completions x m) strict rank matrix and the number of voters of each completion.
+"""
+
+
+def sample_completions(positions, count, rng):
+    m = len(positions)
+    orders = np.empty((1, 0), dtype=np.int64)
+    counts = np.array([count], dtype=np.int64)
+
+    for position in np.unique(positions):
+        group = np.flatnonzero(positions == position)
+        if len(group) == 1:
+            orders = np.hstack([orders, np.broadcast_to(group, (len(orders), 1))])
+        elif math.factorial(len(group)) <= MAX_TIE_PERMUTATIONS:
+            permutations = np.array(list(itertools.permutations(group)), dtype=np.int64)
+            draws = rng.multinomial(counts, np.full(len(permutations), 1 / len(permutations)))
+            completion, permutation = np.nonzero(draws)
+            orders = np.hstack([orders[completion], permutations[permutation]])
+            counts = draws[completion, permutation]
+        else:
+            voters = np.repeat(np.arange(len(orders)), counts)
+            orders = np.hstack([orders[voters], rng.permuted(np.tile(group, (len(voters), 1)), axis=1)])
+            counts = np.ones(len(voters), dtype=np.int64)
+
+    strict_ranks = np.empty(orders.shape, dtype=rank_dtype(m))
+    np.put_along_axis(strict_ranks, orders, np.arange(m, dtype=strict_ranks.dtype)[None, :], axis=1)
+
+    return strict_ranks, counts
+
+
+"""
+Computes the content hash of a file, reading it in fixed-size chunks.
+
+Parameters:
+- filename (str): The name of the file.
+
+Returns:
+str: The SHA-256 hex digest of the file content.
+"""
+
+
+def file_hash(filename):
+    digest = hashlib.sha256()
+
+    with open(filename, 'rb') as file:
+        for chunk in iter(lambda: file.read(READ_BUFFER_SIZE), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
@@ -0,0 +1,153 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Size-bounded, thread-safe cache of computed values, evicting the least recently used entries once full.
+    The cache is bounded by its number of entries and, when max_bytes is set, by the total size of its values as
+    measured by sizeof(value); the newest entry is kept even if it alone is larger than max_bytes.
+
+    Values are built outside the lock, so a slow computation does not block the other threads; two threads missing
+    the same key at once may both build it, and the first value stored is kept.
+
+    Attributes:
+    - max_entries (int): The maximum number of cached values.
+    - max_bytes (int): The maximum total size of the cached values, or None for no size bound.
+    - sizeof (callable): sizeof(value) returning the size of a value in bytes, required with max_bytes.
+    - total_bytes (int): The total size of the cached values (0 without max_bytes).
+    - hits (int): The number of lookups served from the cache.
+    - misses (int): The number of lookups that built their value.
+
+    Methods:
+    - get(key, default): Returns the cached value of a key, marking it as recently used.
+    - put(key, value): Stores a value, evicting the least recently used entries if the cache is full.
+    - get_or_create(key, factory): Returns the cached value of a key, building and storing it with factory() if needed.
+    - clear(): Removes every entry.
+    """
+
+    def __init__(self, max_entries, max_bytes=None, sizeof=None):
+        if max_entries < 1:
+            raise ValueError(f"Invalid cache size: {max_entries}")
+        if max_bytes is not None and (max_bytes < 0 or sizeof is None):
+            raise ValueError(f"Invalid cache byte size: {max_bytes}, a sizeof function is required")
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    """
+    Returns the cached value of a key, marking it as recently used.
+
+    Parameters:
+    - key: A hashable key.
+    - default: The value returned when the key is not cached.
+
+    Returns:
+    The cached value, or default.
+    """
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    """
+    Stores a value, evicting the least recently used entries if the cache is full.
+
+    Parameters:
+    - key: A hashable key.
+    - value: The value to cache.
+    """
+
+    def put(self, key, value):
+        with self._lock:
+            self._discard(key)
+            self._store(key, value)
+
+    """
+    Returns the cached value of a key, building and storing it with factory() if it is not cached.
+
+    Parameters:
+    - key: A hashable key.
+    - factory (callable): Builds the value from no arguments.
+
+    Returns:
+    The cached or newly built value.
+    """
+
+    def get_or_create(self, key, factory):
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+
+        value = factory()
+
+        with self._lock:
+            # Another thread may have stored the key while the value was built
+            if key in self._entries:
+                value = self._entries[key]
+                self._entries.move_to_end(key)
+            else:
+                self._store(key, value)
+
+        return value
+
+    """
+    Removes every entry.
+    """
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.total_bytes = 0
+
+    """
+    Stores a new entry as the most recently used one, then evicts the least recently used entries while the cache
+    is over its bounds. The lock must be held.
+
+    Parameters:
+    - key: A hashable key, not cached yet.
+    - value: The value to cache.
+    """
+
+    def _store(self, key, value):
+        self._entries[key] = value
+        if self.max_bytes is not None:
+            self._sizes[key] = self.sizeof(value)
+            self.total_bytes += self._sizes[key]
+
+        while len(self._entries) > self.max_entries or \
+                (len(self._entries) > 1 and self.max_bytes is not None and self.total_bytes > self.max_bytes):
+            self._discard(next(iter(self._entries)))
+
+    """
+    Removes an entry if it is cached. The lock must be held.
+
+    Parameters:
+    - key: A hashable key.
+    """
+
+    def _discard(self, key):
+        if key in self._entries:
+            del self._entries[key]
+            self.total_bytes -= self._sizes.pop(key, 0)
@@ -0,0 +1,103 @@
+import numpy as np
+
+# Registry of normalization kernels, mapping a method name to kernel(values, out).
+NORMALIZATIONS = {}
+
+
+"""
+Registers a normalization kernel.
+A kernel receives the (voters x alternatives) value matrix and an output matrix of the same shape (which may be the
+value matrix itself), and writes the normalized rows into the output with whole-matrix operations.
+
+Parameters:
+- name (str): The normalization method name.
+- kernel (callable): kernel(values, out).
+"""
+
+
+def register_normalization(name, kernel):
+    NORMALIZATIONS[name] = kernel
+
+
+"""
+Normalizes every row of a value matrix with a registered kernel.
+
+Parameters:
+- values (numpy.ndarray): The (voters x alternatives) value matrix.
+- method (str): The normalization method, a key of NORMALIZATIONS.
+- inplace (bool): Whether values is overwritten instead of allocating a second full matrix.
+
+Returns:
+numpy.ndarray: The normalized matrix (values itself when inplace).
+"""
+
+
+def normalize(values, method, inplace=False):
+    if method not in NORMALIZATIONS:
+        raise ValueError(f"Invalid normalization method: {method}")
+
+    out = values if inplace else np.empty_like(values)
+    NORMALIZATIONS[method](values, out)
+
+    return out
+
+
+"""
+Divides every row by a per-row scale computed beforehand. Rows whose scale is 0 become all 0.
+
+Parameters:
+- values (numpy.ndarray): The value matrix.
+- scale (numpy.ndarray): A (voters x 1) column of row scales.
+- out (numpy.ndarray): The output matrix.
+"""
+
+
+def _divide_rows(values, scale, out):
+    zero_rows = scale[:, 0] == 0
+    np.divide(values, scale, out=out, where=~zero_rows[:, None])
+    out[zero_rows] = 0
+
+
+"""
+Normalizes each row by the sum of its values.
+"""
+
+
+def unit_sum_kernel(values, out):
+    _divide_rows(values, values.sum(axis=1, keepdims=True), out)
+
+
+"""
+Normalizes each row by its max value (usually the value of the top ranked alternative).
+"""
+
+
+def unit_range_kernel(values, out):
+    _divide_rows(values, values.max(axis=1, keepdims=True), out)
+
+
+"""
+Normalizes each row to unit Euclidean length.
+"""
+
+
+def unit_l2_kernel(values, out):
+    _divide_rows(values, np.sqrt(np.einsum('ij,ij->i', values, values))[:, None], out)
+
+
+"""
+Rescales each row to [0, 1] by its min and max, which keeps the ranking of every row.
+"""
+
+
+def min_max_kernel(values, out):
+    minimum = values.min(axis=1, keepdims=True)
+    value_range = values.max(axis=1, keepdims=True) - minimum
+    np.subtract(values, minimum, out=out)
+    _divide_rows(out, value_range, out)
+
+
+register_normalization('unit_sum', unit_sum_kernel)
+register_normalization('unit_range', unit_range_kernel)
+register_normalization('unit_l2', unit_l2_kernel)
+register_normalization('min_max', min_max_kernel)
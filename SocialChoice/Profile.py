@@ -0,0 +1,369 @@
+import json
+import os
+
+import numpy as np
+
+# Number of ballot rows processed at once when a profile is scanned, which bounds the working memory for profiles
+# backed by a memory-mapped ballot store.
+CHUNK_ROWS = 1 << 16
+
+# Number of (ballot, alternative, alternative) comparisons held at once when the pairwise matrix is built.
+PAIRWISE_BLOCK_SIZE = 1 << 22
+
+
+class Profile:
+    """
+    Compact array representation of a counted preference profile.
+
+    Each unique ranking ballot is stored as one row of a rank matrix: column a holds the rank (index of the entry
+    in the ballot) of alternative a + 1, so alternatives tied in the same set share the same rank and alternatives
+    missing from the ballot are marked with -1.
+
+    The rank matrix and counts may be numpy.memmap arrays of a ballot store on disk (see write_ballot_store()),
+    every scan over the ballots then reads CHUNK_ROWS rows at a time so profiles larger than RAM can be used.
+
+    Attributes:
+    - ranks (numpy.ndarray): A (n_unique_ballots x m) int matrix, ranks[i, a] is the rank of alternative a + 1 in ballot i.
+    - counts (numpy.ndarray): A vector containing the number of voters who support each ballot.
+    - num_alternatives (int): The total number of alternatives participated.
+    - store_path (str): The directory of the ballot store the profile was opened from, None for an in-memory profile.
+
+    Methods:
+    - from_votes_dict(votes_dict, num_alternatives): Builds a profile from a ranking ballot -> count dictionary.
+    - to_votes_dict(): Converts the profile back into a ranking ballot -> count dictionary.
+    - open_ballot_store(path): Opens a ballot store written by write_ballot_store() as a memory-mapped profile.
+    - save_ballot_store(path): Writes the profile to a ballot store on disk.
+    - iter_chunks(): Yields the rank matrix and counts in blocks of CHUNK_ROWS ballots.
+    - items(): Yields each ranking ballot with its count, in the same layout as votes_dict.items().
+    - get_num_voters(): Returns the total number of voters.
+    - position_counts(): Returns the m x m table of how often each alternative appears at each rank.
+    - scores(weights): Computes the total score of each alternative for a positional weight vector.
+    - scores_many(weight_matrix): Computes the scores of every alternative for a batch of weight vectors.
+    - pairwise_counts(): Returns the m x m table of how many voters prefer each alternative to each other one.
+    - margins(): Returns the m x m pairwise majority margins.
+    """
+
+    def __init__(self, ranks, counts, num_alternatives, store_path=None):
+        self.ranks = ranks
+        self.counts = counts
+        self.num_alternatives = num_alternatives
+        self.store_path = store_path
+        self._position_counts = None
+        self._pairwise_counts = None
+
+    """
+    Builds a profile from a ranking ballot -> count dictionary, such as FileHandler.votes_dict.
+
+    Parameters:
+    - votes_dict (dict): A dictionary containing ranking ballots (tuples, ties as inner tuples/sets) and counts.
+    - num_alternatives (int): The total number of alternatives.
+
+    Returns:
+    Profile: The compact profile.
+    """
+
+    @classmethod
+    def from_votes_dict(cls, votes_dict, num_alternatives):
+        ranks = ballot_ranks(votes_dict.keys(), num_alternatives)
+        counts = np.fromiter(votes_dict.values(), dtype=np.int64, count=len(votes_dict))
+
+        return cls(ranks, counts, num_alternatives)
+
+    """
+    Converts the profile back into a ranking ballot -> count dictionary.
+    Tied alternatives become a sorted tuple, in the same layout produced by FileHandler.
+
+    Returns:
+    dict: A dictionary containing ranking ballots as keys and counts as values.
+    """
+
+    def to_votes_dict(self):
+        votes_dict = {}
+
+        for key, count in self.items():
+            votes_dict[key] = votes_dict.get(key, 0) + count
+
+        return votes_dict
+
+    """
+    Opens a ballot store written by write_ballot_store() as a profile backed by numpy.memmap arrays.
+
+    Parameters:
+    - path (str): The directory of the ballot store.
+
+    Returns:
+    Profile: The memory-mapped profile.
+    """
+
+    @classmethod
+    def open_ballot_store(cls, path):
+        with open(os.path.join(path, 'header.json')) as file:
+            header = json.load(file)
+
+        num_ballots, num_alternatives = header['num_ballots'], header['num_alternatives']
+        if num_ballots == 0:
+            return cls(np.empty((0, num_alternatives), dtype=header['rank_dtype']), np.empty(0, dtype=np.int64),
+                       num_alternatives, path)
+
+        ranks = np.memmap(os.path.join(path, 'ranks.bin'), dtype=header['rank_dtype'], mode='r',
+                          shape=(num_ballots, num_alternatives))
+        counts = np.memmap(os.path.join(path, 'counts.bin'), dtype=np.int64, mode='r', shape=(num_ballots,))
+
+        return cls(ranks, counts, num_alternatives, path)
+
+    """
+    Writes the profile to a ballot store on disk.
+
+    Parameters:
+    - path (str): The directory of the ballot store.
+    """
+
+    def save_ballot_store(self, path):
+        write_ballot_store(path, self.items(), self.num_alternatives)
+
+    """
+    Yields the rank matrix and counts in blocks of CHUNK_ROWS ballots, so memory-mapped rows are read lazily.
+
+    Yields:
+    tuple: A block of the rank matrix and the matching block of counts.
+    """
+
+    def iter_chunks(self):
+        for start in range(0, len(self.counts), CHUNK_ROWS):
+            yield np.asarray(self.ranks[start:start + CHUNK_ROWS]), np.asarray(self.counts[start:start + CHUNK_ROWS])
+
+    """
+    Yields each ranking ballot with its count, in the same layout as votes_dict.items().
+    Rows are converted block by block, so the whole profile is never held as Python objects.
+
+    Yields:
+    tuple: The ranking ballot (ties as sorted tuples) and its number of voters.
+    """
+
+    def items(self):
+        for ranks, counts in self.iter_chunks():
+            ranked_counts = (ranks >= 0).sum(axis=1)
+            is_strict = ranks.max(axis=1, initial=-1) == ranked_counts - 1
+            orders = np.argsort(np.where(ranks >= 0, ranks, self.num_alternatives), axis=1, kind='stable') + 1
+
+            for row, order, length, strict, count in zip(ranks, orders.tolist(), ranked_counts.tolist(),
+                                                         is_strict.tolist(), counts.tolist()):
+                if strict:
+                    yield tuple(order[:length]), count
+                else:
+                    entries = {}
+                    for alt in order[:length]:
+                        entries.setdefault(int(row[alt - 1]), []).append(alt)
+                    yield tuple(group[0] if len(group) == 1 else tuple(group) for group in entries.values()), count
+
+    """
+    Returns the number of ballot rows of the profile.
+
+    Returns:
+    int: The number of ballot rows.
+    """
+
+    def __len__(self):
+        return len(self.counts)
+
+    """
+    Returns the total number of voters.
+
+    Returns:
+    int: The total number of voters.
+    """
+
+    def get_num_voters(self):
+        return int(self.counts.sum())
+
+    """
+    Returns the m x m table of how often each alternative appears at each rank.
+    The table is built in one pass over the rank matrix and cached, so later scoring no longer depends on the
+    number of voters.
+
+    Returns:
+    numpy.ndarray: position_counts[a, r] is the number of voters ranking alternative a + 1 at rank r.
+    """
+
+    def position_counts(self):
+        if self._position_counts is None:
+            m = self.num_alternatives
+            table = np.zeros(m * m)
+
+            for ranks, counts in self.iter_chunks():
+                ranked = ranks >= 0
+                flat_index = (np.arange(m) * m + ranks)[ranked]
+                weights = np.broadcast_to(counts[:, None], ranks.shape)[ranked]
+                table += np.bincount(flat_index, weights=weights, minlength=m * m)
+
+            self._position_counts = table.astype(np.int64).reshape(m, m)
+
+        return self._position_counts
+
+    """
+    Computes the total score of each alternative for a positional weight vector.
+    Weights beyond the given vector, and unranked alternatives, score 0.
+
+    Parameters:
+    - weights (list): A weight vector, index corresponding to scores assigned to each candidate in same rank(index).
+
+    Returns:
+    numpy.ndarray: The total score of each alternative, index a corresponding to alternative a + 1.
+    """
+
+    def scores(self, weights):
+        return self.scores_many([weights])[0]
+
+    """
+    Computes the scores of every alternative for a batch of weight vectors in one product with position_counts().
+
+    Parameters:
+    - weight_matrix (list): A (n_rules x m) matrix, each row is a weight vector. Shorter rows are padded with 0.
+
+    Returns:
+    numpy.ndarray: A (n_rules x m) score table, entry [j, a] is the score of alternative a + 1 under rule j.
+    """
+
+    def scores_many(self, weight_matrix):
+        m = self.num_alternatives
+        weight_matrix = [np.asarray(weights)[:m] for weights in weight_matrix]
+        dtype = np.result_type(np.int64, *weight_matrix)
+        padded = np.zeros((len(weight_matrix), m), dtype=dtype)
+        for row, weights in enumerate(weight_matrix):
+            padded[row, :len(weights)] = weights
+
+        return padded @ self.position_counts().T
+
+    """
+    Returns the m x m pairwise majority matrix: how many voters rank each alternative above each other one.
+    An alternative missing from a ballot is below every ranked one of that ballot, tied and missing alternatives are
+    not compared. The matrix is built once and cached, comparing all pairs of each block of ballots at once
+    (PAIRWISE_BLOCK_SIZE comparisons at a time), so it costs O(unique_ballots x m^2) and every pairwise rule shares it.
+
+    Returns:
+    numpy.ndarray: pairwise_counts[a, b] is the number of voters preferring alternative a + 1 to alternative b + 1.
+    """
+
+    def pairwise_counts(self):
+        if self._pairwise_counts is None:
+            m = self.num_alternatives
+            table = np.zeros((m, m))
+            block_rows = max(1, PAIRWISE_BLOCK_SIZE // max(m * m, 1))
+
+            for ranks, counts in self.iter_chunks():
+                positions = np.where(ranks >= 0, ranks, m).astype(np.int32)
+                for start in range(0, len(counts), block_rows):
+                    block = positions[start:start + block_rows]
+                    preferred = block[:, :, None] < block[:, None, :]
+                    table += np.tensordot(counts[start:start + block_rows].astype(float), preferred, axes=1)
+
+            self._pairwise_counts = table.astype(np.int64)
+
+        return self._pairwise_counts
+
+    """
+    Returns the pairwise majority margins, margins[a, b] = pairwise_counts[a, b] - pairwise_counts[b, a].
+
+    Returns:
+    numpy.ndarray: The antisymmetric m x m margin matrix.
+    """
+
+    def margins(self):
+        pairwise = self.pairwise_counts()
+
+        return pairwise - pairwise.T
+
+
+"""
+Chooses the smallest integer type able to hold every rank of a profile.
+
+Parameters:
+- num_alternatives (int): The total number of alternatives.
+
+Returns:
+numpy.dtype: int16 or int32.
+"""
+
+
+def rank_dtype(num_alternatives):
+    return np.int16 if num_alternatives <= np.iinfo(np.int16).max else np.int32
+
+
+"""
+Builds the rank matrix of a sequence of ranking ballots.
+
+Parameters:
+- ballots (iterable): Ranking ballots as tuples, ties as inner tuples/sets.
+- num_alternatives (int): The total number of alternatives.
+
+Returns:
+numpy.ndarray: A (n_ballots x m) rank matrix, -1 marking alternatives missing from a ballot.
+"""
+
+
+def ballot_ranks(ballots, num_alternatives):
+    ballots = list(ballots)
+    ranks = np.full((len(ballots), num_alternatives), -1, dtype=rank_dtype(num_alternatives))
+
+    for row, votes in enumerate(ballots):
+        if all(isinstance(alt, int) for alt in votes):
+            # Strict ballot: all ranks are written in one assignment
+            ranks[row, np.fromiter(votes, dtype=np.int64, count=len(votes)) - 1] = np.arange(len(votes))
+        else:
+            for rank, alt in enumerate(votes):
+                if isinstance(alt, (set, frozenset, tuple, list)):
+                    for element in alt:
+                        ranks[row, element - 1] = rank
+                else:
+                    ranks[row, alt - 1] = rank
+
+    return ranks
+
+
+"""
+Writes counted ranking ballots to a ballot store on disk: a fixed-width int16/int32 rank row per ballot in
+'ranks.bin', an int64 count per ballot in 'counts.bin' and the shape in 'header.json'.
+Ballots are consumed lazily and written CHUNK_ROWS rows at a time, so a store can be built from a stream larger
+than RAM. Ballots are not deduplicated.
+
+Parameters:
+- path (str): The directory of the ballot store, created if needed.
+- ballots (iterable): (ranking ballot, count) pairs, such as votes_dict.items().
+- num_alternatives (int or callable): The total number of alternatives, or a function returning it once the first
+  ballot has been read (e.g. when it comes from the metadata of a streamed file).
+"""
+
+
+def write_ballot_store(path, ballots, num_alternatives):
+    os.makedirs(path, exist_ok=True)
+    num_ballots = 0
+    dtype = None
+    block = []
+
+    with open(os.path.join(path, 'ranks.bin'), 'wb') as ranks_file, \
+            open(os.path.join(path, 'counts.bin'), 'wb') as counts_file:
+
+        def flush():
+            ranks_file.write(ballot_ranks((votes for votes, _ in block), num_alternatives).tobytes())
+            counts_file.write(np.array([count for _, count in block], dtype=np.int64).tobytes())
+            block.clear()
+
+        for votes, count in ballots:
+            if dtype is None:
+                num_alternatives = num_alternatives() if callable(num_alternatives) else num_alternatives
+                dtype = rank_dtype(num_alternatives)
+            block.append((votes, count))
+            num_ballots += 1
+            if len(block) == CHUNK_ROWS:
+                flush()
+
+        if block:
+            flush()
+
+    if dtype is None:
+        num_alternatives = num_alternatives() if callable(num_alternatives) else num_alternatives
+        dtype = rank_dtype(num_alternatives)
+
+    with open(os.path.join(path, 'header.json'), 'w') as file:
+        json.dump({'num_ballots': num_ballots, 'num_alternatives': num_alternatives,
+                   'rank_dtype': np.dtype(dtype).name}, file)
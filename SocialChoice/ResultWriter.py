@@ -0,0 +1,162 @@
+import zipfile
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Stable schema of the distortion results: one row per (file, rule, distribution, param, normalization, instance,
+# seed, mode) cell, with the winner (-1 for a winner lottery) and its distortion.
+RESULT_SCHEMA = (
+    ('file', 'string'),
+    ('rule', 'string'),
+    ('distribution', 'string'),
+    ('param', 'float64'),
+    ('normalization', 'string'),
+    ('instance', 'int32'),
+    ('seed', 'int64'),
+    ('mode', 'string'),
+    ('winner', 'int32'),
+    ('distortion', 'float64'),
+)
+
+RESULT_COLUMNS = tuple(column for column, _ in RESULT_SCHEMA)
+
+# Prefix of the metadata members of an npz archive, which share the namespace of the column arrays.
+NPZ_METADATA_PREFIX = 'meta.'
+
+
+class ResultWriter:
+    """
+    Writes distortion results as typed columnar batches with the stable RESULT_SCHEMA, so analysis tools can load
+    them without parsing CSV.
+
+    Results are written to Parquet through pyarrow, one row group per batch, so a sweep is streamed to disk as it
+    runs. Without pyarrow (or for a '.npz' path) they are written to a NumPy .npz archive with one array per column
+    and one 'meta.<key>' array per metadata entry; as an archive cannot be appended to, those batches are kept until
+    close().
+
+    Attributes:
+    - path (str): The output file. A '.parquet' path falling back to npz is written with an '.npz' suffix instead.
+    - format (str): 'parquet' or 'npz'. By default 'npz' for a '.npz' path or without pyarrow, else 'parquet'.
+    - metadata (dict): Optional string key -> string value metadata stored with the results (e.g. the seed entropy).
+    - num_rows (int): The number of rows written so far.
+
+    Methods:
+    - write_batch(columns): Writes one batch of results.
+    - write_rows(rows): Writes a list of result rows (dictionaries) as one batch.
+    - close(): Finishes the output file.
+    """
+
+    def __init__(self, path, format=None, metadata=None):
+        if format is None:
+            format = 'npz' if pa is None or path.endswith('.npz') else 'parquet'
+        if format not in ('parquet', 'npz'):
+            raise ValueError(f"Invalid result format: {format}")
+        if format == 'parquet' and pa is None:
+            raise ImportError("Writing Parquet results requires pyarrow.")
+
+        if format == 'npz' and path.endswith('.parquet'):
+            path = path[:-len('.parquet')] + '.npz'
+
+        self.path = path
+        self.format = format
+        self.metadata = {str(key): str(value) for key, value in (metadata or {}).items()}
+        self.num_rows = 0
+        self._writer = None
+        self._batches = []
+
+    """
+    Writes one batch of results, casting every column to its RESULT_SCHEMA type.
+
+    Parameters:
+    - columns (dict): A dictionary mapping each of RESULT_COLUMNS to an array or list of the same length.
+    """
+
+    def write_batch(self, columns):
+        arrays = {column: np.asarray(columns[column], dtype=str if dtype == 'string' else dtype)
+                  for column, dtype in RESULT_SCHEMA}
+        self.num_rows += len(arrays['distortion'])
+
+        if self.format == 'npz':
+            self._batches.append(arrays)
+            return
+
+        schema = result_schema().with_metadata(self.metadata)
+        table = pa.Table.from_arrays([pa.array(arrays[column], type=schema.field(column).type)
+                                      for column in RESULT_COLUMNS], schema=schema)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, schema)
+        self._writer.write_table(table)
+
+    """
+    Writes a list of result rows as one batch.
+
+    Parameters:
+    - rows (list): The result rows, as dictionaries with the keys of RESULT_COLUMNS.
+    """
+
+    def write_rows(self, rows):
+        self.write_batch({column: [row[column] for row in rows] for column in RESULT_COLUMNS})
+
+    """
+    Finishes the output file. A writer that received no rows still writes an empty file with the schema.
+    """
+
+    def close(self):
+        if self.format == 'npz':
+            if self._batches:
+                columns = {column: np.concatenate([batch[column] for batch in self._batches])
+                           for column in RESULT_COLUMNS}
+            else:
+                columns = {column: np.array([], dtype=str if dtype == 'string' else dtype)
+                           for column, dtype in RESULT_SCHEMA}
+            metadata = {NPZ_METADATA_PREFIX + key: np.array(value) for key, value in self.metadata.items()}
+            write_npz(self.path, {**columns, **metadata})
+            self._batches = []
+            return
+
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, result_schema().with_metadata(self.metadata))
+        self._writer.close()
+        self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+"""
+Returns RESULT_SCHEMA as a pyarrow schema.
+
+Returns:
+pyarrow.Schema: The schema of the results.
+"""
+
+
+def result_schema():
+    return pa.schema([(column, pa.string() if dtype == 'string' else pa.from_numpy_dtype(np.dtype(dtype)))
+                      for column, dtype in RESULT_SCHEMA])
+
+
+"""
+Writes columns to a NumPy .npz archive, one .npy member per column. The archive is written member by member
+rather than with numpy.savez, whose own 'file' argument clashes with the 'file' column.
+
+Parameters:
+- path (str): The output file.
+- columns (dict): A dictionary mapping each column name to a numpy array.
+"""
+
+
+def write_npz(path, columns):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for column, values in columns.items():
+            with archive.open(column + '.npy', 'w', force_zip64=True) as member:
+                np.lib.format.write_array(member, np.asarray(values), allow_pickle=False)
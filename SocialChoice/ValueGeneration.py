@@ -1,7 +1,12 @@
 import numpy as np
-import random
 from typing import List
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from SocialChoice.Distributions import sample, truncated_sample
+from SocialChoice.Normalization import normalize
+from SocialChoice.Profile import Profile, rank_dtype
+from SocialChoice.ValueTensor import ValueTensor
 
 
 class ValueGeneration:
@@ -11,104 +16,193 @@ class ValueGeneration:
     Values are generated for each voter's choice (allow repetition of ranking ballot).
 
     Attributes:
-    - data_dict (dict): A dictionary containing voting data.
-    - strict_data_dict (dict): A dictionary with strict ordering of alternatives and corresponding data.
+    - data_dict (dict/Profile): A dictionary containing voting data, or a (possibly memory-mapped) Profile whose rank
+      matrix is read block by block.
+    - strict_data_dict (dict): A dictionary with strict ordering of alternatives and corresponding data, filled by
+      update_data_with_missing(); value_generation() works on the rank matrix of profile instead.
     - num_alternatives (int): The total number of alternatives participated.
     - missing_alternatives (set): A set containing missing alternatives.
     - value_list (defaultdict): A defaultdict storing generated values for each ranking.
+      Generated instances are ValueTensor objects, which keep the same ranking -> list of values view.
+    - profile (Profile): The rank matrix and counts of data_dict, read block by block to generate the values of the voters.
+    - seed_sequence (numpy.random.SeedSequence): The root seed of this instance, each generated instance draws from
+      its own child stream spawned from it, so runs are reproducible and safe to parallelize.
+    - rng (numpy.random.Generator): The Generator used for all random draws (values, tie and missing shuffles).
+    - dtype (numpy.dtype): The float type of the generated value tensors, float64 or float32.
+
+    Distributions are looked up in the registry of SocialChoice.Distributions, new ones are added with
+    register_distribution().
 
     Methods:
-    - generate_k_instances(distribution_list, is_missing_zero): Generate k number of instances for given set of distributions.
+    - generate_k_instances(distribution_list, is_missing_zero, parallel, max_workers): Generate k number of instances for given set of distributions.
+    - generate_instance(distribution, is_missing_zero, power_param, seed): Generates one instance from its own seed stream.
     - value_generation(output_filename, distribution, is_missing_zero, power_param=2): Generates values for voting data.
+    - ballot_values(ranks, counts, distribution, is_missing_zero, power_param): Generates the values of a block of ballots.
     - assign_values(votes, count, distribution, power_param): Assigns values to alternatives based alternative ranking.
     - generate_random_values(count, distribution, power_param, upper_limit): Generates random values based on a distribution.
+    - generate_random_matrix(shape, distribution, power_param): Draws a matrix of random values with one NumPy call.
     - make_data_strict(data_dict): Generates a strict ordering for the given voting data.
     - get_strict_order(alt): Gets a strict order for the given alternative.
     - update_data_with_missing(): Updates each ranking ballot with corresponding missing alternatives.
     - randomize_missing(updated_alt, missing_alternatives): Randomly sample the missing alternative's position in the ballot
-    - unit_sum_normalization(): Normalizes values based on the sum of values for each data row.
-    - unit_range_normalization(): Normalizes values based on the max value for each data row.
+    - normalize_instances(k_list, method, inplace): Normalizes every instance with a registered normalization kernel.
+    - unit_sum_normalization(k_list, inplace): Normalizes values based on the sum of values for each data row.
+    - unit_range_normalization(k_list, inplace): Normalizes values based on the max value for each data row.
     """
 
-    def __init__(self, data_dict, num_alternatives):
+    def __init__(self, data_dict, num_alternatives, seed=None, dtype=np.float64):
         self.data_dict = data_dict
         self.strict_data_dict = data_dict
         self.num_alternatives = num_alternatives
         self.missing_alternatives = set()
         self.value_list = defaultdict(list)
+        self.profile = data_dict if isinstance(data_dict, Profile) else Profile.from_votes_dict(data_dict, num_alternatives)
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.rng = np.random.default_rng(self.seed_sequence)
+        self.dtype = dtype
 
     """
-    Generate k number of instances for given set of distributions
+    Generate k number of instances for given set of distributions.
+    Every instance draws from an independent child stream spawned from seed_sequence, so the instances are the same
+    whether they are generated one after another or spread across a process pool.
     
     Parameters:
     - distribution_list(list): A list containing user inputted distributions. 
     - is_missing_zero (str): Whether missing alternatives should be assigned a value of zero. If False, assign it with random value.
+    - parallel (bool): Whether the instances are generated by a ProcessPoolExecutor. Distributions registered at run
+      time must be registered at import time of the workers when processes are not forked. A profile opened from a
+      ballot store is reopened by each worker from its store_path instead of being copied into it.
+    - max_workers (int): The number of worker processes, all cores if None.
     """
-    def generate_k_instances(self, distribution_list, is_missing_zero):
+    def generate_k_instances(self, distribution_list, is_missing_zero, parallel=False, max_workers=None):
         k_list = defaultdict(list)
+        tasks = []
 
         for distribution, (count, power_param) in distribution_list.items():
-            instances_for_distribution = []
-
-            for _ in range(count):
-                instances_for_distribution.append(self.value_generation(distribution, is_missing_zero, power_param))
+            for child_seed in self.seed_sequence.spawn(count):
+                tasks.append((distribution, is_missing_zero, power_param, child_seed))
+
+        if parallel:
+            # Each worker receives this object once, then only the small task tuples are sent. A memory-mapped
+            # profile would be pickled as whole in-memory arrays, so workers reopen its ballot store instead.
+            if self.profile.store_path is not None:
+                initializer, initargs = _init_store_worker, (self.profile.store_path, self.num_alternatives, self.dtype)
+            else:
+                initializer, initargs = _init_worker, (self,)
+            with ProcessPoolExecutor(max_workers, initializer=initializer, initargs=initargs) as executor:
+                instances = list(executor.map(_generate_instance, tasks))
+        else:
+            instances = [self.generate_instance(*task) for task in tasks]
 
-            k_list.update({distribution: instances_for_distribution})
+        for (distribution, _, _, _), instance in zip(tasks, instances):
+            k_list[distribution].append(instance)
 
         return k_list
 
+    """
+    Generates one instance of values, drawing from its own seed stream.
+    
+    Parameters:
+    - distribution (str): The distribution used to generate values.
+    - is_missing_zero (str): Whether missing alternatives should be assigned a value of zero.
+    - power_param (float): Power parameter used in some distributions.
+    - seed (numpy.random.SeedSequence): The seed of the instance stream.
+    
+    Returns:
+    ValueTensor: The generated values for each ranking.
+    """
+    def generate_instance(self, distribution, is_missing_zero, power_param, seed):
+        self.rng = np.random.default_rng(seed)
+
+        return self.value_generation(distribution, is_missing_zero, power_param)
+
     """
     Generates values for voting data based on user choices.
+    The ballots are read one Profile.iter_chunks() block (CHUNK_ROWS ballots) at a time, straight from the rank matrix,
+    so a memory-mapped profile is never loaded whole nor turned into per-ballot Python objects. The values of the
+    voters of a block are drawn as one (block_voters x m) matrix, sorted along each row and scattered into ballot order
+    with fancy indexing on the rank rows, see ballot_values().
     
     Parameters:
     - distribution (str): The distribution used to generate values ('uniform', 'exponential', 'normal', 'power', 'gamma', 'geometric').
     - is_missing_zero (str): Whether missing alternatives should be assigned a value of zero. If False, assign it with random value.
     - power_param (float): Power parameter used in some distributions (default is 2). Detail of choice is explain in generate_random_values(). 
+    
+    Returns:
+    ValueTensor: The (voters x alternatives) values, readable as a ranking -> list of {alternative: value} dictionary.
     """
 
     def value_generation(self, distribution, is_missing_zero, power_param=2):
-        # Assign values for original alternatives
-        values_dict = {}
-        value_list = defaultdict(list)
-        for index, (votes, count) in enumerate(self.data_dict.items()):
-            values_func = lambda v=votes: self.assign_values(v, self.num_alternatives + 1, distribution, power_param)
-            values_dict[index] = values_func
-
-        # Get missing alternatives for each row
-        missing_alternatives_dict = self.update_data_with_missing()
+        m = self.num_alternatives
+        num_voters = self.profile.get_num_voters()
+        orders = np.empty((len(self.profile), m), dtype=rank_dtype(m))
+        values = np.empty((num_voters, m), dtype=self.dtype)
+        ballot_index = np.empty(num_voters, dtype=np.int64)
+        start_ballot = start_voter = 0
+
+        for ranks, counts in self.profile.iter_chunks():
+            block_orders, block_values = self.ballot_values(ranks, counts, distribution, is_missing_zero, power_param)
+            end_ballot, end_voter = start_ballot + len(counts), start_voter + len(block_values)
+            orders[start_ballot:end_ballot] = block_orders
+            values[start_voter:end_voter] = block_values
+            ballot_index[start_voter:end_voter] = np.repeat(np.arange(start_ballot, end_ballot), counts)
+            start_ballot, start_voter = end_ballot, end_voter
+
+        return ValueTensor(values, ballot_index, orders=orders)
 
-        for votes, count in self.strict_data_dict.items():
+    """
+    Generates the values of the voters of a block of ballots, straight from their rank rows.
+    Each ballot is first made strict and complete by sorting its ranks plus a uniform random key, which shuffles its
+    tie groups and its missing alternatives (placed after the ranked ones) in one argsort over the block.
+    
+    Parameters:
+    - ranks (numpy.ndarray): A (ballots x m) rank matrix, -1 marking missing alternatives.
+    - counts (numpy.ndarray): The number of voters of each ballot.
+    - distribution (str): The distribution used to generate values.
+    - is_missing_zero (str): Whether missing alternatives should be assigned a value of zero.
+    - power_param (float): Power parameter used in some distributions.
+    
+    Returns:
+    tuple: The (ballots x m) strict orders of the ballots (alternatives from the highest to the lowest) and the
+    (voters x m) values, the voters of each ballot in consecutive rows.
+    """
 
-            # Get missing alternatives for the current row
-            missing_alternatives = missing_alternatives_dict.get(votes, set())
+    def ballot_values(self, ranks, counts, distribution, is_missing_zero, power_param):
+        m = self.num_alternatives
+        ballot_index = np.repeat(np.arange(len(counts)), counts)
+        orders = np.argsort(np.where(ranks >= 0, ranks, m) + self.rng.random(ranks.shape), axis=1)
 
-            for _ in range(count):
-                index = list(self.strict_data_dict.keys()).index(votes)
-                values = values_dict[index]().copy()
+        # Sorted values of every voter, the entry at rank r of a ballot gets the r-th largest value
+        draws = self.generate_random_matrix((len(ballot_index), m), distribution, power_param)
+        draws = np.sort(draws, axis=1)[:, ::-1]
+        voter_ranks = ranks[ballot_index]
+        values = np.take_along_axis(draws, np.maximum(voter_ranks, 0), axis=1)
 
-                if missing_alternatives:
+        missing = voter_ranks < 0
+        if missing.any():
+            if is_missing_zero == 'True':
+                values[missing] = 0
 
-                    # get random value dataset
-                    values_list = list(values.items())
-                    upper_limit = values_list[len(values) - 1][1]
-                    random_value = self.generate_random_values(len(missing_alternatives), distribution, power_param,
-                                                               upper_limit)
-                    random_value = sorted(random_value, reverse=True)
+            # Assign with random values drawn from the same distribution, but smaller than the value of the lowest
+            # ranked alternative of the ballot; the largest goes to the first missing alternative of the strict ballot.
+            else:
+                ranked_counts = (ranks >= 0).sum(axis=1)
+                strict_ranks = np.empty_like(orders)
+                np.put_along_axis(strict_ranks, orders, np.arange(m)[None, :], axis=1)
+                missing_order = np.maximum(strict_ranks - ranked_counts[:, None], 0)
 
-                    for missing_alt in missing_alternatives:
-                        if is_missing_zero == 'True':
-                            values[missing_alt] = 0
+                upper_limit = draws[np.arange(len(ballot_index)), ranks.max(axis=1)[ballot_index]]
+                num_missing = m - ranked_counts.min()
+                missing_values = truncated_sample(distribution, (len(ballot_index), num_missing), power_param,
+                                                  upper_limit[:, None], self.rng)
+                needed = np.arange(num_missing) < (m - ranked_counts)[ballot_index, None]
+                missing_values[~needed] = -np.inf
+                missing_values = np.sort(missing_values, axis=1)[:, ::-1]
 
-                        # Assgin with random value draw from same distribution,
-                        # but the value mnust be smaller than the alternative who originally is in the ranking ballot.
-                        else:
-                            values[missing_alt] = random_value[0]
-                            random_value.remove(random_value[0])
+                voter_missing_order = missing_order[ballot_index]
+                values[missing] = np.take_along_axis(missing_values, voter_missing_order, axis=1)[missing]
 
-                # Store the generated values for the current ranking
-                value_list[votes].append(values)
-        print(value_list)
-        return value_list
+        return (orders + 1).astype(rank_dtype(m)), values
 
     """
     Assigns values to alternatives based on alternative ranking.
@@ -156,39 +250,28 @@ class ValueGeneration:
     """
 
     def generate_random_values(self, count, distribution, power_param, upper_limit=None) -> List[float]:
-        random_values = []
-
-        if distribution == 'Uniform':
-            random_values = sorted([random.uniform(0, 1) for _ in range(count)], reverse=True)
-        elif distribution == 'Exponential':
-            random_values = sorted(np.random.exponential(size=count), reverse=True)
-        elif distribution == 'Normal':
-            random_values = sorted(np.random.normal(size=count), reverse=True)
-
-        # Draws samples in [0, 1] from a power distribution with positive exponent power_param - 1
-        elif distribution == 'Power':
-            random_values = sorted(np.random.power(power_param, size=count), reverse=True)
-
-        # Draw samples from a Gamma distribution. The power_param is the shape, must be non-negative.
-        elif distribution == 'Gamma':
-            random_values = sorted(np.random.gamma(power_param, size=count), reverse=True)
-
-        # Draw samples from the geometric distribution. The power_param is probability of success of an individual trial.
-        elif distribution == 'Geometric':
-            random_values = sorted(np.random.geometric(p=power_param/10, size=count), reverse=True)
-
-        else:
-            raise ValueError(f"Invalid distribution choice: {distribution}")
-
         if upper_limit is not None:
             # Cap the generated values to the specified upper limit
-            for value in random_values:
-                if value >= upper_limit:
-                    random_values.remove(value)
-                    value = self.generate_random_values(1, distribution,power_param, upper_limit)
-                    random_values.append(value[0])
+            random_values = truncated_sample(distribution, (count,), power_param, upper_limit, self.rng)
+        else:
+            random_values = self.generate_random_matrix((count,), distribution, power_param)
+
+        return sorted(random_values.tolist(), reverse=True)
+
+    """
+    Draws a matrix of random values from a specified distribution with one NumPy call.
+    
+    Parameters:
+    - shape (tuple): The shape of the matrix.
+    - distribution (str): The type of distribution used to generate values.
+    - power_param (float): Power parameter used in some distributions, as in Distributions.sample().
+    
+    Returns:
+    numpy.ndarray: The matrix of random values.
+    """
 
-        return random_values
+    def generate_random_matrix(self, shape, distribution, power_param):
+        return sample(distribution, shape, power_param, self.rng)
 
     """
     Generates a strict ordering for the given voting data.
@@ -225,7 +308,7 @@ class ValueGeneration:
 
         for elem in alt:
             if isinstance(elem, (set, tuple)):
-                shuffled_alternative = random.sample(elem, len(elem))
+                shuffled_alternative = self.rng.permutation(elem).tolist()
                 strict_alt.extend(shuffled_alternative)
             else:
                 strict_alt.append(elem)
@@ -281,73 +364,72 @@ class ValueGeneration:
         original_positions = {alt: i for i, alt in enumerate(updated_alt)}
 
         missing_list = list(missing_alternatives)
-        randomized_missing = random.sample(missing_list, len(missing_list))
+        randomized_missing = self.rng.permutation(missing_list).tolist()
 
         # Update based on the original positions
-        for alt in missing_alternatives:
-            updated_alt[original_positions[alt]] = randomized_missing.pop(0)
+        for alt, randomized_alt in zip(missing_list, randomized_missing):
+            updated_alt[original_positions[alt]] = randomized_alt
 
         return updated_alt
 
     """
-    Normalizes values based on the sum of values for each row.
+    Normalizes every instance with a registered normalization kernel ('unit_sum', 'unit_range', 'unit_l2', 'min_max'
+    or any kernel added with Normalization.register_normalization()), one row-wise reduction per instance.
+    
+    Parameters:
+    - k_list (dict): The instances for each distribution, as returned by generate_k_instances().
+    - method (str): The normalization method.
+    - inplace (bool): Whether the values of the instances are overwritten instead of copied.
     
     Returns:
-    defaultdict: A defaultdict storing normalized values for each ranking.
+    list: A list of {distribution: ValueTensor} storing normalized values for each instance.
     """
 
-    def unit_sum_normalization(self, k_list):
+    def normalize_instances(self, k_list, method, inplace=False):
         normalized_list = []
 
         for distribution, instances_for_distribution in k_list.items():
             for instance in instances_for_distribution:
-                normalized_values = defaultdict(list)
-                for votes, values_list in instance.items():
-                    total_sums = []
-
-                    for values in values_list:
-                        total_sum = sum(value for alt, value in values.items())
-                        total_sums.append(total_sum)
-
-                    # Normalize each value in each row of the current ranking
-                    for values, total_sum in zip(values_list, total_sums):
-                        normalized_values_row = {}
-                        for alt, value in values.items():
-                            # Handle division by 0
-                            normalized_values_row[alt] = value / total_sum if value != 0 else 0
-                        normalized_values[votes].append(normalized_values_row)
-                normalized_list.append({distribution: normalized_values})
+                normalized_values = normalize(instance.values, method, inplace)
+                normalized_list.append({distribution: instance.with_values(normalized_values)})
 
         return normalized_list
 
+    """
+    Normalizes values based on the sum of values for each row. Rows summing to 0 become all 0.
+    
+    Returns:
+    list: A list of {distribution: ValueTensor} storing normalized values for each instance.
+    """
+
+    def unit_sum_normalization(self, k_list, inplace=False):
+        return self.normalize_instances(k_list, 'unit_sum', inplace)
+
     """
     Normalizes values based on the max value (usually is the value of alternative with index 0) for each row.
+    Rows whose max is 0 become all 0.
     
     Returns:
-    defaultdict: A defaultdict storing normalized values for each ranking.
+    list: A list of {distribution: ValueTensor} storing normalized values for each instance.
     """
 
-    def unit_range_normalization(self, k_list):
-        normalized_list = []
+    def unit_range_normalization(self, k_list, inplace=False):
+        return self.normalize_instances(k_list, 'unit_range', inplace)
 
-        for distribution, instances_for_distribution in k_list.items():
-            for instance in instances_for_distribution:
-                normalized_values = defaultdict(list)
-                for votes, values_list in instance.items():
-                    max_values = []
 
-                    # Find the maximum value
-                    for values in values_list:
-                        max_value = max(values.values())
-                        max_values.append(max_value)
+# ValueGeneration object of a pool worker process, set once by _init_worker().
+_worker_generator = None
 
-                    # Normalize each value in each row of the current ranking
-                    for values, max_value in zip(values_list, max_values):
-                        normalized_values_row = {}
-                        for alt, value in values.items():
 
-                            normalized_values_row[alt] = value / max_value if value != 0 else 0
-                        normalized_values[votes].append(normalized_values_row)
-                normalized_list.append({distribution: normalized_values})
+def _init_worker(value_generation):
+    global _worker_generator
+    _worker_generator = value_generation
 
-        return normalized_list
+
+def _init_store_worker(store_path, num_alternatives, dtype):
+    global _worker_generator
+    _worker_generator = ValueGeneration(Profile.open_ballot_store(store_path), num_alternatives, dtype=dtype)
+
+
+def _generate_instance(task):
+    return _worker_generator.generate_instance(*task)
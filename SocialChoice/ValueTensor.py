@@ -0,0 +1,132 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+
+class ValueTensor(Mapping):
+    """
+    Array-backed values of every voter for every alternative.
+    Voters supporting the same ranking ballot are stored in consecutive rows, and the tensor can still be read as the
+    former ranking -> list of {alternative: value} dictionary, one dictionary per voter, built on access.
+    The rankings are kept as an order matrix, their (strict ranking ballot, ballot index) keys are only built when the
+    dictionary view is first used.
+
+    Attributes:
+    - values (numpy.ndarray): A (voters x alternatives) float32/float64 matrix, column a holds the values of alternative a + 1.
+    - ballot_index (numpy.ndarray): A column giving, for each voter (row of values), the index of its ranking in keys_list.
+    - orders (numpy.ndarray): A (rankings x alternatives) matrix, row i lists the alternatives of ranking i from the
+      highest to the lowest, None when the tensor was built from keys.
+    - keys_list (list): The rankings as (strict ranking ballot, ballot index) keys generated by ValueGeneration.
+    - key_position (dict): The position of each ranking in keys_list.
+    - offsets (numpy.ndarray): The first row of each ranking in values, followed by the number of voters.
+
+    Methods:
+    - with_values(values): Returns a tensor with the same voters and rankings but other values.
+    - total_values(): Sums the values of each alternative over all voters.
+    - get_num_alternatives(): Returns the total number of alternatives.
+    - ballot_rows(key): Returns the slice of rows holding the voters of a ranking.
+    """
+
+    def __init__(self, values, ballot_index, keys=None, orders=None):
+        if (keys is None) == (orders is None):
+            raise ValueError("A ValueTensor needs either keys or orders.")
+
+        self.values = values
+        self.ballot_index = ballot_index
+        self.orders = orders
+        self._keys_list = None if keys is None else list(keys)
+        self._key_position = None
+        num_rankings = len(orders) if keys is None else len(self._keys_list)
+
+        # Voters are grouped by ranking, so each ranking owns one contiguous block of rows
+        self.offsets = np.searchsorted(ballot_index, np.arange(num_rankings + 1))
+
+    @property
+    def keys_list(self):
+        if self._keys_list is None:
+            self._keys_list = [(tuple(order), index) for index, order in enumerate(self.orders.tolist())]
+
+        return self._keys_list
+
+    @property
+    def key_position(self):
+        if self._key_position is None:
+            self._key_position = {key: position for position, key in enumerate(self.keys_list)}
+
+        return self._key_position
+
+    """
+    Returns a tensor with the same voters and rankings but other values, e.g. normalized ones.
+
+    Parameters:
+    - values (numpy.ndarray): A matrix of the same shape as values.
+
+    Returns:
+    ValueTensor: The new tensor.
+    """
+
+    def with_values(self, values):
+        tensor = ValueTensor.__new__(ValueTensor)
+        tensor.values = values
+        tensor.ballot_index = self.ballot_index
+        tensor.orders = self.orders
+        tensor._keys_list = self._keys_list
+        tensor._key_position = self._key_position
+        tensor.offsets = self.offsets
+
+        return tensor
+
+    """
+    Sums the values of each alternative over all voters.
+
+    Returns:
+    numpy.ndarray: The total value of each alternative, index a corresponding to alternative a + 1.
+    """
+
+    def total_values(self):
+        return self.values.sum(axis=0, dtype=np.float64)
+
+    """
+    Returns the total number of alternatives.
+
+    Returns:
+    int: The total number of alternatives.
+    """
+
+    def get_num_alternatives(self):
+        return self.values.shape[1]
+
+    """
+    Returns the slice of rows holding the voters of a ranking.
+
+    Parameters:
+    - key: A ranking of keys_list.
+
+    Returns:
+    slice: The rows of values belonging to the ranking.
+    """
+
+    def ballot_rows(self, key):
+        position = self.key_position[key]
+
+        return slice(int(self.offsets[position]), int(self.offsets[position + 1]))
+
+    """
+    Returns the values of the voters of a ranking as a list of {alternative: value} dictionaries, the alternatives
+    following the order of the ranking ballot.
+    """
+
+    def __getitem__(self, key):
+        alt = key[0]
+        columns = np.asarray(alt, dtype=np.int64) - 1
+
+        return [dict(zip(alt, row)) for row in self.values[self.ballot_rows(key), columns].tolist()]
+
+    def __iter__(self):
+        return iter(self.keys_list)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __repr__(self):
+        return repr(dict(self.items()))
@@ -1,4 +1,8 @@
-import random
+import numpy as np
+
+from SocialChoice.EliminationTally import EliminationTally
+from SocialChoice.Profile import Profile
+from SocialChoice.WinnerSelection import select_winners, tie_lottery, tied_winners
 
 
 class VotingRules:
@@ -6,59 +10,140 @@ class VotingRules:
     Implements various voting rules for determining winners in a multi-candidate election.
 
     Attributes:
-    - data_dict (dict): A dictionary containing ranking and corresponding counts(number of votes).
+    - data_dict (dict/Profile): A dictionary containing ranking and corresponding counts(number of votes), or a Profile
+      (e.g. one backed by a memory-mapped ballot store) which is then used directly.
     - num_candidates (int): The total number of candidates in the election.
+    - profile (Profile): The compact rank matrix and counts vector built once from data_dict, shared by all rules.
 
     Methods:
     - winner_single(scores): Output a single winner candidate by highest scores.
-    - winner_randomized(scores): Output a single winner by randomized selection with weight(different probabilities for each alternative).
+    - winner_randomized(scores, seed): Output a single winner by randomized selection with weight(different probabilities for each alternative).
+    - winners_tied(scores): Returns every candidate with the highest score.
+    - winner_tie_break(scores, tie_breaking, seed): Output a single winner, breaking ties with a chosen rule.
+    - winner_many(score_tensor, tie_breaking, seed): Output the winners of a whole score tensor in one call.
     - winner_probability(scores): Calculates the probability for each candidate based on their scores.
     - scoring_rule(weights): Computes the scores for each candidate by a user input weight vector.
+    - score_many(weight_matrix): Computes the scores for each candidate under many weight vectors in one batched pass.
     - plurality_rule(): Applies the scoring_rule to determine the winner with weight vector [1,0,0,...0].
     - borda_rule(): Applies the scoring_rule to determine the winner with weight vector [m-1,m-2,m-3,...0].
     - harmonic_rule(): Applies the scoring_rule to determine the winner with weight vector [1,1/2,1/3,...1/m].
     - k_approval_rule(k): Applies the scoring_rule to determine the winner with weight vector [1,1,1,...0]. assign '1' to k number of candidates.
     - veto_rule():Applies the scoring_rule to determine the winner with weight vector [1,1,1,...1,0].
+    - pairwise_matrix(): Returns the pairwise majority matrix of the profile, shared by the pairwise rules.
+    - copeland_rule(): Scores each candidate by its pairwise wins, ties counting half.
+    - maximin_rule(): Scores each candidate by its worst pairwise support.
+    - ranked_pairs_rule(): Locks in pairwise victories from the largest margin down, without creating cycles.
+    - schulze_rule(): Scores each candidate by the candidates it beats through strongest paths.
+    - kemeny_rule(): Approximates the Kemeny ranking by a Borda order improved with adjacent swaps.
+    - irv_rule(): Instant-runoff voting (single-winner STV), eliminating the candidate with the fewest first places.
+    - coombs_rule(): Eliminates the candidate with the most last places until one has a majority of first places.
+    - baldwin_rule(): Eliminates the candidate with the lowest Borda score among the remaining candidates.
+    - nanson_rule(): Eliminates every candidate with a below-average Borda score among the remaining candidates.
+    - first_place_shares(): Computes the (tie-split) number of first places of each candidate.
+    - random_dictatorship_rule(): Returns the lottery picking the top choice of a uniformly random voter.
+    - squared_plurality_rule(): Returns the lottery proportional to the squared plurality scores.
+    - maximal_lottery_rule(): Returns the maximal lottery of the pairwise majority margins.
+    - scores_dict(scores): Converts a score vector into a candidate -> score dictionary.
     """
 
     def __init__(self, data_dict, num_candidates):
         self.data_dict = data_dict
         self.num_candidates = num_candidates
+        self.profile = data_dict if isinstance(data_dict, Profile) else Profile.from_votes_dict(data_dict, num_candidates)
 
     """
-    Determines a single winner candidate by highest scores.
+    Determines a single winner candidate by highest scores. Tied candidates are broken lexicographically (the lowest
+    numbered candidate wins) through WinnerSelection.select_winners, whatever the order of the dictionary.
     
     Parameters:
     - scores (dict): A dictionary containing the total scores of each candidate.
     
     Returns:
-    str: The candidate who is the winner.
+    int: The candidate who is the winner.
     """
 
     def winner_determinstic(self, scores):
-
-        winner_candidate = max(scores, key=scores.get)
-        winner_score = scores[winner_candidate]
-
-        return winner_candidate
+        return self.winner_tie_break(scores, 'lexicographic')
 
     """
     Determines a single winner by randomized selection with weight vector.
+    The candidates and weights are read as arrays and drawn from with one NumPy call.
 
     Parameters:
     - scores (dict): A dictionary containing the total scores of each candidate.
+    - seed: Seed of the numpy.random.Generator drawing the winner.
 
     Returns:
     str: The randomly selected winner.
     """
 
-    def winner_randomized(self, scores):
-        probabilities = self.winner_probability(scores)
+    def winner_randomized(self, scores, seed=None):
+        candidates = np.fromiter(scores.keys(), dtype=np.int64, count=len(scores))
+        weights = np.fromiter(scores.values(), dtype=float, count=len(scores))
 
         # Randomly select a winner by applied probabilities weight vector.
-        winner_candidate = random.choices(list(probabilities.keys()), weights=list(probabilities.values()))[0]
+        winner_candidate = np.random.default_rng(seed).choice(candidates, p=weights / weights.sum())
+
+        return int(winner_candidate)
+
+    """
+    Returns every candidate with the highest score, instead of the one chosen by winner_determinstic().
+
+    Parameters:
+    - scores (dict): A dictionary containing the total scores of each candidate.
+
+    Returns:
+    list: The tied winner candidates.
+    """
+
+    def winners_tied(self, scores):
+        candidates = np.fromiter(scores.keys(), dtype=np.int64, count=len(scores))
+        values = np.fromiter(scores.values(), dtype=float, count=len(scores))
 
-        return winner_candidate
+        return candidates[tied_winners(values)].tolist()
+
+    """
+    Determines a single winner by highest scores, breaking ties with a registered tie-breaking rule
+    ('lexicographic', 'random'), or returns the uniform lottery over the tied winners ('lottery').
+
+    Parameters:
+    - scores (dict): A dictionary containing the total scores of each candidate.
+    - tie_breaking (str): The tie-breaking rule, a key of WinnerSelection.TIE_BREAKERS or 'lottery'.
+    - seed: Seed of the numpy.random.Generator used by random tie-breaking.
+
+    Returns:
+    int/dict: The winner candidate, or the probability of each tied winner for 'lottery'.
+    """
+
+    def winner_tie_break(self, scores, tie_breaking='lexicographic', seed=None):
+        if tie_breaking == 'lottery':
+            tied = self.winners_tied(scores)
+            return {candidate: 1 / len(tied) for candidate in tied}
+
+        candidates = np.fromiter(scores.keys(), dtype=np.int64, count=len(scores))
+        values = np.fromiter(scores.values(), dtype=float, count=len(scores))
+        # Candidates in increasing order, so the lexicographic breaker picks the lowest numbered one
+        order = np.argsort(candidates, kind='stable')
+
+        return int(candidates[order][select_winners(values[order], tie_breaking, seed) - 1])
+
+    """
+    Determines the winners of a whole score tensor in one call, e.g. the (instances x rules x m) scores of a sweep.
+
+    Parameters:
+    - score_tensor (numpy.ndarray): A (... x m) score tensor, entry [..., c] being the score of candidate c + 1.
+    - tie_breaking (str): The tie-breaking rule, a key of WinnerSelection.TIE_BREAKERS or 'lottery'.
+    - seed: Seed of the numpy.random.Generator used by random tie-breaking.
+
+    Returns:
+    numpy.ndarray: The (...) tensor of winner candidates, or the (... x m) tensor of tie lotteries for 'lottery'.
+    """
+
+    def winner_many(self, score_tensor, tie_breaking='lexicographic', seed=None):
+        if tie_breaking == 'lottery':
+            return tie_lottery(score_tensor)
+
+        return select_winners(score_tensor, tie_breaking, seed)
 
     """
     Calculates the probability for each candidate based on their scores.
@@ -89,13 +174,21 @@ class VotingRules:
     """
 
     def scoring_rule(self, weights):
-        scores = {}
+        return self.scores_dict(self.profile.scores(weights))
 
-        for votes, count in self.get_data().items():
-            for index, candidate in enumerate(votes):
-                scores[candidate] = scores.get(candidate, 0) + (weights[index] * count)
+    """
+    Computes the scores for each candidate under many weight vectors in one batched pass over the
+    position-count matrix of the profile, e.g. every k of k_approval_rule or a family of custom scoring vectors.
+
+    Parameters:
+    - weight_matrix (list): A list of weight vectors (or a 2-D array), one row per scoring rule.
+
+    Returns:
+    numpy.ndarray: A (n_rules x m) score table, column index c corresponding to candidate c + 1.
+    """
 
-        return scores
+    def score_many(self, weight_matrix):
+        return self.profile.scores_many(weight_matrix)
 
     """
     Applies the scoring_rule to determine the winner with weight vector [1,0,0,...0].
@@ -166,6 +259,314 @@ class VotingRules:
 
         return veto_points
 
+    """
+    Returns the pairwise majority matrix of the profile, built once and shared by every pairwise rule.
+
+    Returns:
+    numpy.ndarray: entry [a, b] is the number of voters preferring candidate a + 1 to candidate b + 1.
+    """
+
+    def pairwise_matrix(self):
+        return self.profile.pairwise_counts()
+
+    """
+    Applies the Copeland rule: each candidate scores 1 for each candidate it beats by pairwise majority and 1/2 for
+    each pairwise tie.
+
+    Returns:
+    dict: A dictionary containing the total scores of each candidate.
+    """
+
+    def copeland_rule(self):
+        margins = self.profile.margins()
+        ties = (margins == 0).sum(axis=1) - 1
+        copeland_points = (margins > 0).sum(axis=1) + 0.5 * ties
+
+        return self.scores_dict(copeland_points)
+
+    """
+    Applies the Maximin rule: each candidate scores the smallest number of voters preferring it to another candidate.
+
+    Returns:
+    dict: A dictionary containing the total scores of each candidate.
+    """
+
+    def maximin_rule(self):
+        pairwise = self.pairwise_matrix()
+        others = ~np.eye(self.get_num_alternatives(), dtype=bool)
+        maximin_points = np.where(others, pairwise, np.iinfo(np.int64).max).min(axis=1)
+
+        return self.scores_dict(np.where(others.any(axis=1), maximin_points, 0))
+
+    """
+    Applies the Ranked Pairs rule: pairwise victories are locked in from the largest margin down, skipping any that
+    would create a cycle with the ones already locked. Equal margins are taken in candidate order.
+    Each candidate scores the number of candidates below it in the locked ranking.
+
+    Returns:
+    dict: A dictionary containing the total scores of each candidate.
+    """
+
+    def ranked_pairs_rule(self):
+        m = self.get_num_alternatives()
+        margins = self.profile.margins()
+        winners, losers = np.nonzero(margins > 0)
+        order = np.argsort(-margins[winners, losers], kind='stable')
+
+        # reach[a, b]: a is above b through the locked victories (transitive closure, updated with each lock)
+        reach = np.zeros((m, m), dtype=bool)
+        for winner, loser in zip(winners[order].tolist(), losers[order].tolist()):
+            # Skip victories creating a cycle, or already implied by the locked ones
+            if reach[loser, winner] or reach[winner, loser]:
+                continue
+            above = np.flatnonzero(reach[:, winner])
+            below = reach[loser].copy()
+            below[loser] = True
+            reach[above] |= below
+            reach[winner] |= below
+
+        return self.scores_dict(reach.sum(axis=1))
+
+    """
+    Applies the Schulze rule: the strength of a path is its weakest pairwise victory, and each candidate scores the
+    number of candidates it beats through a stronger strongest path than theirs. The strongest paths are computed
+    with a Floyd-Warshall pass vectorized over all pairs for each intermediate candidate.
+
+    Returns:
+    dict: A dictionary containing the total scores of each candidate.
+    """
+
+    def schulze_rule(self):
+        pairwise = self.pairwise_matrix()
+        strength = np.where(pairwise > pairwise.T, pairwise, 0)
+
+        for k in range(self.get_num_alternatives()):
+            np.maximum(strength, np.minimum(strength[:, k:k + 1], strength[k:k + 1, :]), out=strength)
+
+        return self.scores_dict((strength > strength.T).sum(axis=1))
+
+    """
+    Approximates the Kemeny rule, the ranking agreeing with the most pairwise preferences of the voters. The ranking
+    starts from the Borda order (candidates sorted by the row sums of the pairwise matrix) and adjacent candidates are swapped
+    while the majority prefers the lower one (local Kemenization).
+    Each candidate scores the number of candidates below it in the ranking.
+
+    Returns:
+    dict: A dictionary containing the total scores of each candidate.
+    """
+
+    def kemeny_rule(self):
+        m = self.get_num_alternatives()
+        pairwise = self.pairwise_matrix()
+        ranking = np.argsort(-pairwise.sum(axis=1), kind='stable').tolist()
+
+        swapped = True
+        while swapped:
+            swapped = False
+            for i in range(m - 1):
+                upper, lower = ranking[i], ranking[i + 1]
+                if pairwise[lower, upper] > pairwise[upper, lower]:
+                    ranking[i], ranking[i + 1] = lower, upper
+                    swapped = True
+
+        kemeny_points = np.empty(m, dtype=np.int64)
+        kemeny_points[ranking] = np.arange(m - 1, -1, -1)
+
+        return self.scores_dict(kemeny_points)
+
+    """
+    Applies instant-runoff voting (single-winner STV): the candidate counted first by the fewest voters is eliminated
+    and its ballots transfer to their next remaining preference, until one candidate is left. Tied candidates share
+    the count of a ballot, ballots with no remaining ranked candidate are exhausted. Tallies are updated
+    incrementally (see EliminationTally), so a round only advances the ballots of the eliminated candidate.
+    Each candidate scores the number of candidates eliminated before it; equal tallies eliminate the lowest candidate.
+
+    Returns:
+    dict: A dictionary containing the total scores of each candidate.
+    """
+
+    def irv_rule(self):
+        top = EliminationTally(self.profile)
+        irv_points = np.zeros(self.get_num_alternatives(), dtype=np.int64)
+
+        for round_number in range(self.get_num_alternatives()):
+            loser = top.lowest()
+            irv_points[loser] = round_number
+            top.eliminate(loser)
+
+        return self.scores_dict(irv_points)
+
+    """
+    Applies the Coombs rule: while no candidate is counted first by a majority of the voters, the candidate counted
+    last by the most voters is eliminated. Alternatives missing from a ballot are tied last on it.
+    The first and last places are both kept by incremental tallies (see EliminationTally).
+    Each candidate scores the number of candidates eliminated before it, the majority winner scores m - 1.
+
+    Returns:
+    dict: A dictionary containing the total scores of each candidate.
+    """
+
+    def coombs_rule(self):
+        m = self.get_num_alternatives()
+        top = EliminationTally(self.profile, include_unranked=True)
+        bottom = EliminationTally(self.profile, from_bottom=True, include_unranked=True)
+        coombs_points = np.zeros(m, dtype=np.int64)
+        majority = self.profile.get_num_voters() / 2
+
+        for round_number in range(m):
+            remaining = np.flatnonzero(~top.eliminated)
+            leader = top.highest()
+            if top.tally[leader] > majority + top.tolerance or len(remaining) == 1:
+                coombs_points[remaining] = round_number
+                coombs_points[leader] = m - 1
+                break
+            loser = bottom.highest()
+            coombs_points[loser] = round_number
+            top.eliminate(loser)
+            bottom.eliminate(loser)
+
+        return self.scores_dict(coombs_points)
+
+    """
+    Applies the Baldwin rule: the candidate with the lowest Borda score among the remaining candidates is eliminated,
+    until one is left. The Borda score of a candidate among the remaining ones is its row sum of the pairwise
+    matrix over them, so eliminating c only subtracts the column N[:, c] instead of rescoring the profile.
+    Each candidate scores the number of candidates eliminated before it; equal scores eliminate the lowest candidate.
+
+    Returns:
+    dict: A dictionary containing the total scores of each candidate.
+    """
+
+    def baldwin_rule(self):
+        m = self.get_num_alternatives()
+        pairwise = self.pairwise_matrix()
+        borda = pairwise.sum(axis=1).astype(float)
+        baldwin_points = np.zeros(m, dtype=np.int64)
+
+        for round_number in range(m):
+            loser = int(np.argmin(borda))
+            baldwin_points[loser] = round_number
+            borda -= pairwise[:, loser]
+            borda[loser] = np.inf
+
+        return self.scores_dict(baldwin_points)
+
+    """
+    Applies the Nanson rule: every candidate whose Borda score among the remaining candidates is below their average
+    is eliminated at once, until the remaining candidates all have the same score. Borda scores are updated with the
+    pairwise matrix columns of the eliminated candidates, as in baldwin_rule().
+    Each candidate scores the number of candidates eliminated before it, the remaining candidates score m - 1.
+
+    Returns:
+    dict: A dictionary containing the total scores of each candidate.
+    """
+
+    def nanson_rule(self):
+        m = self.get_num_alternatives()
+        pairwise = self.pairwise_matrix()
+        borda = pairwise.sum(axis=1).astype(float)
+        remaining = np.ones(m, dtype=bool)
+        nanson_points = np.full(m, m - 1, dtype=np.int64)
+        num_eliminated = 0
+
+        while remaining.any():
+            losers = remaining & (borda < borda[remaining].mean())
+            if not losers.any():
+                break
+            nanson_points[losers] = num_eliminated
+            num_eliminated += int(losers.sum())
+            remaining &= ~losers
+            borda -= pairwise[:, losers].sum(axis=1)
+
+        return self.scores_dict(nanson_points)
+
+    """
+    Computes the share of the voters counting each candidate first, in one pass over the profile.
+    A voter with several candidates tied first splits its vote equally among them.
+
+    Returns:
+    numpy.ndarray: The (fractional) number of first places of each candidate.
+    """
+
+    def first_place_shares(self):
+        shares = np.zeros(self.get_num_alternatives())
+
+        for ranks, counts in self.profile.iter_chunks():
+            first = ranks == 0
+            sizes = first.sum(axis=1)
+            weights = np.divide(counts, sizes, out=np.zeros(len(counts)), where=sizes > 0)
+            shares += weights @ first
+
+        return shares
+
+    """
+    Applies random dictatorship: a uniformly random voter picks the winner, its top choice (uniformly among tied
+    top choices). The lottery is exact, so its expected distortion needs no sampled winners.
+
+    Returns:
+    dict: A dictionary containing the probability of each candidate's winning chance.
+    """
+
+    def random_dictatorship_rule(self):
+        shares = self.first_place_shares()
+
+        return self.scores_dict(shares / shares.sum())
+
+    """
+    Applies the proportional-to-squared-plurality rule: each candidate wins with probability proportional to the
+    square of its number of first places (tied first places counting as in random_dictatorship_rule()).
+
+    Returns:
+    dict: A dictionary containing the probability of each candidate's winning chance.
+    """
+
+    def squared_plurality_rule(self):
+        squares = self.first_place_shares() ** 2
+
+        return self.scores_dict(squares / squares.sum())
+
+    """
+    Applies the maximal lottery rule: the lottery p which no candidate beats in expectation on the pairwise majority
+    margins M, i.e. sum_a p[a] M[a, b] >= 0 for every candidate b. It is the optimal strategy of the symmetric
+    zero-sum game M, found with one linear program (HiGHS through SciPy, which is only needed by this rule).
+
+    Returns:
+    dict: A dictionary containing the probability of each candidate's winning chance.
+    """
+
+    def maximal_lottery_rule(self):
+        from scipy.optimize import linprog
+
+        m = self.get_num_alternatives()
+        margins = self.profile.margins().astype(float)
+
+        # Variables (p, v): maximize v subject to M^T p >= v, sum(p) = 1, p >= 0
+        objective = np.zeros(m + 1)
+        objective[m] = -1
+        a_ub = np.hstack([-margins.T, np.ones((m, 1))])
+        a_eq = np.append(np.ones(m), 0)[None, :]
+        bounds = [(0, None)] * m + [(None, None)]
+        result = linprog(objective, A_ub=a_ub, b_ub=np.zeros(m), A_eq=a_eq, b_eq=[1], bounds=bounds, method='highs')
+        if result.status != 0:
+            raise RuntimeError(f"Maximal lottery LP failed: {result.message}")
+
+        lottery = np.clip(result.x[:m], 0, None)
+
+        return self.scores_dict(lottery / lottery.sum())
+
+    """
+    Converts a score vector into the score dictionary returned by every rule.
+
+    Parameters:
+    - scores (numpy.ndarray): The scores, index c corresponding to candidate c + 1.
+
+    Returns:
+    dict: A dictionary containing the total scores of each candidate.
+    """
+
+    def scores_dict(self, scores):
+        return {candidate + 1: score for candidate, score in enumerate(np.asarray(scores).tolist())}
+
     """
     Returns the total number of alternatives.
 
@@ -184,4 +585,42 @@ class VotingRules:
     """
 
     def get_data(self):
-        return self.data_dict
\ No newline at end of file
+        return self.data_dict
+
+
+# Registry of voting rules by name, mapping a rule name to rule(voting_rules, *args) returning a score dictionary.
+# The names follow the rule choices of the Web app, so batch experiments can refer to rules the same way.
+RULES = {}
+
+
+"""
+Registers a voting rule, so it can be selected by name (e.g. by ExperimentRunner) without editing the caller.
+
+Parameters:
+- name (str): The voting rule name.
+- rule (callable): rule(voting_rules, *args) returning a dictionary containing the scores of each candidate.
+"""
+
+
+def register_rule(name, rule):
+    RULES[name] = rule
+
+
+register_rule('plurality_rule', VotingRules.plurality_rule)
+register_rule('borda_rule', VotingRules.borda_rule)
+register_rule('harmonic_rule', VotingRules.harmonic_rule)
+register_rule('k_approval_rule', VotingRules.k_approval_rule)
+register_rule('veto_rule', VotingRules.veto_rule)
+register_rule('scoring_rule', VotingRules.scoring_rule)
+register_rule('copeland_rule', VotingRules.copeland_rule)
+register_rule('maximin_rule', VotingRules.maximin_rule)
+register_rule('ranked_pairs_rule', VotingRules.ranked_pairs_rule)
+register_rule('schulze_rule', VotingRules.schulze_rule)
+register_rule('kemeny_rule', VotingRules.kemeny_rule)
+register_rule('irv_rule', VotingRules.irv_rule)
+register_rule('coombs_rule', VotingRules.coombs_rule)
+register_rule('baldwin_rule', VotingRules.baldwin_rule)
+register_rule('nanson_rule', VotingRules.nanson_rule)
+register_rule('random_dictatorship_rule', VotingRules.random_dictatorship_rule)
+register_rule('squared_plurality_rule', VotingRules.squared_plurality_rule)
+register_rule('maximal_lottery_rule', VotingRules.maximal_lottery_rule)
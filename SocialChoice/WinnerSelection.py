@@ -0,0 +1,97 @@
+import numpy as np
+
+# Registry of tie-breaking rules, mapping a name to breaker(tied, rng) choosing one column among the True entries of
+# each row of a boolean (... x m) tie mask.
+TIE_BREAKERS = {}
+
+
+"""
+Registers a tie-breaking rule.
+
+Parameters:
+- name (str): The tie-breaking rule name.
+- breaker (callable): breaker(tied, rng) returning the index of the chosen alternative for each row of tied.
+"""
+
+
+def register_tie_breaker(name, breaker):
+    TIE_BREAKERS[name] = breaker
+
+
+"""
+Finds every alternative with the highest score, for each score vector of a tensor at once.
+
+Parameters:
+- scores (numpy.ndarray): A (... x m) score tensor, e.g. (instances x rules x m), the last axis indexing alternatives.
+- tolerance (float): Scores within tolerance of the highest one count as tied (e.g. for float rounding).
+
+Returns:
+numpy.ndarray: A boolean (... x m) mask of the tied winners.
+"""
+
+
+def tied_winners(scores, tolerance=0):
+    scores = np.asarray(scores, dtype=float)
+
+    return scores >= scores.max(axis=-1, keepdims=True) - tolerance
+
+
+"""
+Selects one winner for each score vector of a tensor at once, breaking ties with a registered rule.
+
+Parameters:
+- scores (numpy.ndarray): A (... x m) score tensor, the last axis indexing alternatives.
+- tie_breaking (str): The tie-breaking rule, a key of TIE_BREAKERS ('lexicographic' or 'random').
+- seed: Seed of the numpy.random.Generator used by random tie-breaking.
+- tolerance (float): Scores within tolerance of the highest one count as tied.
+
+Returns:
+numpy.ndarray: The (...) tensor of winner alternatives, numbered from 1.
+"""
+
+
+def select_winners(scores, tie_breaking='lexicographic', seed=None, tolerance=0):
+    if tie_breaking not in TIE_BREAKERS:
+        raise ValueError(f"Invalid tie-breaking rule: {tie_breaking}")
+
+    return TIE_BREAKERS[tie_breaking](tied_winners(scores, tolerance), np.random.default_rng(seed)) + 1
+
+
+"""
+Computes the uniform lottery over the tied winners, for each score vector of a tensor at once.
+
+Parameters:
+- scores (numpy.ndarray): A (... x m) score tensor, the last axis indexing alternatives.
+- tolerance (float): Scores within tolerance of the highest one count as tied.
+
+Returns:
+numpy.ndarray: A (... x m) tensor of winning probabilities.
+"""
+
+
+def tie_lottery(scores, tolerance=0):
+    tied = tied_winners(scores, tolerance)
+
+    return tied / tied.sum(axis=-1, keepdims=True)
+
+
+"""
+Breaks ties in favour of the lowest numbered alternative.
+"""
+
+
+def lexicographic_breaker(tied, rng):
+    return np.argmax(tied, axis=-1)
+
+
+"""
+Breaks ties uniformly at random: each tied alternative gets a random key and the largest key wins.
+"""
+
+
+def random_breaker(tied, rng):
+    return np.argmax(np.where(tied, rng.random(tied.shape), -1), axis=-1)
+
+
+register_tie_breaker('lexicographic', lexicographic_breaker)
+register_tie_breaker('random', random_breaker)
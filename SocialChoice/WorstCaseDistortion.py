@@ -0,0 +1,283 @@
+import numpy as np
+
+from SocialChoice.Profile import Profile
+
+
+class WorstCaseDistortion:
+    """
+    Computes the worst-case distortion of a winner (or winner probability list) over all unit-sum utility profiles
+    consistent with the ranking ballots, instead of measuring it against sampled utilities.
+
+    For a candidate a, the largest ratio SW(a) / SW(winner) is a linear-fractional program over the utilities of
+    each ballot, solved as a linear program after the Charnes-Cooper transform (each ballot's utilities sum to the
+    same scale t and SW(winner) = 1). The worst-case distortion is the largest ratio over all candidates.
+    Voters with the same ballot can share their utilities, so the program has one block per unique ballot:
+    - a ballot ranking every alternative (ties allowed) is described by the vertices of its utility set, the
+      uniform utilities over each prefix of its tie groups. Only the prefixes where a or the winner enter or
+      leave the prefix are kept, which leaves a handful of variables per ballot.
+    - a ballot with unranked alternatives keeps one utility variable per alternative, with the ranking order,
+      ties and "unranked below the last ranked group" as constraints.
+
+    Attributes:
+    - data_dict (dict/Profile): A dictionary containing ranking and corresponding counts, or a Profile.
+    - num_alternatives (int): The total number of alternatives.
+    - profile (Profile): The compact rank matrix and counts of data_dict.
+    - prefix_sizes (numpy.ndarray): prefix_sizes[b, k] is the number of alternatives in the first k tie groups of ballot b.
+    - num_groups (numpy.ndarray): The number of tie groups of each ballot.
+    - complete (numpy.ndarray): Whether each ballot ranks every alternative.
+
+    Methods:
+    - winner_mass(winner): Converts a winner or winner probability list into a probability vector.
+    - candidate_distortion(candidate, winner): Computes the worst-case ratio SW(candidate) / SW(winner).
+    - candidate_distortions(winner): Computes the worst-case ratio of every candidate.
+    - distortion(winner): Computes the worst-case distortion of the winner.
+    """
+
+    def __init__(self, data_dict, num_alternatives):
+        self.data_dict = data_dict
+        self.num_alternatives = num_alternatives
+        self.profile = data_dict if isinstance(data_dict, Profile) else Profile.from_votes_dict(data_dict, num_alternatives)
+
+        ranks = np.asarray(self.profile.ranks, dtype=np.int64)
+        num_ballots, m = ranks.shape
+        ranked = ranks >= 0
+
+        # group_sizes[b, r] is the number of alternatives in tie group r of ballot b
+        flat_index = (np.arange(num_ballots)[:, None] * m + ranks)[ranked]
+        group_sizes = np.bincount(flat_index, minlength=num_ballots * m).reshape(num_ballots, m)
+        self.prefix_sizes = np.concatenate([np.zeros((num_ballots, 1), dtype=np.int64), group_sizes.cumsum(axis=1)], axis=1)
+        self.num_groups = ranks.max(axis=1, initial=-1) + 1
+        self.complete = ranked.all(axis=1)
+        self.ranks = ranks
+
+        self._build_partial_constraints()
+
+    """
+    Builds the constraint rows of the ballots with unranked alternatives once, as they do not depend on the candidate.
+    Each of these ballots owns m utility variables, numbered after the vertex variables of the complete ballots.
+    """
+
+    def _build_partial_constraints(self):
+        m = self.num_alternatives
+        self.partial_ballots = np.flatnonzero(~self.complete)
+        eq_rows, ub_rows = [], []
+
+        for block, ballot in enumerate(self.partial_ballots):
+            offset = block * m
+            row = self.ranks[ballot]
+            firsts = []
+            for group in range(self.num_groups[ballot]):
+                members = np.flatnonzero(row == group)
+                firsts.append(members[0])
+                # Tied alternatives have the same utility
+                for member in members[1:]:
+                    eq_rows.append(((offset + member, 1.0), (offset + members[0], -1.0)))
+            # Each tie group is worth at most the group above it, unranked alternatives at most the last group
+            for upper, lower in zip(firsts, firsts[1:]):
+                ub_rows.append(((offset + lower, 1.0), (offset + upper, -1.0)))
+            if firsts:
+                for missing in np.flatnonzero(row < 0):
+                    ub_rows.append(((offset + missing, 1.0), (offset + firsts[-1], -1.0)))
+
+        self.partial_eq_rows = eq_rows
+        self.partial_ub_rows = ub_rows
+
+    """
+    Converts a winner or winner probability list into a probability vector over the alternatives.
+
+    Parameters:
+    - winner(int/dict): The winner alternative / the winner alternative probability list.
+
+    Returns:
+    numpy.ndarray: The probability of each alternative, index a corresponding to alternative a + 1.
+    """
+
+    def winner_mass(self, winner):
+        mass = np.zeros(self.num_alternatives)
+
+        if isinstance(winner, dict):
+            for alternative, probability in winner.items():
+                mass[alternative - 1] += probability
+            mass /= mass.sum()
+        else:
+            mass[int(winner) - 1] = 1.0
+
+        return mass
+
+    """
+    Computes the worst-case ratio SW(candidate) / SW(winner) over all unit-sum utilities consistent with the ballots.
+
+    Parameters:
+    - candidate (int): The candidate alternative compared with the winner.
+    - winner(int/dict): The winner alternative / the winner alternative probability list.
+
+    Returns:
+    float: The worst-case ratio, inf if the winner can get no welfare while the candidate gets some.
+    """
+
+    def candidate_distortion(self, candidate, winner):
+        return self._solve(candidate - 1, self.winner_mass(winner))
+
+    """
+    Computes the worst-case ratio SW(candidate) / SW(winner) of every candidate.
+
+    Parameters:
+    - winner(int/dict): The winner alternative / the winner alternative probability list.
+
+    Returns:
+    dict: A dictionary containing the worst-case ratio of each candidate.
+    """
+
+    def candidate_distortions(self, winner):
+        mass = self.winner_mass(winner)
+
+        return {candidate + 1: self._solve(candidate, mass) for candidate in range(self.num_alternatives)}
+
+    """
+    Computes the worst-case distortion of the winner: the largest worst-case ratio over all candidates.
+    Candidates are tried in decreasing Borda score, the search stops as soon as the distortion is unbounded. When
+    every ballot is complete, the largest ratio found so far is reused as a bound, and candidates that cannot exceed
+    it are skipped without solving their linear program.
+
+    Parameters:
+    - winner(int/dict): The winner alternative / the winner alternative probability list.
+
+    Returns:
+    float: The worst-case distortion.
+    """
+
+    def distortion(self, winner):
+        mass = self.winner_mass(winner)
+        borda = self.profile.scores(np.arange(self.num_alternatives - 1, -1, -1))
+        worst = 1.0
+
+        for candidate in np.argsort(-borda, kind='stable').tolist():
+            if mass[candidate] == 1.0:
+                continue
+            if not len(self.partial_ballots) and not self._may_exceed(candidate, mass, worst):
+                continue
+            worst = max(worst, self._solve(candidate, mass))
+            if np.isinf(worst):
+                break
+
+        return worst
+
+    """
+    Describes the complete ballots by the vertices of their utility sets, for one candidate (column index) against a
+    winner probability vector: the uniform utilities over each prefix of k tie groups. Only the prefixes k = 1..K
+    that start or end a run of identical (candidate, winner) membership are kept.
+
+    Returns:
+    tuple: The ballot (row of the complete ballots) of each vertex, and its count-weighted welfare for the candidate
+    and for the winner.
+    """
+
+    def _vertices(self, candidate, mass):
+        m = self.num_alternatives
+        complete = np.flatnonzero(self.complete)
+        counts = np.asarray(self.profile.counts, dtype=float)[complete]
+        ranks = self.ranks[complete]
+        prefix_sizes = self.prefix_sizes[complete]
+        num_groups = self.num_groups[complete]
+        rows = np.arange(len(complete))
+
+        # Share of the candidate / winner in each tie group, then in each prefix of k groups
+        candidate_groups = np.zeros((len(complete), m))
+        candidate_groups[rows, ranks[:, candidate]] = 1.0
+        winner_groups = np.zeros((len(complete), m))
+        support = np.flatnonzero(mass)
+        np.add.at(winner_groups, (np.repeat(rows, len(support)), ranks[:, support].ravel()),
+                  np.tile(mass[support], len(complete)))
+        candidate_prefix = np.concatenate([np.zeros((len(complete), 1)), candidate_groups.cumsum(axis=1)], axis=1)
+        winner_prefix = np.concatenate([np.zeros((len(complete), 1)), winner_groups.cumsum(axis=1)], axis=1)
+
+        k = np.arange(1, m + 1)
+        interest = (candidate_groups > 0) | (winner_groups > 0)
+        starts = interest[:, :m]
+        ends = np.concatenate([interest[:, 1:], np.zeros((len(complete), 1), dtype=bool)], axis=1)
+        keep = (k <= num_groups[:, None]) & ((k == 1) | (k == num_groups[:, None]) | starts | ends)
+        vertex_ballot, vertex_k = np.nonzero(keep)
+        vertex_k = vertex_k + 1
+        sizes = prefix_sizes[vertex_ballot, vertex_k]
+
+        return (vertex_ballot, counts[vertex_ballot] * candidate_prefix[vertex_ballot, vertex_k] / sizes,
+                counts[vertex_ballot] * winner_prefix[vertex_ballot, vertex_k] / sizes)
+
+    """
+    Checks whether a candidate can exceed a known ratio, without solving its linear program. Only valid when every
+    ballot is complete: the ratio exceeds bound iff some choice of one vertex per ballot has
+    SW(candidate) - bound * SW(winner) > 0, i.e. iff the sum over ballots of the best vertex gain is positive.
+
+    Returns:
+    bool: Whether the worst-case ratio of the candidate may exceed bound.
+    """
+
+    def _may_exceed(self, candidate, mass, bound):
+        vertex_ballot, vertex_objective, vertex_welfare = self._vertices(candidate, mass)
+        best_gain = np.full(int(self.complete.sum()), -np.inf)
+        np.maximum.at(best_gain, vertex_ballot, vertex_objective - bound * vertex_welfare)
+
+        return best_gain.sum() > 1e-9 * max(bound, 1.0)
+
+    """
+    Solves the linear program of one candidate (column index) against a winner probability vector.
+    """
+
+    def _solve(self, candidate, mass):
+        # SciPy is only needed to solve the linear programs
+        from scipy import sparse
+        from scipy.optimize import linprog
+
+        m = self.num_alternatives
+        counts = np.asarray(self.profile.counts, dtype=float)
+        complete = np.flatnonzero(self.complete)
+        vertex_ballot, vertex_objective, vertex_welfare = self._vertices(candidate, mass)
+
+        num_vertex = len(vertex_ballot)
+        num_partial = len(self.partial_ballots) * m
+        num_variables = num_vertex + num_partial + 1
+        t = num_variables - 1
+        partial_counts = np.repeat(counts[self.partial_ballots], m)
+        partial_columns = num_vertex + np.arange(num_partial)
+
+        objective = np.zeros(num_variables)
+        objective[:num_vertex] = -vertex_objective
+        objective[num_vertex + candidate + m * np.arange(len(self.partial_ballots))] = -counts[self.partial_ballots]
+
+        # Equality rows: the utilities of each ballot sum to t, tied utilities are equal, and SW(winner) = 1
+        eq_row, eq_col, eq_val = [], [], []
+        num_ballots = len(complete) + len(self.partial_ballots)
+        eq_row += [vertex_ballot, np.repeat(len(complete) + np.arange(len(self.partial_ballots)), m),
+                   np.arange(num_ballots)]
+        eq_col += [np.arange(num_vertex), partial_columns, np.full(num_ballots, t)]
+        eq_val += [np.ones(num_vertex), np.ones(num_partial), -np.ones(num_ballots)]
+        row = num_ballots
+        for (first, first_value), (second, second_value) in self.partial_eq_rows:
+            eq_row.append(np.array([row, row]))
+            eq_col.append(np.array([num_vertex + first, num_vertex + second]))
+            eq_val.append(np.array([first_value, second_value]))
+            row += 1
+        eq_row += [np.full(num_vertex, row), np.full(num_partial, row)]
+        eq_col += [np.arange(num_vertex), partial_columns]
+        eq_val += [vertex_welfare, partial_counts * np.tile(mass, len(self.partial_ballots))]
+        a_eq = sparse.csr_matrix((np.concatenate(eq_val), (np.concatenate(eq_row), np.concatenate(eq_col))),
+                                 shape=(row + 1, num_variables))
+        b_eq = np.zeros(row + 1)
+        b_eq[row] = 1.0
+
+        a_ub, b_ub = None, None
+        if self.partial_ub_rows:
+            ub_row = np.repeat(np.arange(len(self.partial_ub_rows)), 2)
+            ub_col = np.array([num_vertex + column for pair in self.partial_ub_rows for column, _ in pair])
+            ub_val = np.array([value for pair in self.partial_ub_rows for _, value in pair])
+            a_ub = sparse.csr_matrix((ub_val, (ub_row, ub_col)), shape=(len(self.partial_ub_rows), num_variables))
+            b_ub = np.zeros(len(self.partial_ub_rows))
+
+        result = linprog(objective, A_ub=a_ub, b_ub=b_ub, A_eq=a_eq, b_eq=b_eq, bounds=(0, None), method='highs')
+
+        if result.status == 0:
+            return float(-result.fun)
+        elif result.status in (2, 3):
+            # Infeasible (the winner can never get welfare) or unbounded: the ratio has no finite bound
+            return float('inf')
+        raise RuntimeError(f"Worst-case distortion LP failed: {result.message}")
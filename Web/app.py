@@ -1,25 +1,134 @@
-import copy
-import csv
-import time
+import ast
+import json
+import os
+import secrets
 from collections import defaultdict
 from statistics import mean
 
-from flask import Flask, render_template, request, jsonify, send_file
-from SocialChoice.FileHandler import FileHandler
+import numpy as np
+from flask import Flask, render_template, request, jsonify, session
+from werkzeug.utils import secure_filename
+from SocialChoice.FileHandler import FileHandler, file_hash
+from SocialChoice.LRUCache import LRUCache
 from SocialChoice.ValueGeneration import ValueGeneration
-from SocialChoice.VotingRules import VotingRules
+from SocialChoice.VotingRules import RULES, VotingRules
 from SocialChoice.Distortion import Distortion
+from SocialChoice.Normalization import NORMALIZATIONS
+from SocialChoice.ResultWriter import ResultWriter
 
 app = Flask(__name__)
+# Every worker must sign sessions with the same key, a key generated per worker would silently break sessions.
+# Only the single-process development server (python app.py) may fall back to a key generated at startup.
+app.secret_key = os.environ.get('SECRET_KEY')
+if not app.secret_key:
+    if __name__ != '__main__':
+        raise RuntimeError('Set the SECRET_KEY environment variable, shared by every worker, to sign the sessions.')
+    app.secret_key = secrets.token_hex(32)
 
-# Global variable to store FileHandler instance
-obj1 = None
-value_generation = None
-voting_rules = None
-total_scores = {}
-distortion_value = None
-value_list = None
-filename = None
+# Uploaded files are stored under their content hash, so every worker opens the same file from the session
+UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'uploads')
+# Distortion results are written next to the uploads rather than into the working directory
+RESULTS_FOLDER = os.path.join(UPLOAD_FOLDER, 'results')
+
+# Largest total size of the value arrays kept by value_cache, as a value list grows with the number of voters
+VALUE_CACHE_BYTES = int(os.environ.get('VALUE_CACHE_BYTES', 512 * 2 ** 20))
+
+
+"""
+Returns the total size in bytes of the arrays of a list of normalized value instances.
+"""
+
+
+def value_list_nbytes(value_list):
+    return sum(instance.values.nbytes + instance.orders.nbytes + instance.ballot_index.nbytes
+               for single_instance in value_list for instance in single_instance.values())
+
+
+# The session only keeps small parameters (file hash, distributions, rules) and seeds; the parsed profiles,
+# generated values and rule scores are rebuilt from them on demand and shared by all sessions of a worker through
+# these caches, keyed by file hash plus parameters.
+profile_cache = LRUCache(8)
+value_cache = LRUCache(32, max_bytes=VALUE_CACHE_BYTES, sizeof=value_list_nbytes)
+voting_rules_cache = LRUCache(16)
+score_cache = LRUCache(256)
+
+# Seeds are kept below 2 ** 63 so they fit the int64 seed column of the results
+SEED_BITS = 63
+
+
+"""
+Returns the parsed FileHandler of the session file, parsing it only if no session parsed it recently.
+The FileHandler is shared, so it is never modified (see FileHandler.get_complete_profile()).
+"""
+
+
+def get_file_handler(file_info):
+    # The upload folder belongs to the app, so the binary cache of the file is written next to it
+    return profile_cache.get_or_create(file_info['hash'], lambda: FileHandler(file_info['path'], use_cache=True))
+
+
+"""
+Returns the normalized value instances of the session parameters, generating them only on a cache miss.
+The instances are seeded, so every worker generates the same values for the same parameters.
+"""
+
+
+def get_value_list(file_info, values):
+    distributions = tuple(tuple(distribution) for distribution in values['distributions'])
+    key = (file_info['hash'], values['is_missing_zero'], distributions, values['normalization'], values['seed'])
+
+    def generate():
+        file_handler = get_file_handler(file_info)
+        value_generation = ValueGeneration(file_handler.votes_dict, file_handler.get_num_alternatives(),
+                                           seed=values['seed'])
+        distribution_list = {distribution: (count, power_param) for distribution, count, power_param in distributions}
+        k_list = value_generation.generate_k_instances(distribution_list, values['is_missing_zero'])
+
+        return value_generation.normalize_instances(k_list, values['normalization'], inplace=True)
+
+    return value_cache.get_or_create(key, generate)
+
+
+"""
+Returns the VotingRules of the strict and complete profile of the session file, completed with the session seed.
+"""
+
+
+def get_voting_rules(file_info, seed):
+    def complete():
+        file_handler = get_file_handler(file_info)
+        return VotingRules(file_handler.get_complete_profile(seed), file_handler.get_num_alternatives())
+
+    return voting_rules_cache.get_or_create((file_info['hash'], seed), complete)
+
+
+"""
+Returns the scores of one voting rule on the session file, computing them only on a cache miss.
+"""
+
+
+def get_rule_scores(file_info, seed, voting_rule, args):
+    key = (file_info['hash'], seed, voting_rule, json.dumps(args))
+
+    return score_cache.get_or_create(key, lambda: RULES[voting_rule](get_voting_rules(file_info, seed), *args))
+
+
+"""
+Summarizes generated value instances for display, in a size that does not grow with the number of voters: the
+number of voters and the mean value of each alternative of every instance.
+"""
+
+
+def summarize_values(value_list):
+    summary = []
+
+    for single_instance in value_list:
+        for distribution, instances_for_distribution in single_instance.items():
+            values = instances_for_distribution.values
+            summary.append({'distribution': distribution, 'voters': len(values),
+                            'mean_values': np.round(values.mean(axis=0), 4).tolist() if len(values) else []})
+
+    return summary
 
 
 @app.route('/')
@@ -29,15 +138,25 @@ def index():
 
 @app.route('/handle_file', methods=['POST'])
 def handle_file():
-    global obj1, filename
     file = request.files['file_input']
 
     if file:
-        filename = file.filename
-        file.save(filename)
+        filename = secure_filename(file.filename)
+        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+        temp_path = os.path.join(UPLOAD_FOLDER, f'{secrets.token_hex(8)}.upload')
+        file.save(temp_path)
+
+        # Store the file under its content hash, so uploading the same file again reuses its cached profile
+        content_hash = file_hash(temp_path)
+        path = os.path.join(UPLOAD_FOLDER, content_hash + os.path.splitext(filename)[1])
+        os.replace(temp_path, path)
+
+        # Parse the file (or find it in the cache) so parse errors show on upload
+        file_info = {'hash': content_hash, 'name': filename, 'path': path}
+        get_file_handler(file_info)
 
-        # Create FileHandler instance
-        obj1 = FileHandler(filename)
+        session.clear()
+        session['file'] = file_info
 
         # Update messages using AJAX response
         return jsonify({'error': False, 'message': 'Upload Success!'})
@@ -47,8 +166,8 @@ def handle_file():
 
 @app.route('/value_generation', methods=['POST'])
 def value_generation():
-    global obj1, value_list
-    if obj1 is None:
+    file_info = session.get('file')
+    if file_info is None:
         return jsonify({'error': True, 'message': 'File not processed. Please upload a file first.'})
 
     # Get parameters from the form
@@ -79,62 +198,64 @@ def value_generation():
         power_param = int(request.form['power_param'])
         distribution_list.update({distribution: (1, power_param)})
 
-    # Process the values using ValueGeneration
-    value_generation = ValueGeneration(obj1.votes_dict, obj1.get_num_alternatives())
-    k_list = value_generation.generate_k_instances(distribution_list, is_missing_zero)
-
-    if normalization_method == 'unit_sum':
-        value_list = value_generation.unit_sum_normalization(k_list)
-    elif normalization_method == 'unit_range':
-        value_list = value_generation.unit_range_normalization(k_list)
-    else:
+    if normalization_method not in NORMALIZATIONS:
         return jsonify({'error': True, 'message': 'Invalid normalization method.'})
 
-    return jsonify({'error': False, 'message': f'Data Generated for {k} instances!', 'data': f'{value_list}'})
+    # Only the parameters and the seed are kept in the session, the values are cached
+    values = {'is_missing_zero': is_missing_zero, 'normalization': normalization_method,
+              'distributions': [[distribution, count, power_param]
+                                for distribution, (count, power_param) in distribution_list.items()],
+              'seed': secrets.randbits(SEED_BITS)}
+    value_list = get_value_list(file_info, values)
+    session['values'] = values
+
+    return jsonify({'error': False, 'message': f'Data Generated for {k} instances!',
+                    'data': f'{summarize_values(value_list)}'})
 
 
 @app.route('/voting_rules', methods=['POST'])
 def apply_voting_rules():
-    global obj1, value_generation, voting_rules, total_scores
-    if obj1 is None:
+    file_info = session.get('file')
+    if file_info is None:
         return jsonify({'error': True, 'message': 'File not processed. Please upload a file!'})
-    obj2 = copy.deepcopy(obj1)
-
-    # Automatically make file complete and strict before applying voting rules
-    obj2.voting_rule_init()
 
     # Get parameters from the form
     voting_rule_choices = request.form.getlist('voting_rule_choices')
     scoring_rule_input = request.form.get('scoring_rule_input', '')
 
-    # Initialize voting rules
-    voting_rules = VotingRules(obj2.votes_dict, obj2.get_num_alternatives())
-
+    # Each rule is kept as its name and arguments
+    rule_specs = []
     for voting_rule_choice in voting_rule_choices:
-        scores = []
         if voting_rule_choice == 'scoring_rule':
             try:
-                scoring_vector = eval(scoring_rule_input)  # Safely evaluate the input as a Python expression
-                scores.append(voting_rules.scoring_rule(scoring_vector))
+                # Safely evaluate the input as a Python literal
+                scoring_vector = list(ast.literal_eval(scoring_rule_input))
+                if not all(isinstance(weight, (int, float)) for weight in scoring_vector):
+                    raise ValueError('the weights must be numbers')
             except Exception as e:
                 return jsonify({'error': True, 'message': f'Error parsing scoring rule input: {e}'})
-        elif voting_rule_choice == 'plurality_rule':
-            scores.append(voting_rules.plurality_rule())
-        elif voting_rule_choice == 'borda_rule':
-            scores.append(voting_rules.borda_rule())
-        elif voting_rule_choice == 'harmonic_rule':
-            scores.append(voting_rules.harmonic_rule())
+            rule_specs.append([voting_rule_choice, [scoring_vector]])
         elif voting_rule_choice == 'k_approval_rule':
             k_approval_value = request.form.get('k_approval_value', '')
             if not k_approval_value.isdigit():
                 return jsonify(
                     {'error': True, 'message': 'Invalid value for k_approval_rule. Please enter a valid number.'})
-            scores.append(voting_rules.k_approval_rule(int(k_approval_value)))
-        elif voting_rule_choice == 'veto_rule':
-            scores.append(voting_rules.veto_rule())
+            rule_specs.append([voting_rule_choice, [int(k_approval_value)]])
+        elif voting_rule_choice in RULES:
+            # Rules without parameters, including those of the rule registry (e.g. pairwise majority rules)
+            rule_specs.append([voting_rule_choice, []])
         else:
             return jsonify({'error': True, 'message': 'Invalid voting rule choice.'})
-        total_scores.update({voting_rule_choice: scores})
+
+    # The ballots are made complete and strict with the session seed before applying voting rules
+    rules = {'specs': rule_specs, 'seed': session.get('rules', {}).get('seed', secrets.randbits(SEED_BITS))}
+    total_scores = {}
+    for voting_rule, args in rule_specs:
+        try:
+            total_scores.update({voting_rule: [get_rule_scores(file_info, rules['seed'], voting_rule, args)]})
+        except Exception as e:
+            return jsonify({'error': True, 'message': f'Error applying {voting_rule}: {e}'})
+    session['rules'] = rules
 
     # You can do something with the applied voting rule (e.g., display or save it)
     return jsonify({'error': False, 'message': f'Scores: {total_scores}'})
@@ -142,58 +263,69 @@ def apply_voting_rules():
 
 @app.route('/distortion', methods=['POST'])
 def apply_distortion():
-    global value_generation, voting_rules, total_scores, distortion_value, value_list, filename
-    if value_list is None or total_scores is None:
+    file_info, values, rules = session.get('file'), session.get('values'), session.get('rules')
+    if file_info is None or values is None or rules is None:
         return jsonify({'error': True, 'message': 'Value generation or voting rules not applied. Please complete '
                                                   'previous steps.'})
+    # Rebuild the state of the previous steps from the session parameters, served from the caches when possible
+    value_list = get_value_list(file_info, values)
+    voting_rules = get_voting_rules(file_info, rules['seed'])
+    rule_scores = [(voting_rule, get_rule_scores(file_info, rules['seed'], voting_rule, args))
+                   for voting_rule, args in rules['specs']]
+    distribution_params = {distribution: power_param for distribution, _, power_param in values['distributions']}
+    # The winners do not depend on the values, ties are broken in favour of the lowest numbered candidate
+    deterministic_winners = [voting_rules.winner_determinstic(score) for _, score in rule_scores]
+
     # Get parameters from the form
     distortion_type = request.form['distortion_type']
     average_distortion = {}
     distortion_list = defaultdict(list)
-    distribution_list = []
+    result_rows = []
+    instance_index = defaultdict(int)
 
     for single_instance in value_list:
         for distribution, instances_for_distribution in single_instance.items():
-            distribution_list.append(distribution)
+            instance = instance_index[distribution]
+            instance_index[distribution] += 1
 
-            print(instances_for_distribution)
             # Initialize distortion
             distortion = Distortion(instances_for_distribution)
 
             # Apply the chosen distortion type
-            for voting_rule, scores in total_scores.items():
-                for score in scores:
-                    if distortion_type == 'deterministic':
-                        winner = voting_rules.winner_determinstic(score)
-                        distortion_value = distortion.distortion(winner)
-
-                    elif distortion_type == 'randomize':
-                        k_value = int(request.form['k_value'])
-                        winner = voting_rules.winner_probability(score)
-                        distortion_value = distortion.average_distortion(k_value, winner)
-                    else:
-                        return jsonify({'error': True, 'message': 'Invalid distortion type.'})
-
-                    distortion_list[voting_rule].append(distortion_value)
-    print(distortion_list)
+            if distortion_type == 'deterministic':
+                # All rules are scored against the same welfare index in one batch
+                winners = deterministic_winners
+                distortion_values = distortion.distortion_many(winners).tolist()
+
+            elif distortion_type == 'randomize':
+                k_value = int(request.form['k_value'])
+                winners = [-1] * len(rule_scores)
+                distortion_values = [distortion.average_distortion(k_value, voting_rules.winner_probability(score))
+                                     for _, score in rule_scores]
+            else:
+                return jsonify({'error': True, 'message': 'Invalid distortion type.'})
+
+            for (voting_rule, _), winner, distortion_value in zip(rule_scores, winners, distortion_values):
+                distortion_list[voting_rule].append(distortion_value)
+                # Instances are spawned from the value generation seed, which is recorded with their index
+                result_rows.append({'file': file_info['name'], 'rule': voting_rule, 'distribution': distribution,
+                                    'param': distribution_params.get(distribution, 0), 'normalization':
+                                    values['normalization'], 'instance': instance, 'seed': values['seed'],
+                                    'mode': distortion_type, 'winner': winner, 'distortion': distortion_value})
 
     # Calculate average distortion for each voting rule
     for voting_rule, distortions in distortion_list.items():
         average_distortion.update({voting_rule: mean(distortions)})
-    print(average_distortion)
-
-    # Write distortion values to a CSV file
-    csv_file_path = 'distortion_values.csv'
-    with open(csv_file_path, 'w', newline='') as csv_file:
-        writer = csv.writer(csv_file)
-        # Write header row
-        writer.writerow(['Distribution/Voting Rules'] + distribution_list)
-        # Write data rows
-        for voting_rule, distortions in distortion_list.items():
-            writer.writerow([voting_rule] + distortions)
-
-    return jsonify(
-        {'error': False, 'csvFilePath': csv_file_path, 'message': f' Average Distortion Value : {average_distortion}'})
+
+    # Write distortion values as one columnar batch (Parquet, or .npz without pyarrow), one file per generated values
+    # and distortion mode so concurrent sessions and the two modes do not overwrite each other
+    os.makedirs(RESULTS_FOLDER, exist_ok=True)
+    result_path = os.path.join(RESULTS_FOLDER, f"distortion_values_{values['seed']}_{distortion_type}.parquet")
+    with ResultWriter(result_path, metadata={'completion_seed': rules['seed']}) as writer:
+        writer.write_rows(result_rows)
+
+    return jsonify({'error': False, 'resultFilePath': writer.path, 'format': writer.format,
+                    'message': f' Average Distortion Value : {average_distortion}'})
 
 
 if __name__ == '__main__':
@@ -0,0 +1,131 @@
+"""
+Benchmarks the BALLOT_TOKEN tokenizer of FileHandler against the former character-by-character parser, on generated
+.toc (complete, with ties) and .toi (incomplete, with ties) files with hundreds of alternatives.
+
+The former parser reads each digit as an alternative, so it is only checked for agreement on files with fewer than
+10 alternatives; on the large files only its speed is compared.
+
+Run from the repository root:
+    python -m tests.benchmark_parser [--alternatives 300] [--ballots 20000]
+"""
+import argparse
+import os
+import tempfile
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from SocialChoice.FileHandler import FileHandler
+
+
+"""
+The tie group parser used before BALLOT_TOKEN, walking the votes string one character at a time.
+"""
+
+
+def legacy_combine_adjacent_sets(votes):
+    combined_set = []
+    current_set = None
+
+    for char in votes:
+        if char == '{':
+            current_set = set()
+        elif char == '}':
+            combined_set.append(tuple(sorted(current_set)))
+            current_set = None
+        elif char.isdigit():
+            if current_set is not None:
+                current_set.add(int(char))
+            else:
+                combined_set.append(int(char))
+
+    return OrderedDict.fromkeys(combined_set)
+
+
+"""
+Writes a PrefLib-style file of random ballots with tie groups.
+
+Parameters:
+- path (str): The output file.
+- num_alternatives (int): The number of alternatives.
+- num_ballots (int): The number of ballot lines.
+- complete (bool): Whether every ballot ranks all alternatives (.toc) or only a prefix of them (.toi).
+- seed (int): The seed of the generated ballots.
+"""
+
+
+def write_ballots(path, num_alternatives, num_ballots, complete, seed=0):
+    rng = np.random.default_rng(seed)
+
+    with open(path, 'w') as file:
+        file.write(f'# NUMBER ALTERNATIVES: {num_alternatives}\n')
+        for _ in range(num_ballots):
+            order = rng.permutation(num_alternatives) + 1
+            length = num_alternatives if complete else int(rng.integers(1, num_alternatives + 1))
+            # Cut the ranked prefix into tie groups of 1 to 3 alternatives
+            cuts = np.cumsum(rng.integers(1, 4, size=length))
+            groups = np.split(order[:length], cuts[cuts < length])
+            entries = [str(group[0]) if len(group) == 1 else '{' + ','.join(map(str, group)) + '}'
+                       for group in groups]
+            file.write(f'{int(rng.integers(1, 10))}: {",".join(entries)}\n')
+
+
+"""
+Times a tokenizer over the ballot strings of a file.
+
+Returns:
+float: The best time of the repeats, in seconds.
+"""
+
+
+def time_tokenizer(tokenizer, ballots, repeats=3):
+    best = float('inf')
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for votes in ballots:
+            tokenizer(votes)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the ballot tokenizer against the former parser.')
+    parser.add_argument('--alternatives', type=int, default=300, help='Number of alternatives of the large files.')
+    parser.add_argument('--ballots', type=int, default=20000, help='Number of ballot lines per file.')
+    args = parser.parse_args(argv)
+
+    file_handler = FileHandler.__new__(FileHandler)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for extension, complete in (('toc', True), ('toi', False)):
+            # Agreement with the former parser, where it is still correct
+            small_path = os.path.join(directory, f'small.{extension}')
+            write_ballots(small_path, 9, 2000, complete)
+            with open(small_path) as file:
+                small_ballots = [line.split(': ', 1)[1].strip() for line in file if not line.startswith('#')]
+            agree = all(tuple(file_handler.combine_adjacent_sets(votes)) ==
+                        tuple(group[0] if isinstance(group, tuple) and len(group) == 1 else group
+                              for group in legacy_combine_adjacent_sets(votes))
+                        for votes in small_ballots if '{' in votes)
+
+            path = os.path.join(directory, f'large.{extension}')
+            write_ballots(path, args.alternatives, args.ballots, complete)
+            with open(path) as file:
+                ballots = [line.split(': ', 1)[1].strip() for line in file if not line.startswith('#')]
+
+            legacy_time = time_tokenizer(legacy_combine_adjacent_sets, ballots)
+            token_time = time_tokenizer(file_handler.combine_adjacent_sets, ballots)
+            start = time.perf_counter()
+            FileHandler(path)
+            parse_time = time.perf_counter() - start
+
+            print(f'.{extension}: m={args.alternatives}, {args.ballots} ballots | former parser {legacy_time:.3f} s '
+                  f'| BALLOT_TOKEN {token_time:.3f} s ({legacy_time / token_time:.1f}x) | full FileHandler parse '
+                  f'{parse_time:.3f} s | agrees with the former parser for m < 10: {agree}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+
+"""
+Draws a random counted profile in the votes_dict layout of FileHandler: each ballot is a random order of the
+alternatives, cut into tie groups of 1 to 3 alternatives (sorted tuples, single alternatives as plain ints), and
+truncated to a random prefix unless complete is set.
+
+Parameters:
+- seed (int): The seed of the generated ballots.
+- num_alternatives (int): The number of alternatives.
+- num_ballots (int): The number of drawn ballots, equal ballots are merged with their counts added.
+- complete (bool): Whether every ballot ranks all alternatives.
+- ties (bool): Whether ballots have tie groups.
+
+Returns:
+dict: A dictionary containing ranking ballots as keys and counts as values.
+"""
+
+
+def random_votes_dict(seed, num_alternatives, num_ballots, complete=False, ties=True):
+    rng = np.random.default_rng(seed)
+    votes_dict = {}
+
+    for _ in range(num_ballots):
+        order = rng.permutation(num_alternatives) + 1
+        cuts = np.cumsum(rng.integers(1, 4 if ties else 2, size=num_alternatives))
+        groups = np.split(order, cuts[cuts < num_alternatives])
+        entries = [int(group[0]) if len(group) == 1 else tuple(sorted(map(int, group))) for group in groups]
+        if not complete:
+            entries = entries[:int(rng.integers(1, len(entries) + 1))]
+        key = tuple(entries)
+        votes_dict[key] = votes_dict.get(key, 0) + int(rng.integers(1, 10))
+
+    return votes_dict
+
+
+@pytest.fixture
+def make_votes_dict():
+    return random_votes_dict
+
+
+"""
+Writes a counted profile in the votes_dict layout to a PrefLib-style file, tie groups as '{a,b}'.
+
+Parameters:
+- path (str): The output file.
+- votes_dict (dict): A dictionary containing ranking ballots as keys and counts as values.
+- num_alternatives (int): The number of alternatives.
+
+Returns:
+str: The path of the file.
+"""
+
+
+def write_ballot_file(path, votes_dict, num_alternatives):
+    lines = [f'# NUMBER ALTERNATIVES: {num_alternatives}']
+    for votes, count in votes_dict.items():
+        entries = [str(entry) if isinstance(entry, int) else '{' + ','.join(map(str, entry)) + '}' for entry in votes]
+        lines.append(f'{count}: {",".join(entries)}')
+
+    with open(path, 'w') as file:
+        file.write('\n'.join(lines) + '\n')
+
+    return str(path)
+
+
+@pytest.fixture
+def make_ballot_file(make_votes_dict):
+    def make(path, seed, num_alternatives, num_ballots=12):
+        return write_ballot_file(path, make_votes_dict(seed, num_alternatives, num_ballots), num_alternatives)
+
+    return make
@@ -0,0 +1,89 @@
+import importlib.util
+import os
+
+import numpy as np
+import pytest
+
+flask = pytest.importorskip('flask')
+
+APP_PATH = os.path.join(os.path.dirname(__file__), os.pardir, 'Web', 'app.py')
+
+
+"""
+Imports a fresh copy of the Web app module (Web is not a package), under the given module name.
+"""
+
+
+def load_app(name='web_app'):
+    spec = importlib.util.spec_from_file_location(name, APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    return module
+
+
+@pytest.fixture
+def web_app(monkeypatch, tmp_path):
+    monkeypatch.setenv('SECRET_KEY', 'test-key')
+    monkeypatch.setenv('UPLOAD_FOLDER', str(tmp_path / 'uploads'))
+    # Nothing may be written to the working directory
+    os.makedirs(tmp_path / 'cwd')
+    monkeypatch.chdir(tmp_path / 'cwd')
+
+    return load_app()
+
+
+def test_secret_key_is_required(monkeypatch):
+    monkeypatch.delenv('SECRET_KEY', raising=False)
+
+    with pytest.raises(RuntimeError, match='SECRET_KEY'):
+        load_app()
+
+
+def test_development_server_generates_a_secret_key(monkeypatch):
+    monkeypatch.delenv('SECRET_KEY', raising=False)
+    monkeypatch.setattr(flask.Flask, 'run', lambda self, **kwargs: None)
+
+    assert len(load_app('__main__').app.secret_key) == 64
+
+
+def test_distortion_flow(web_app, make_ballot_file, tmp_path):
+    path = make_ballot_file(tmp_path / 'ballots.toi', 2, 4)
+    client = web_app.app.test_client()
+
+    with open(path, 'rb') as file:
+        response = client.post('/handle_file', data={'file_input': (file, 'ballots.toi')})
+    assert response.get_json()['error'] is False
+
+    response = client.post('/value_generation', data={'is_missing_zero': 'True', 'k': '1', 'distribution': 'Uniform',
+                                                      'power_param': '2', 'normalization_method': 'unit_sum'})
+    assert response.get_json()['error'] is False
+    assert web_app.value_cache.total_bytes > 0
+
+    response = client.post('/voting_rules', data={'voting_rule_choices': ['plurality_rule', 'k_approval_rule'],
+                                                  'k_approval_value': '2'})
+    assert response.get_json()['error'] is False
+
+    result_paths = []
+    for distortion_type in ['deterministic', 'randomize']:
+        response = client.post('/distortion', data={'distortion_type': distortion_type, 'k_value': '3'}).get_json()
+        assert response['error'] is False
+        result_paths.append(response['resultFilePath'])
+
+    # The two modes are written to separate files of the results folder
+    assert len(set(result_paths)) == 2
+    for result_path, mode in zip(result_paths, ['deterministic', 'randomize']):
+        assert os.path.dirname(result_path) == web_app.RESULTS_FOLDER
+        assert mode in os.path.basename(result_path)
+        if result_path.endswith('.parquet'):
+            import pyarrow.parquet as pq
+            assert set(pq.read_table(result_path).column('mode').to_pylist()) == {mode}
+        else:
+            assert set(np.load(result_path)['mode'].tolist()) == {mode}
+    assert os.listdir(tmp_path / 'cwd') == []
+
+
+def test_distortion_needs_the_previous_steps(web_app):
+    response = web_app.app.test_client().post('/distortion', data={'distortion_type': 'deterministic'})
+
+    assert response.get_json()['error'] is True
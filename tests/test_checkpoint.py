@@ -0,0 +1,86 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from SocialChoice import Experiment
+from SocialChoice.Checkpoint import Checkpoint, file_key, row_key
+from SocialChoice.Experiment import ExperimentRunner
+from SocialChoice.ResultWriter import RESULT_COLUMNS
+
+GRID = {'rules': ['borda_rule', 'irv_rule'], 'distributions': [('Uniform', 2.0)],
+        'normalizations': ['unit_sum', 'unit_range'], 'max_workers': 1}
+
+
+def row(instance, distortion):
+    return {'file': 'a.toi', 'rule': 'borda_rule', 'distribution': 'Uniform', 'param': 2.0,
+            'normalization': 'unit_sum', 'instance': instance, 'seed': 7, 'mode': 'deterministic', 'winner': 1,
+            'distortion': distortion}
+
+
+def run(files, checkpoint, k=1, seed=None):
+    runner = ExperimentRunner(files, k=k, seed=seed, checkpoint=checkpoint, **GRID)
+
+    return {column: np.concatenate([batch[column] for batch in runner.run()]) for column in RESULT_COLUMNS}
+
+
+def test_append_and_completed(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoint'))
+    checkpoint.append('a.toi', [row(0, 1.5), row(1, 2.0)])
+    checkpoint.append('a.toi', [row(1, 2.5)])
+    done = checkpoint.completed('a.toi')
+
+    assert len(done) == 2
+    assert done[row_key(row(1, 0))]['distortion'] == 2.5
+    assert checkpoint.completed('b.toi') == {}
+
+
+def test_truncated_line_is_skipped(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoint'))
+    checkpoint.append('a.toi', [row(0, 1.5)])
+    with open(checkpoint.get_shard_path('a.toi'), 'a') as file:
+        file.write(json.dumps(row(1, 2.0))[:20])
+    checkpoint.append('a.toi', [row(2, 3.0)])
+
+    assert sorted(key[5] for key in checkpoint.completed('a.toi')) == [0, 2]
+
+
+def test_entropy_round_trip(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoint'))
+    assert checkpoint.load_entropy() is None
+
+    checkpoint.save_entropy(12345)
+    assert Checkpoint(str(tmp_path / 'checkpoint')).load_entropy() == 12345
+
+
+def test_same_basename_gets_its_own_shard(make_ballot_file, tmp_path):
+    os.makedirs(tmp_path / 'a')
+    os.makedirs(tmp_path / 'b')
+    first = make_ballot_file(tmp_path / 'a' / 'election.toi', 0, 4)
+    second = make_ballot_file(tmp_path / 'b' / 'election.toi', 1, 5)
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoint'))
+
+    assert checkpoint.get_shard_path(first) != checkpoint.get_shard_path(second)
+
+    results = run([first, second], checkpoint, seed=4)
+    resumed = run([first, second], Checkpoint(str(tmp_path / 'checkpoint')))
+    assert set(results['file'].tolist()) == {file_key(first), file_key(second)}
+    for column in RESULT_COLUMNS:
+        assert np.array_equal(resumed[column], results[column])
+
+
+def test_resume_skips_done_instances(make_ballot_file, tmp_path, monkeypatch):
+    data_file = make_ballot_file(tmp_path / 'election.toi', 2, 4)
+    fresh = run([data_file], None, k=2, seed=9)
+
+    # An interrupted run: only the first instance is done
+    run([data_file], Checkpoint(str(tmp_path / 'checkpoint')), k=1, seed=9)
+    resumed = run([data_file], Checkpoint(str(tmp_path / 'checkpoint')), k=2)
+    for column in RESULT_COLUMNS:
+        assert np.array_equal(resumed[column], fresh[column])
+
+    # Once every instance is done the file is not even parsed
+    monkeypatch.setattr(Experiment, 'FileHandler', None)
+    restored = run([data_file], Checkpoint(str(tmp_path / 'checkpoint')), k=2)
+    assert np.array_equal(restored['distortion'], fresh['distortion'])
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from SocialChoice import FileHandler as file_handler_module
+from SocialChoice.FileHandler import FileHandler, sample_completions
+from SocialChoice.Profile import Profile
+
+NUM_ALTERNATIVES = 6
+
+
+@pytest.fixture
+def ballot_file(make_ballot_file, make_votes_dict, tmp_path):
+    path = make_ballot_file(tmp_path / 'ballots.toi', 5, NUM_ALTERNATIVES, num_ballots=30)
+
+    return path, make_votes_dict(5, NUM_ALTERNATIVES, 30)
+
+
+"""
+Checks that every row of a completed profile is a strict and complete order that keeps the ranked groups of some
+ballot of votes_dict in their order, with the missing alternatives below them.
+"""
+
+
+def assert_completes(profile, votes_dict):
+    ranks = np.asarray(profile.ranks)
+    assert (np.sort(ranks, axis=1) == np.arange(NUM_ALTERNATIVES)).all()
+
+    source = Profile.from_votes_dict(votes_dict, NUM_ALTERNATIVES).ranks.astype(np.int64)
+    positions = np.where(source >= 0, source, NUM_ALTERNATIVES)
+    for row in ranks:
+        # row is consistent with a ballot when no pair it orders is reversed by that ballot
+        reversed_pairs = (positions[:, :, None] < positions[:, None, :]) & (row[None, :, None] > row[None, None, :])
+        assert (~reversed_pairs.any(axis=(1, 2))).any()
+
+
+@pytest.mark.parametrize('per_voter', [False, True])
+def test_completion_is_reproducible(ballot_file, per_voter):
+    path, votes_dict = ballot_file
+    first = FileHandler(path).get_complete_profile(seed=11, per_voter=per_voter)
+    second = FileHandler(path).get_complete_profile(seed=11, per_voter=per_voter)
+
+    assert np.array_equal(first.ranks, second.ranks)
+    assert np.array_equal(first.counts, second.counts)
+    assert first.get_num_voters() == sum(votes_dict.values())
+    assert_completes(first, votes_dict)
+
+
+def test_completion_leaves_the_file_handler_unchanged(ballot_file):
+    path, votes_dict = ballot_file
+    file_handler = FileHandler(path)
+    file_handler.get_complete_profile(seed=2)
+
+    assert file_handler.votes_dict == votes_dict
+    assert file_handler.get_profile().to_votes_dict() == votes_dict
+
+
+def test_voting_rule_init_is_reproducible(ballot_file):
+    path, votes_dict = ballot_file
+    first, second = FileHandler(path), FileHandler(path)
+    first.voting_rule_init(seed=3)
+    second.voting_rule_init(seed=3)
+
+    assert first.votes_dict == second.votes_dict
+    assert all(isinstance(alt, int) for votes in first.votes_dict for alt in votes)
+    assert_completes(first.profile, votes_dict)
+
+
+def test_per_voter_completions_are_aggregated(tmp_path):
+    # One ballot held by 50000 voters with a tie of three above three missing alternatives: 3! * 3! completions
+    path = tmp_path / 'ballots.toi'
+    path.write_text(f'# NUMBER ALTERNATIVES: {NUM_ALTERNATIVES}\n50000: {{1,2,3}}\n')
+    profile = FileHandler(str(path)).get_complete_profile(seed=4, per_voter=True)
+
+    assert len(profile.counts) == 36
+    assert profile.get_num_voters() == 50000
+    assert profile.counts == pytest.approx(np.full(36, 50000 / 36), rel=0.2)
+    assert (np.asarray(profile.ranks)[:, :3] < 3).all()
+
+
+def test_ballot_without_ties_keeps_its_count():
+    # Five ranked alternatives leave a single missing one, so the ballot has only one completion
+    positions = np.array([0, 1, 2, 3, 4, NUM_ALTERNATIVES])
+    ranks, counts = sample_completions(positions, 9, np.random.default_rng(0))
+
+    assert ranks.tolist() == [[0, 1, 2, 3, 4, 5]] and counts.tolist() == [9]
+
+
+def test_large_tie_groups_are_shuffled_per_voter(monkeypatch):
+    monkeypatch.setattr(file_handler_module, 'MAX_TIE_PERMUTATIONS', 2)
+    ranks, counts = sample_completions(np.array([0, 0, 0, 1, 2, 3]), 40, np.random.default_rng(1))
+
+    assert counts.sum() == 40
+    assert (np.sort(ranks, axis=1) == np.arange(NUM_ALTERNATIVES)).all()
+    assert (ranks[:, :3] < 3).all() and (ranks[:, 3:] == [3, 4, 5]).all()
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from SocialChoice.Distortion import Distortion
+from SocialChoice.ValueTensor import ValueTensor
+
+# Three voters of two rankings: the total values are 1: 1.5, 2: 1.0, 3: 0.5 and 4: 0.
+VALUES = np.array([[0.5, 0.3, 0.2, 0.0], [0.6, 0.1, 0.3, 0.0], [0.4, 0.6, 0.0, 0.0]])
+
+
+@pytest.fixture
+def distortion():
+    return Distortion(ValueTensor(VALUES, np.array([0, 0, 1]), orders=np.array([[1, 2, 3, 4], [2, 1, 3, 4]])))
+
+
+def test_expected_distortion_is_exact(distortion):
+    lottery = {1: 0.5, 2: 0.25, 3: 0.25}
+
+    assert distortion.expected_distortion(lottery) == pytest.approx(0.5 * 1 + 0.25 * 1.5 + 0.25 * 3)
+    # Candidates that are never drawn do not count, even with no welfare
+    assert distortion.expected_distortion({1: 0.5, 2: 0.5, 4: 0.0}) == pytest.approx(1.25)
+
+
+def test_sampled_distortion_converges_to_expected(distortion):
+    lottery = {1: 0.2, 2: 0.3, 3: 0.5}
+    trials = distortion.sample_distortion(200000, lottery, seed=3)
+
+    assert set(np.unique(trials).tolist()) == {1.0, 1.5, 3.0}
+    assert trials.mean() == pytest.approx(distortion.expected_distortion(lottery), rel=0.01)
+    assert np.array_equal(trials, distortion.sample_distortion(200000, lottery, seed=3))
+    assert distortion.average_distortion(200000, lottery, seed=3) == pytest.approx(trials.mean())
+
+
+def test_welfare_index(distortion):
+    assert distortion.optimal_alternative == 1
+    assert distortion.optimal_value == pytest.approx(1.5)
+    assert distortion.welfare_order.tolist() == [1, 2, 3, 4]
+
+
+def test_distortion_many_matches_single_winners(distortion):
+    winners = [1, 2, 3, 4]
+
+    assert distortion.distortion_many(winners).tolist() == pytest.approx([1.0, 1.5, 3.0, np.inf])
+    assert distortion.distortion_many(winners[:3]).tolist() == [distortion.distortion(winner) for winner in winners[:3]]
+    # Lotteries and unknown alternatives in the same batch
+    assert distortion.distortion_many([{1: 0.5, 3: 0.5}, 7]).tolist() == pytest.approx([1.5, np.inf])
+
+
+def test_dictionary_values_give_the_same_welfare(distortion):
+    value_list = dict(distortion.value_list.items())
+
+    assert Distortion(value_list).total_values == pytest.approx(distortion.total_values)
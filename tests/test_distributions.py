@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from SocialChoice.Distributions import DISTRIBUTIONS, INVERSE_CDF, register_distribution, sample, truncated_sample
+
+
+@pytest.mark.parametrize('distribution', sorted(DISTRIBUTIONS))
+def test_truncated_sample_stays_below_the_limit(distribution):
+    upper_limit = np.linspace(0.05, 3, 200)[:, None]
+    values = truncated_sample(distribution, (200, 50), 2, upper_limit, np.random.default_rng(0))
+
+    assert values.shape == (200, 50)
+    assert (values < upper_limit).all()
+
+
+def test_inverse_cdf_sampling_is_not_clamped():
+    # Uniform below 0.5 is drawn exactly, no value is pushed to the limit after failed resampling
+    values = truncated_sample('Uniform', (10000,), 2, 0.5, np.random.default_rng(1))
+
+    assert 'Uniform' in INVERSE_CDF
+    assert values.min() >= 0 and values.max() < 0.5
+    assert abs(values.mean() - 0.25) < 0.01
+    assert not np.isin(np.nextafter(0.5, -np.inf), values)
+
+
+def test_resampling_without_inverse_cdf(monkeypatch):
+    monkeypatch.setitem(DISTRIBUTIONS, 'Triangular', lambda rng, shape, _: rng.triangular(0, 1, 2, size=shape))
+    values = truncated_sample('Triangular', (1000,), 2, 1.0, np.random.default_rng(2))
+
+    assert (values < 1.0).all()
+    assert values.min() >= 0
+
+
+def test_seeded_samples_are_reproducible():
+    first = sample('Gamma', (5, 4), 2, np.random.default_rng(7))
+    second = sample('Gamma', (5, 4), 2, np.random.default_rng(7))
+
+    assert np.array_equal(first, second)
+
+
+def test_unknown_distribution():
+    with pytest.raises(ValueError, match='Invalid distribution choice'):
+        sample('Cauchy', (3,), 2)
+
+
+def test_registered_distribution_is_sampled(monkeypatch):
+    # Removed from the registry again when the test ends
+    monkeypatch.setitem(DISTRIBUTIONS, 'Constant', None)
+    register_distribution('Constant', lambda rng, shape, power_param: np.full(shape, float(power_param)))
+
+    assert np.array_equal(sample('Constant', (2, 3), 4), np.full((2, 3), 4.0))
@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pytest
+
+from SocialChoice.Experiment import ExperimentRunner, expand_rules
+from SocialChoice.ResultWriter import RESULT_COLUMNS
+from SocialChoice.VotingRules import RULES
+
+
+@pytest.fixture
+def data_files(make_ballot_file, tmp_path):
+    return [make_ballot_file(tmp_path / f'election-{seed}.toi', seed, num_alternatives)
+            for seed, num_alternatives in ((0, 4), (1, 5))]
+
+
+def run(files, distributions=(('Uniform', 2.0),), rules=('borda_rule', 'irv_rule'), **options):
+    runner = ExperimentRunner(files, rules, distributions, max_workers=1, **options)
+
+    return {column: np.concatenate([batch[column] for batch in runner.run()]) for column in RESULT_COLUMNS}
+
+
+def test_grid_rows(data_files):
+    results = run(data_files, [('Uniform', 2.0), ('Exponential', 2.0)], normalizations=['unit_sum', 'unit_range'],
+                  k=2, modes=['deterministic', 'randomize'], seed=1)
+
+    # files x distributions x instances x normalizations x modes x rules
+    assert len(results['distortion']) == 2 * 2 * 2 * 2 * 2 * 2
+    assert (results['distortion'] >= 1 - 1e-9).all()
+    assert set(results['winner'][results['mode'] == 'randomize'].tolist()) == {-1}
+    assert (results['winner'][results['mode'] == 'deterministic'] >= 1).all()
+
+
+def test_cells_do_not_depend_on_the_grid(data_files):
+    small = run(data_files[:1], seed=5)
+    large = run(data_files, [('Uniform', 2.0), ('Exponential', 2.0)], seed=5)
+    same_cell = (large['file'] == small['file'][0]) & (large['distribution'] == 'Uniform')
+
+    assert np.array_equal(large['seed'][same_cell], small['seed'])
+    assert np.array_equal(large['distortion'][same_cell], small['distortion'])
+
+
+def test_seeds_follow_the_resolved_path(data_files, monkeypatch):
+    absolute = run(data_files[:1], seed=3)
+    monkeypatch.chdir(os.path.dirname(data_files[0]))
+    relative = run([os.path.basename(data_files[0])], seed=3)
+
+    assert np.array_equal(absolute['seed'], relative['seed'])
+    assert np.array_equal(absolute['distortion'], relative['distortion'])
+
+
+def test_all_rules(data_files):
+    rules = expand_rules(['all'])
+    results = run(data_files[:1], rules=['all'], seed=2)
+
+    assert len(rules) == len(RULES)
+    assert 'k_approval_rule:2' in rules and 'scoring_rule:[2, 1]' in rules
+    assert results['rule'].tolist() == rules
+    assert expand_rules(['borda_rule', 'all'])[0] == 'borda_rule'
+    assert len(expand_rules(['borda_rule', 'all'])) == len(RULES)
+
+
+@pytest.mark.parametrize('option', [{'rules': ['plurality']}, {'normalizations': ['softmax']},
+                                    {'modes': ['expected']}, {'tie_breaking': 'coin'}])
+def test_invalid_grid(data_files, option):
+    arguments = {'rules': ['borda_rule'], 'distributions': [('Uniform', 2.0)], **option}
+
+    with pytest.raises(ValueError):
+        ExperimentRunner(data_files, **arguments)
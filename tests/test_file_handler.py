@@ -0,0 +1,123 @@
+import os
+
+import pytest
+
+from SocialChoice.FileHandler import CACHE_SUFFIX, FileHandler
+
+STRICT_FILE = """# FILE NAME: strict.soi
+# NUMBER ALTERNATIVES: 4
+# NUMBER VOTERS: 12
+5: 2,1,4,3
+3: 1
+2: 2,1,4,3
+
+2: 4,3
+"""
+
+# A .toi file with a singleton tie group, an empty tie group entry, alternatives with two digits and a repeated ballot.
+TIED_FILE = """# NUMBER ALTERNATIVES: 12
+# NUMBER VOTERS: 17
+5: 12,{3},1
+4: {1,,2},11
+3: {10,12},3,{4,5,6}
+2: 7
+2: 12,3,1
+1: {2,1},11
+"""
+
+TIED_FILE_VOTES = {
+    (12, 3, 1): 7,
+    ((1, 2), 11): 5,
+    ((10, 12), 3, (4, 5, 6)): 3,
+    (7,): 2,
+}
+
+
+@pytest.fixture
+def strict_file(tmp_path):
+    path = tmp_path / 'strict.soi'
+    path.write_text(STRICT_FILE)
+
+    return str(path)
+
+
+@pytest.fixture
+def tied_file(tmp_path):
+    path = tmp_path / 'ballots.toi'
+    path.write_text(TIED_FILE)
+
+    return str(path)
+
+
+def test_stream_counts_repeated_ballots(strict_file):
+    file_handler = FileHandler(strict_file)
+
+    assert file_handler.get_num_alternatives() == 4
+    assert file_handler.get_metadata()['NUMBER VOTERS'] == '12'
+    assert file_handler.votes_dict == {(2, 1, 4, 3): 7, (1,): 3, (4, 3): 2}
+    assert sorted(file_handler.get_data()) == [(2, (4, 3)), (3, (1,)), (7, (2, 1, 4, 3))]
+
+
+def test_parse_tie_groups(tied_file):
+    file_handler = FileHandler(tied_file)
+
+    assert file_handler.get_num_alternatives() == 12
+    assert file_handler.votes_dict == TIED_FILE_VOTES
+
+
+@pytest.mark.parametrize('votes, expected', [
+    ('{3},{1,,2},11', [3, (1, 2), 11]),
+    ('{,},10', [10]),
+    ('{21,3},{104}', [(3, 21), 104]),
+])
+def test_combine_adjacent_sets(votes, expected):
+    assert list(FileHandler.__new__(FileHandler).combine_adjacent_sets(votes)) == expected
+
+
+def test_invalid_ballot_line(tmp_path):
+    path = tmp_path / 'broken.soc'
+    path.write_text('# NUMBER ALTERNATIVES: 3\n2: 1,2,3\nx: 3,2,1\n')
+
+    with pytest.raises(ValueError, match='broken.soc:3'):
+        FileHandler(str(path))
+
+
+def test_sidecar_cache_round_trip(tied_file):
+    parsed = FileHandler(tied_file, use_cache=True)
+    assert os.path.exists(tied_file + CACHE_SUFFIX)
+
+    cached = FileHandler(tied_file, use_cache=True)
+    assert cached.votes_dict == parsed.votes_dict == TIED_FILE_VOTES
+    assert cached.get_metadata() == parsed.get_metadata()
+    assert cached.get_num_alternatives() == 12
+
+
+def test_cache_dir_round_trip(tied_file, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    FileHandler(tied_file, use_cache=True, cache_dir=cache_dir)
+    cached = FileHandler(tied_file, use_cache=True, cache_dir=cache_dir)
+
+    assert not os.path.exists(tied_file + CACHE_SUFFIX)
+    assert os.listdir(cache_dir) == [cached.get_content_hash() + CACHE_SUFFIX]
+    assert cached.votes_dict == TIED_FILE_VOTES
+
+
+def test_cache_is_opt_in(tied_file):
+    FileHandler(tied_file)
+
+    assert not os.path.exists(tied_file + CACHE_SUFFIX)
+
+
+def test_stale_cache_is_ignored(tied_file):
+    FileHandler(tied_file, use_cache=True)
+    with open(tied_file, 'a') as file:
+        file.write('6: 2,1\n')
+
+    assert FileHandler(tied_file, use_cache=True).votes_dict == {**TIED_FILE_VOTES, (2, 1): 6}
+
+
+def test_ballot_store_file_round_trip(tied_file, tmp_path):
+    file_handler = FileHandler(tied_file, ballot_store=str(tmp_path / 'store'))
+
+    assert file_handler.votes_dict == {}
+    assert file_handler.get_profile().to_votes_dict() == TIED_FILE_VOTES
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from SocialChoice.LRUCache import LRUCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert 'b' not in cache and len(cache) == 2
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.get('b', 'missing') == 'missing'
+
+
+def test_get_or_create_counts_hits_and_misses():
+    cache = LRUCache(4)
+    calls = []
+
+    for key in ['x', 'y', 'x', 'x']:
+        assert cache.get_or_create(key, lambda: calls.append(key) or key.upper()) == key.upper()
+
+    assert calls == ['x', 'y']
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_byte_bound_evicts_least_recently_used_values():
+    cache = LRUCache(10, max_bytes=100, sizeof=lambda value: value.nbytes)
+    cache.put('a', np.zeros(5))
+    cache.put('b', np.zeros(5))
+    cache.get('a')
+    cache.put('c', np.zeros(5))
+
+    # Three arrays of 40 bytes exceed 100 bytes, so the least recently used one goes
+    assert 'b' not in cache and cache.total_bytes == 80
+    cache.put('a', np.zeros(2))
+    assert cache.total_bytes == 56
+    cache.get_or_create('d', lambda: np.zeros(20))
+    assert list(cache._entries) == ['d'] and cache.total_bytes == 160
+
+    cache.clear()
+    assert len(cache) == 0 and cache.total_bytes == 0
+
+
+@pytest.mark.parametrize('arguments', [{'max_entries': 0}, {'max_entries': 1, 'max_bytes': 10},
+                                       {'max_entries': 1, 'max_bytes': -1, 'sizeof': len}])
+def test_invalid_bounds(arguments):
+    with pytest.raises(ValueError):
+        LRUCache(**arguments)
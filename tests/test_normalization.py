@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from SocialChoice.Normalization import NORMALIZATIONS, normalize
+from SocialChoice.ValueGeneration import ValueGeneration
+
+VALUES = np.array([[3.0, 1.0, 0.0], [0.0, 0.0, 0.0], [2.0, 2.0, 1.0], [0.5, 0.5, 0.5]])
+
+
+"""
+Normalizes one row with the formula of each method, in plain Python.
+"""
+
+
+def naive_normalize(row, method):
+    if method == 'unit_sum':
+        scale = sum(row)
+    elif method == 'unit_range':
+        scale = max(row)
+    elif method == 'unit_l2':
+        scale = sum(value * value for value in row) ** 0.5
+    else:
+        row = [value - min(row) for value in row]
+        scale = max(row)
+
+    return [value / scale if scale else 0.0 for value in row]
+
+
+@pytest.mark.parametrize('method', sorted(NORMALIZATIONS))
+def test_kernels_match_naive_rows(method):
+    normalized = normalize(VALUES, method)
+
+    assert normalized is not VALUES
+    assert np.allclose(normalized, [naive_normalize(row, method) for row in VALUES.tolist()])
+    # Zero rows (and constant rows for min_max) become 0, without NaN
+    assert not np.isnan(normalized).any()
+    assert (normalized[1] == 0).all()
+
+
+@pytest.mark.parametrize('method', sorted(NORMALIZATIONS))
+def test_inplace_overwrites_the_values(method):
+    values = VALUES.astype(np.float32)
+    expected = normalize(values, method)
+    normalized = normalize(values, method, inplace=True)
+
+    assert normalized is values
+    assert normalized.dtype == np.float32
+    assert np.array_equal(normalized, expected)
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError, match='Invalid normalization method'):
+        normalize(VALUES, 'softmax')
+
+
+def test_normalize_instances_inplace(make_votes_dict):
+    value_generation = ValueGeneration(make_votes_dict(0, 4, 10), 4, seed=1)
+    k_list = value_generation.generate_k_instances({'Uniform': (2, 2)}, 'True')
+    originals = [instance.values for instance in k_list['Uniform']]
+    copied = value_generation.unit_sum_normalization(k_list)
+    overwritten = value_generation.unit_sum_normalization(k_list, inplace=True)
+
+    for values, copy, inplace in zip(originals, copied, overwritten):
+        assert inplace['Uniform'].values is values
+        assert np.array_equal(copy['Uniform'].values, values)
+        assert np.allclose(values.sum(axis=1), 1)
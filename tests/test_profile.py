@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from SocialChoice.Profile import Profile
+
+
+@pytest.mark.parametrize('complete', [True, False])
+def test_votes_dict_round_trip(make_votes_dict, complete):
+    votes_dict = make_votes_dict(3, 7, 40, complete=complete)
+    profile = Profile.from_votes_dict(votes_dict, 7)
+
+    assert profile.to_votes_dict() == votes_dict
+    assert dict(profile.items()) == votes_dict
+    assert profile.get_num_voters() == sum(votes_dict.values())
+
+
+def test_position_counts(make_votes_dict):
+    votes_dict = make_votes_dict(1, 5, 30)
+    expected = np.zeros((5, 5), dtype=np.int64)
+    for votes, count in votes_dict.items():
+        for rank, entry in enumerate(votes):
+            for alt in entry if isinstance(entry, tuple) else (entry,):
+                expected[alt - 1, rank] += count
+
+    assert np.array_equal(Profile.from_votes_dict(votes_dict, 5).position_counts(), expected)
+
+
+def test_scores_many_matches_single_scores(make_votes_dict):
+    profile = Profile.from_votes_dict(make_votes_dict(2, 5, 30), 5)
+    # Rows of different lengths and types: shorter rows are padded with 0, longer ones are cut to m
+    weight_matrix = [[4, 3, 2, 1, 0], [1], [1, 1, 1, 1, 1, 1, 1], [1.0, 0.5, 0.25]]
+    scores = profile.scores_many(weight_matrix)
+
+    assert scores.shape == (4, 5)
+    for row, weights in enumerate(weight_matrix):
+        assert scores[row] == pytest.approx(profile.scores(weights))
+    assert scores[2].sum() == (np.asarray(profile.ranks) >= 0).sum(axis=1) @ profile.counts
+
+
+def test_ballot_store_round_trip(make_votes_dict, tmp_path):
+    votes_dict = make_votes_dict(4, 6, 40)
+    profile = Profile.from_votes_dict(votes_dict, 6)
+    profile.save_ballot_store(str(tmp_path / 'store'))
+    stored = Profile.open_ballot_store(str(tmp_path / 'store'))
+
+    assert isinstance(stored.ranks, np.memmap)
+    assert stored.store_path == str(tmp_path / 'store')
+    assert stored.to_votes_dict() == votes_dict
+    assert np.array_equal(stored.pairwise_counts(), profile.pairwise_counts())
+    assert np.array_equal(stored.position_counts(), profile.position_counts())
+
+
+def test_empty_ballot_store(tmp_path):
+    Profile.from_votes_dict({}, 4).save_ballot_store(str(tmp_path / 'store'))
+    stored = Profile.open_ballot_store(str(tmp_path / 'store'))
+
+    assert stored.num_alternatives == 4
+    assert stored.to_votes_dict() == {}
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from SocialChoice import Experiment, ResultWriter as result_writer_module
+from SocialChoice.ResultWriter import RESULT_COLUMNS, ResultWriter, result_schema
+
+ROWS = [
+    {'file': 'a.toi', 'rule': 'borda_rule', 'distribution': 'Uniform', 'param': 2.0, 'normalization': 'unit_sum',
+     'instance': 0, 'seed': 2 ** 62, 'mode': 'deterministic', 'winner': 3, 'distortion': 1.25},
+    {'file': 'a.toi', 'rule': 'irv_rule', 'distribution': 'Uniform', 'param': 2.0, 'normalization': 'unit_sum',
+     'instance': 0, 'seed': 2 ** 62, 'mode': 'randomize', 'winner': -1, 'distortion': 1.5},
+]
+
+
+def test_parquet_schema(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    with ResultWriter(str(tmp_path / 'results.parquet'), metadata={'entropy': 42}) as writer:
+        writer.write_rows(ROWS)
+        writer.write_rows(ROWS[:1])
+    table = pq.read_table(writer.path)
+
+    assert writer.format == 'parquet' and writer.num_rows == 3
+    assert table.column_names == list(RESULT_COLUMNS)
+    assert table.schema.remove_metadata() == result_schema()
+    assert table.schema.metadata[b'entropy'] == b'42'
+    assert table.column('seed').to_pylist() == [2 ** 62] * 3
+    assert pq.ParquetFile(writer.path).num_row_groups == 2
+
+
+def test_npz_fallback(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_writer_module, 'pa', None)
+    # Metadata keys may be column names, they are stored apart from the columns
+    with ResultWriter(str(tmp_path / 'results.parquet'), metadata={'file': 'meta', 'seed': 7}) as writer:
+        writer.write_rows(ROWS)
+
+    assert writer.format == 'npz'
+    assert writer.path == str(tmp_path / 'results.npz')
+    with np.load(writer.path) as archive:
+        assert archive['file'].tolist() == ['a.toi', 'a.toi']
+        assert archive['seed'].dtype == np.int64
+        assert archive['meta.file'] == 'meta' and archive['meta.seed'] == '7'
+        assert archive['winner'].tolist() == [3, -1]
+
+
+def test_empty_results(tmp_path):
+    with ResultWriter(str(tmp_path / 'results.npz')) as writer:
+        pass
+
+    with np.load(writer.path) as archive:
+        assert sorted(archive.files) == sorted(RESULT_COLUMNS)
+        assert len(archive['distortion']) == 0
+
+
+def test_parquet_needs_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_writer_module, 'pa', None)
+
+    with pytest.raises(ImportError):
+        ResultWriter(str(tmp_path / 'results.parquet'), format='parquet')
+
+
+def test_command_line_reports_the_written_path(make_ballot_file, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(result_writer_module, 'pa', None)
+    data_file = make_ballot_file(tmp_path / 'election.toi', 0, 4)
+    Experiment.main([data_file, '--rules', 'borda_rule', '--workers', '1', '--seed', '1',
+                     '--output', str(tmp_path / 'results.parquet')])
+
+    assert f"written to {tmp_path / 'results.npz'} " in capsys.readouterr().out
+    with np.load(tmp_path / 'results.npz') as archive:
+        assert archive['rule'].tolist() == ['borda_rule']
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from SocialChoice import ValueGeneration as value_generation_module
+from SocialChoice.Profile import Profile
+from SocialChoice.ValueGeneration import ValueGeneration
+
+NUM_ALTERNATIVES = 6
+
+
+def test_ballot_store_generation_matches_in_memory(make_votes_dict, tmp_path, monkeypatch):
+    votes_dict = make_votes_dict(10, NUM_ALTERNATIVES, 20)
+    Profile.from_votes_dict(votes_dict, NUM_ALTERNATIVES).save_ballot_store(str(tmp_path / 'store'))
+    stored = Profile.open_ballot_store(str(tmp_path / 'store'))
+    distribution_list = {'Uniform': (2, 2)}
+    in_memory = ValueGeneration(votes_dict, NUM_ALTERNATIVES, seed=4).generate_k_instances(distribution_list, 'True')
+    # Pool workers reopen the ballot store from its path, this object is never sent to them
+    monkeypatch.setattr(value_generation_module, '_init_worker', None)
+    from_store = ValueGeneration(stored, NUM_ALTERNATIVES, seed=4).generate_k_instances(distribution_list, 'True',
+                                                                                        parallel=True, max_workers=2)
+
+    for instance, other in zip(in_memory['Uniform'], from_store['Uniform']):
+        assert np.array_equal(instance.values, other.values)
+        assert np.array_equal(instance.orders, other.orders)
+
+
+@pytest.mark.parametrize('is_missing_zero', ['True', 'False'])
+def test_value_generation_is_reproducible(make_votes_dict, is_missing_zero):
+    votes_dict = make_votes_dict(6, NUM_ALTERNATIVES, 20)
+    distribution_list = {'Uniform': (2, 2), 'Exponential': (1, 2)}
+    first, second = (ValueGeneration(votes_dict, NUM_ALTERNATIVES, seed=21)
+                     .generate_k_instances(distribution_list, is_missing_zero) for _ in range(2))
+
+    assert first.keys() == second.keys()
+    for distribution in first:
+        assert len(first[distribution]) == distribution_list[distribution][0]
+        for instance, other in zip(first[distribution], second[distribution]):
+            assert np.array_equal(instance.values, other.values)
+            assert np.array_equal(instance.orders, other.orders)
+    # Instances draw from their own child streams
+    assert not np.array_equal(first['Uniform'][0].values, first['Uniform'][1].values)
+
+
+def test_values_follow_the_ballots(make_votes_dict):
+    votes_dict = make_votes_dict(7, NUM_ALTERNATIVES, 20)
+    value_generation = ValueGeneration(votes_dict, NUM_ALTERNATIVES, seed=8)
+    instance = value_generation.generate_k_instances({'Uniform': (1, 2)}, 'False')['Uniform'][0]
+    ranks = np.asarray(value_generation.profile.ranks, dtype=np.int64)[instance.ballot_index]
+    positions = np.where(ranks >= 0, ranks, NUM_ALTERNATIVES)
+
+    assert len(instance.values) == sum(votes_dict.values())
+    # A preferred alternative never gets a smaller value, and tied alternatives get the same value
+    preferred = positions[:, :, None] < positions[:, None, :]
+    assert (instance.values[:, :, None] >= instance.values[:, None, :])[preferred].all()
+    tied = (positions[:, :, None] == positions[:, None, :]) & (ranks >= 0)[:, :, None]
+    assert (instance.values[:, :, None] == instance.values[:, None, :])[tied].all()
+
+
+def test_missing_alternatives_get_zero(make_votes_dict):
+    votes_dict = make_votes_dict(11, NUM_ALTERNATIVES, 20)
+    value_generation = ValueGeneration(votes_dict, NUM_ALTERNATIVES, seed=2)
+    instance = value_generation.generate_k_instances({'Exponential': (1, 2)}, 'True')['Exponential'][0]
+    missing = np.asarray(value_generation.profile.ranks)[instance.ballot_index] < 0
+
+    assert (instance.values[missing] == 0).all()
+    assert (instance.values[~missing] > 0).all()
+
+
+def test_parallel_generation_matches_sequential(make_votes_dict):
+    votes_dict = make_votes_dict(9, NUM_ALTERNATIVES, 20)
+    distribution_list = {'Uniform': (3, 2)}
+    sequential = ValueGeneration(votes_dict, NUM_ALTERNATIVES, seed=5).generate_k_instances(distribution_list, 'True')
+    parallel = ValueGeneration(votes_dict, NUM_ALTERNATIVES, seed=5).generate_k_instances(distribution_list, 'True',
+                                                                                          parallel=True, max_workers=2)
+
+    for instance, other in zip(sequential['Uniform'], parallel['Uniform']):
+        assert np.array_equal(instance.values, other.values)
+        assert np.array_equal(instance.orders, other.orders)
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from SocialChoice.ValueTensor import ValueTensor
+
+
+@pytest.fixture
+def tensor():
+    values = np.array([[0.5, 0.3, 0.2], [0.6, 0.1, 0.3], [0.1, 0.7, 0.2]])
+    orders = np.array([[1, 2, 3], [1, 3, 2]])
+
+    return ValueTensor(values, np.array([0, 0, 1]), orders=orders)
+
+
+def test_dictionary_view(tensor):
+    assert len(tensor) == 2
+    assert list(tensor) == [((1, 2, 3), 0), ((1, 3, 2), 1)]
+    assert tensor[((1, 3, 2), 1)] == [{1: 0.1, 3: 0.2, 2: 0.7}]
+    assert tensor[((1, 2, 3), 0)] == [{1: 0.5, 2: 0.3, 3: 0.2}, {1: 0.6, 2: 0.1, 3: 0.3}]
+    assert tensor.ballot_rows(((1, 2, 3), 0)) == slice(0, 2)
+
+
+def test_keys_and_orders_build_the_same_tensor(tensor):
+    from_keys = ValueTensor(tensor.values, tensor.ballot_index, keys=list(tensor))
+
+    assert dict(from_keys.items()) == dict(tensor.items())
+
+
+def test_with_values_keeps_the_rankings(tensor):
+    doubled = tensor.with_values(tensor.values * 2)
+
+    assert list(doubled) == list(tensor)
+    assert np.allclose(doubled.total_values(), 2 * tensor.total_values())
+    assert doubled.get_num_alternatives() == 3
+
+
+def test_needs_keys_or_orders():
+    with pytest.raises(ValueError):
+        ValueTensor(np.zeros((1, 2)), np.zeros(1, dtype=np.int64))
@@ -0,0 +1,300 @@
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from SocialChoice.EliminationTally import EliminationTally
+from SocialChoice.Profile import Profile
+from SocialChoice.VotingRules import VotingRules
+
+SEEDS = range(12)
+
+
+"""
+Lists the tie groups of a ballot as sets, the alternatives missing from it as a last group when with_missing is set.
+"""
+
+
+def ballot_groups(votes, num_alternatives, with_missing=False):
+    groups = [set(entry) if isinstance(entry, tuple) else {entry} for entry in votes]
+    missing = set(range(1, num_alternatives + 1)).difference(*groups)
+    if with_missing and missing:
+        groups.append(missing)
+
+    return groups
+
+
+def naive_scores(votes_dict, num_alternatives, weights):
+    scores = {candidate: 0 for candidate in range(1, num_alternatives + 1)}
+
+    for votes, count in votes_dict.items():
+        for index, group in enumerate(ballot_groups(votes, num_alternatives)):
+            for candidate in group:
+                scores[candidate] += weights[index] * count
+
+    return scores
+
+
+def naive_pairwise(votes_dict, num_alternatives):
+    pairwise = [[0] * num_alternatives for _ in range(num_alternatives)]
+
+    for votes, count in votes_dict.items():
+        position = {candidate: index for index, group in enumerate(ballot_groups(votes, num_alternatives)) for candidate in group}
+        for a in range(1, num_alternatives + 1):
+            for b in range(1, num_alternatives + 1):
+                # A ranked alternative beats the missing ones, tied and missing pairs are not compared
+                if position.get(a, num_alternatives) < position.get(b, num_alternatives):
+                    pairwise[a - 1][b - 1] += count
+
+    return pairwise
+
+
+def naive_tally(votes_dict, num_alternatives, remaining, with_missing, from_bottom):
+    tally = {candidate: Fraction(0) for candidate in remaining}
+
+    for votes, count in votes_dict.items():
+        groups = ballot_groups(votes, num_alternatives, with_missing)
+        for group in reversed(groups) if from_bottom else groups:
+            group = group & remaining
+            if group:
+                for candidate in group:
+                    tally[candidate] += Fraction(count, len(group))
+                break
+
+    return tally
+
+
+def naive_irv(votes_dict, num_alternatives):
+    remaining = set(range(1, num_alternatives + 1))
+    points = {}
+
+    for round_number in range(num_alternatives):
+        tally = naive_tally(votes_dict, num_alternatives, remaining, False, False)
+        loser = min(remaining, key=lambda candidate: (tally[candidate], candidate))
+        points[loser] = round_number
+        remaining.remove(loser)
+
+    return points
+
+
+def naive_coombs(votes_dict, num_alternatives):
+    remaining = set(range(1, num_alternatives + 1))
+    num_voters = sum(votes_dict.values())
+    points = {}
+
+    for round_number in range(num_alternatives):
+        top = naive_tally(votes_dict, num_alternatives, remaining, True, False)
+        leader = min(remaining, key=lambda candidate: (-top[candidate], candidate))
+        if top[leader] > Fraction(num_voters, 2) or len(remaining) == 1:
+            points.update({candidate: round_number for candidate in remaining})
+            points[leader] = num_alternatives - 1
+            break
+        bottom = naive_tally(votes_dict, num_alternatives, remaining, True, True)
+        loser = min(remaining, key=lambda candidate: (-bottom[candidate], candidate))
+        points[loser] = round_number
+        remaining.remove(loser)
+
+    return points
+
+
+def remaining_borda(pairwise, remaining):
+    return {a: sum(pairwise[a - 1][b - 1] for b in remaining if b != a) for a in remaining}
+
+
+def naive_baldwin(pairwise, num_alternatives):
+    remaining = set(range(1, num_alternatives + 1))
+    points = {}
+
+    for round_number in range(num_alternatives):
+        borda = remaining_borda(pairwise, remaining)
+        loser = min(remaining, key=lambda candidate: (borda[candidate], candidate))
+        points[loser] = round_number
+        remaining.remove(loser)
+
+    return points
+
+
+def naive_nanson(pairwise, num_alternatives):
+    remaining = set(range(1, num_alternatives + 1))
+    points = {candidate: num_alternatives - 1 for candidate in remaining}
+    num_eliminated = 0
+
+    while remaining:
+        borda = remaining_borda(pairwise, remaining)
+        average = Fraction(sum(borda.values()), len(remaining))
+        losers = {candidate for candidate in remaining if borda[candidate] < average}
+        if not losers:
+            break
+        points.update({candidate: num_eliminated for candidate in losers})
+        num_eliminated += len(losers)
+        remaining -= losers
+
+    return points
+
+
+def naive_schulze(pairwise, num_alternatives):
+    candidates = range(num_alternatives)
+    strength = [[pairwise[a][b] if pairwise[a][b] > pairwise[b][a] else 0 for b in candidates] for a in candidates]
+
+    for k in candidates:
+        for a in candidates:
+            for b in candidates:
+                if a != b and k not in (a, b):
+                    strength[a][b] = max(strength[a][b], min(strength[a][k], strength[k][b]))
+
+    return {a + 1: sum(strength[a][b] > strength[b][a] for b in candidates) for a in candidates}
+
+
+"""
+Locks the pairwise victories from the largest margin down (equal margins in candidate order), skipping those that
+would close a cycle, and scores each candidate by the number of candidates below it in the locked graph.
+"""
+
+
+def naive_ranked_pairs(pairwise, num_alternatives):
+    candidates = range(num_alternatives)
+    victories = sorted(((pairwise[a][b] - pairwise[b][a], a, b) for a in candidates for b in candidates
+                        if pairwise[a][b] > pairwise[b][a]), key=lambda victory: -victory[0])
+    locked = {a: set() for a in candidates}
+
+    def below(a):
+        seen, stack = set(), [a]
+        while stack:
+            for b in locked[stack.pop()] - seen:
+                seen.add(b)
+                stack.append(b)
+        return seen
+
+    for _, winner, loser in victories:
+        if winner not in below(loser):
+            locked[winner].add(loser)
+
+    return {a + 1: len(below(a)) for a in candidates}
+
+
+@pytest.fixture(params=[(seed, complete) for seed in SEEDS for complete in (True, False)])
+def profile(request, make_votes_dict):
+    seed, complete = request.param
+    num_alternatives = 3 + seed % 4
+
+    return make_votes_dict(seed, num_alternatives, 15, complete=complete), num_alternatives
+
+
+def test_positional_rules_match_naive_scores(profile):
+    votes_dict, m = profile
+    rules = VotingRules(votes_dict, m)
+
+    assert rules.plurality_rule() == naive_scores(votes_dict, m, [1] + [0] * (m - 1))
+    assert rules.borda_rule() == naive_scores(votes_dict, m, list(range(m - 1, -1, -1)))
+    assert rules.veto_rule() == naive_scores(votes_dict, m, [1] * (m - 1) + [0])
+    assert rules.k_approval_rule(2) == naive_scores(votes_dict, m, [1, 1] + [0] * (m - 2))
+    assert rules.harmonic_rule() == pytest.approx(naive_scores(votes_dict, m, [1 / (i + 1) for i in range(m)]))
+
+    weights = np.random.default_rng(m).integers(0, 10, size=m).tolist()
+    assert rules.scoring_rule(weights) == naive_scores(votes_dict, m, weights)
+
+
+def test_score_many_matches_naive_scores(profile):
+    votes_dict, m = profile
+    weight_matrix = np.random.default_rng(m).integers(0, 10, size=(3, m)).tolist()
+    scores = VotingRules(votes_dict, m).score_many(weight_matrix)
+
+    assert scores.tolist() == [list(naive_scores(votes_dict, m, weights).values()) for weights in weight_matrix]
+
+
+def test_pairwise_rules_match_naive_matrix(profile):
+    votes_dict, m = profile
+    rules = VotingRules(votes_dict, m)
+    pairwise = naive_pairwise(votes_dict, m)
+
+    assert rules.pairwise_matrix().tolist() == pairwise
+
+    copeland = {a + 1: sum(1 if pairwise[a][b] > pairwise[b][a] else 0.5 if pairwise[a][b] == pairwise[b][a] else 0
+                           for b in range(m) if b != a) for a in range(m)}
+    maximin = {a + 1: min(pairwise[a][b] for b in range(m) if b != a) for a in range(m)}
+    assert rules.copeland_rule() == copeland
+    assert rules.maximin_rule() == maximin
+    assert rules.schulze_rule() == naive_schulze(pairwise, m)
+    assert rules.ranked_pairs_rule() == naive_ranked_pairs(pairwise, m)
+
+
+def test_condorcet_winner_wins_every_condorcet_rule(profile):
+    votes_dict, m = profile
+    rules = VotingRules(votes_dict, m)
+    margins = rules.profile.margins()
+    # Most of the random profiles have a Condorcet winner
+    for winner in [a for a in range(m) if all(margins[a, b] > 0 for b in range(m) if b != a)]:
+        for rule in (rules.copeland_rule, rules.ranked_pairs_rule, rules.schulze_rule, rules.kemeny_rule):
+            scores = rule()
+            assert max(scores, key=scores.get) == winner + 1
+
+
+def test_elimination_rules_match_exact_recount(profile):
+    votes_dict, m = profile
+    rules = VotingRules(votes_dict, m)
+    pairwise = naive_pairwise(votes_dict, m)
+
+    assert rules.irv_rule() == naive_irv(votes_dict, m)
+    assert rules.coombs_rule() == naive_coombs(votes_dict, m)
+    assert rules.baldwin_rule() == naive_baldwin(pairwise, m)
+    assert rules.nanson_rule() == naive_nanson(pairwise, m)
+
+
+def test_elimination_ties_are_broken_towards_the_lowest_candidate():
+    # Three tied first places eliminate 1, whose ballot then gives 2 the lead over 3 and the shared tie group
+    votes_dict = {(1, 2, 3): 1, (2, 3, 1): 1, (3, 1, 2): 1, ((1, 2, 3),): 3}
+    rules = VotingRules(votes_dict, 3)
+
+    assert rules.irv_rule() == naive_irv(votes_dict, 3) == {1: 0, 2: 2, 3: 1}
+
+
+@pytest.mark.parametrize('from_bottom, include_unranked', [(False, False), (False, True), (True, True)])
+def test_elimination_tally_matches_recount_after_each_round(profile, from_bottom, include_unranked):
+    votes_dict, m = profile
+    tally = EliminationTally(Profile.from_votes_dict(votes_dict, m), from_bottom, include_unranked)
+    remaining = set(range(1, m + 1))
+
+    for candidate in np.random.default_rng(m).permutation(m) + 1:
+        expected = naive_tally(votes_dict, m, remaining, include_unranked, from_bottom)
+        assert tally.tally[[c - 1 for c in remaining]] == pytest.approx([float(expected[c]) for c in remaining])
+        for c in remaining:
+            # The supporter index lists exactly the ballots whose current group holds the candidate
+            supporters = np.concatenate(tally.supporters[c - 1]) if tally.supporters[c - 1] else []
+            members = tally._members(np.arange(len(tally.counts)))
+            assert sorted(supporters) == np.flatnonzero(members[:, c - 1]).tolist()
+
+        tally.eliminate(candidate - 1)
+        remaining.remove(candidate)
+
+    assert tally.active_voters() == 0
+
+
+def test_first_place_lotteries_match_naive_shares(profile):
+    votes_dict, m = profile
+    rules = VotingRules(votes_dict, m)
+    shares = {candidate: Fraction(0) for candidate in range(1, m + 1)}
+    for votes, count in votes_dict.items():
+        top = ballot_groups(votes, m)[0]
+        for candidate in top:
+            shares[candidate] += Fraction(count, len(top))
+
+    dictatorship = rules.random_dictatorship_rule()
+    squared = rules.squared_plurality_rule()
+    assert sum(dictatorship.values()) == pytest.approx(1)
+    assert dictatorship == pytest.approx({c: float(share / sum(shares.values())) for c, share in shares.items()})
+    squares = {candidate: share ** 2 for candidate, share in shares.items()}
+    assert squared == pytest.approx({c: float(square / sum(squares.values())) for c, square in squares.items()})
+
+
+def test_maximal_lottery_is_unbeaten(profile):
+    pytest.importorskip('scipy')
+    votes_dict, m = profile
+    rules = VotingRules(votes_dict, m)
+    margins = rules.profile.margins()
+    lottery = np.array(list(rules.maximal_lottery_rule().values()))
+
+    assert lottery.min() >= 0 and lottery.sum() == pytest.approx(1)
+    # No candidate beats the lottery in expectation, and a Condorcet winner gets all of it
+    assert (lottery @ margins >= -1e-9 * margins.max(initial=1)).all()
+    for winner in [a for a in range(m) if all(margins[a, b] > 0 for b in range(m) if b != a)]:
+        assert lottery[winner] == pytest.approx(1)
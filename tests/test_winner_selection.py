@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from SocialChoice import WinnerSelection
+from SocialChoice.VotingRules import VotingRules
+from SocialChoice.WinnerSelection import select_winners, tie_lottery, tied_winners
+
+# Two instances of three rules over four alternatives, with single winners, two-way and four-way ties
+SCORES = np.array([[[1, 3, 3, 0], [5, 1, 2, 4], [2, 2, 2, 2]],
+                   [[0, 0, 1, 1], [7, 7, 6, 7], [1, 2, 3, 4]]], dtype=float)
+TIED = SCORES == SCORES.max(axis=-1, keepdims=True)
+
+
+def test_tied_winners():
+    assert np.array_equal(tied_winners(SCORES), TIED)
+    assert tied_winners([1.0, 1.0 - 1e-12, 0.5], tolerance=1e-9).tolist() == [True, True, False]
+
+
+def test_lexicographic_winners():
+    assert select_winners(SCORES).tolist() == [[2, 1, 1], [3, 1, 4]]
+
+
+def test_random_winners_are_tied_and_seeded():
+    winners = select_winners(np.broadcast_to(SCORES, (500,) + SCORES.shape), 'random', seed=3)
+
+    assert np.array_equal(winners, select_winners(np.broadcast_to(SCORES, (500,) + SCORES.shape), 'random', seed=3))
+    assert np.take_along_axis(np.broadcast_to(TIED, winners.shape + (4,)), winners[..., None] - 1, -1).all()
+    # Every tied winner of the four-way tie is drawn about as often
+    assert np.bincount(winners[:, 0, 2] - 1, minlength=4) == pytest.approx([125] * 4, abs=40)
+
+
+def test_tie_lottery():
+    lottery = tie_lottery(SCORES)
+
+    assert np.allclose(lottery.sum(axis=-1), 1)
+    assert np.allclose(lottery, TIED / TIED.sum(axis=-1, keepdims=True))
+
+
+def test_unknown_tie_breaker():
+    with pytest.raises(ValueError, match='Invalid tie-breaking rule'):
+        select_winners(SCORES, 'alphabetical')
+
+
+def test_registered_tie_breaker(monkeypatch):
+    monkeypatch.setitem(WinnerSelection.TIE_BREAKERS, 'last',
+                        lambda tied, rng: tied.shape[-1] - 1 - np.argmax(tied[..., ::-1], axis=-1))
+
+    assert select_winners(SCORES, 'last').tolist() == [[3, 1, 4], [4, 4, 4]]
+
+
+def test_winner_tie_break_ignores_dictionary_order():
+    rules = VotingRules({(1, 2, 3): 1}, 3)
+    scores = {3: 2.0, 1: 0.0, 2: 2.0}
+
+    assert rules.winner_determinstic(scores) == 2
+    assert rules.winner_tie_break(scores, 'random', seed=1) in (2, 3)
+    assert rules.winner_tie_break(scores, 'lottery') == {3: 0.5, 2: 0.5}
+    assert rules.winners_tied(scores) == [3, 2]
+
+
+def test_winner_many_matches_single_winners():
+    rules = VotingRules({(1, 2, 3, 4): 1}, 4)
+    winners = rules.winner_many(SCORES)
+
+    for index in np.ndindex(SCORES.shape[:-1]):
+        assert winners[index] == rules.winner_determinstic(rules.scores_dict(SCORES[index]))
+    assert np.array_equal(rules.winner_many(SCORES, 'lottery'), tie_lottery(SCORES))
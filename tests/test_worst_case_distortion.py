@@ -0,0 +1,73 @@
+import itertools
+from fractions import Fraction
+
+import pytest
+
+from SocialChoice.WorstCaseDistortion import WorstCaseDistortion
+
+pytest.importorskip('scipy')
+
+
+"""
+Lists the vertices of the unit-sum utilities consistent with a ballot: the uniform utilities over each up-set of
+its order, i.e. over the first k tie groups, or over every ranked group and any subset of the missing alternatives.
+"""
+
+
+def ballot_vertices(votes, num_alternatives):
+    groups = [set(entry) if isinstance(entry, tuple) else {entry} for entry in votes]
+    missing = sorted(set(range(1, num_alternatives + 1)).difference(*groups))
+    up_sets = [set().union(*groups[:k]) for k in range(1, len(groups))]
+    for size in range(len(missing) + 1):
+        up_sets += [set().union(*groups, subset) for subset in itertools.combinations(missing, size)]
+
+    return [{alt: Fraction(1, len(up_set)) if alt in up_set else Fraction(0) for alt in range(1, num_alternatives + 1)}
+            for up_set in up_sets]
+
+
+"""
+Computes the worst-case ratio SW(candidate) / SW(winner) by trying every choice of one vertex per ballot, which is
+where the linear-fractional program reaches its maximum.
+"""
+
+
+def brute_force_ratio(votes_dict, num_alternatives, candidate, mass):
+    worst = Fraction(0)
+    ballots = [(ballot_vertices(votes, num_alternatives), count) for votes, count in votes_dict.items()]
+
+    for choice in itertools.product(*(vertices for vertices, _ in ballots)):
+        candidate_welfare = sum(count * utilities[candidate] for utilities, (_, count) in zip(choice, ballots))
+        winner_welfare = sum(count * probability * utilities[alt]
+                             for utilities, (_, count) in zip(choice, ballots) for alt, probability in mass.items())
+        if winner_welfare == 0:
+            if candidate_welfare > 0:
+                return float('inf')
+            continue
+        worst = max(worst, candidate_welfare / winner_welfare)
+
+    return float(worst)
+
+
+INSTANCES = [
+    # Complete ballots, with ties
+    ({(1, 2, 3): 3, (2, 3, 1): 2, (3, (1, 2)): 2, ((2, 3), 1): 1}, 3),
+    ({(1, 2, 3, 4): 2, ((2, 3), 4, 1): 3, (4, (1, 3), 2): 1, ((1, 4), (2, 3)): 2}, 4),
+    # Ballots with missing alternatives
+    ({(1, 2): 2, (3,): 1, ((2, 3), 1): 2}, 3),
+    ({(2, 1): 3, ((3, 4),): 1, (4, 1, 2): 2}, 4),
+    # Every ballot ranks the candidate first and the winner last
+    ({(1, 2, 3): 4}, 3),
+]
+
+
+@pytest.mark.parametrize('votes_dict, num_alternatives', INSTANCES)
+@pytest.mark.parametrize('winner', [1, 2, {1: 0.5, 3: 0.5}])
+def test_lp_matches_brute_force(votes_dict, num_alternatives, winner):
+    mass = {winner: Fraction(1)} if isinstance(winner, int) else \
+        {alt: Fraction(probability) for alt, probability in winner.items()}
+    worst_case = WorstCaseDistortion(votes_dict, num_alternatives)
+    expected = {candidate: brute_force_ratio(votes_dict, num_alternatives, candidate, mass)
+                for candidate in range(1, num_alternatives + 1)}
+
+    assert worst_case.candidate_distortions(winner) == pytest.approx(expected, rel=1e-7)
+    assert worst_case.distortion(winner) == pytest.approx(max(1.0, *expected.values()), rel=1e-7)